@@ -0,0 +1,302 @@
+# ✅ backend/admission.py
+# Load protection, so overload turns into quick 429/503s and degraded answers
+# instead of queues of upstream calls:
+#   - per-client token buckets in each worker (RATE_LIMIT_RPS, burst
+#     RATE_LIMIT_BURST; 0 turns client limits off), plus a per-minute quota on the LLM / Roboflow routes
+#     counted in shared state so it holds across workers -> 429 + Retry-After
+#   - a cap on requests in flight per worker (MAX_INFLIGHT_REQUESTS) -> 503
+#   - one guard per upstream (openrouter, roboflow, data.gov.in): a
+#     concurrency limit whose queue wait is bounded (UPSTREAM_QUEUE_TIMEOUT),
+#     and a circuit breaker that opens after BREAKER_FAILURES failed or slow
+#     calls in a row, fails fast for BREAKER_COOLDOWN seconds, then lets one
+#     probe call through
+# Guards raise UpstreamUnavailable; routes catch it to serve a cached or
+# degraded response, or a 503 via unavailable_response().
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from shared_state import shared_state
+from metrics import register_collector
+
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "2"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+RATE_LIMIT_CLIENTS = int(os.getenv("RATE_LIMIT_CLIENTS", "10000"))
+MAX_INFLIGHT_REQUESTS = int(os.getenv("MAX_INFLIGHT_REQUESTS", "256"))
+UPSTREAM_QUEUE_TIMEOUT = float(os.getenv("UPSTREAM_QUEUE_TIMEOUT", "5"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))
+BREAKER_SLOW_CALL = float(os.getenv("BREAKER_SLOW_CALL", "20"))
+
+# Tokens per request; routes listed here also count against the shared per-minute quota
+ROUTE_COSTS = {
+    "/diagnose/batch": 5,
+    "/diagnose": 2,
+    "/krishigpt": 1,
+    "/krishigpt/stream": 1,
+    "/fertilizer-advice": 1,
+    "/generate-calendar": 1,
+    "/generate-calendar/stream": 1,
+    "/news": 1,
+}
+DEFAULT_COST = 0.25
+# Probes, scrapes and long-lived streams
+EXEMPT_PATHS = {"/", "/metrics", "/admission/stats", "/price-alerts/stream", "/mandi-rates/status", "/reels/status", "/price-alerts/status"}
+
+
+class UpstreamUnavailable(Exception):
+    def __init__(self, upstream, reason, retry_after=1):
+        super().__init__(f"{upstream} is {reason}, try again shortly")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+def unavailable_response(e, **content):
+    return JSONResponse(
+        status_code=503,
+        content={"error": str(e), "retry_after": e.retry_after, **content},
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+class UpstreamGuard:
+    def __init__(self, name, limit, queue_timeout=UPSTREAM_QUEUE_TIMEOUT, failures=BREAKER_FAILURES,
+                 cooldown=BREAKER_COOLDOWN, slow_call=BREAKER_SLOW_CALL):
+        self.name = name
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.failure_threshold = failures
+        self.cooldown = cooldown
+        self.slow_call = slow_call
+        self._semaphore = None
+        self._loop = None
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.opens = 0
+        self.rejected_open = 0
+        self.rejected_busy = 0
+
+    def _get_semaphore(self):
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+        return self._semaphore
+
+    def _admit(self):
+        # Raises while open; after the cooldown one caller becomes the probe
+        if self.state == "open":
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0:
+                self.rejected_open += 1
+                raise UpstreamUnavailable(self.name, "unavailable", remaining)
+            self.state = "half-open"
+        if self.state == "half-open":
+            if self.probing:
+                self.rejected_open += 1
+                raise UpstreamUnavailable(self.name, "recovering", 1)
+            self.probing = True
+            return True
+        return False
+
+    def _record(self, ok, elapsed, slow_call):
+        if ok and (slow_call is None or elapsed < slow_call):
+            self.consecutive_failures = 0
+            if self.state == "half-open":
+                print(f"✅ {self.name} circuit closed")
+            self.state = "closed"
+            return
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == "half-open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opens += 1
+                print(f"⚠️ {self.name} circuit open for {self.cooldown:.0f}s after {self.consecutive_failures} failed calls")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    @asynccontextmanager
+    async def guard(self, slow_call=-1):
+        # async with guard.guard() as call: ... call["ok"] = False marks a failed reply.
+        # slow_call=None disables the slow-call check (e.g. for streams).
+        slow_call = self.slow_call if slow_call == -1 else slow_call
+        probe = self._admit()
+        semaphore = self._get_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if probe:
+                self.probing = False
+            self.rejected_busy += 1
+            raise UpstreamUnavailable(self.name, "busy", 1)
+
+        self.calls += 1
+        self.in_flight += 1
+        call = {"ok": True}
+        outcome = None
+        started = time.monotonic()
+        try:
+            yield call
+            outcome = call["ok"]
+        except asyncio.CancelledError:
+            raise  # the client went away; says nothing about the upstream
+        except Exception:
+            outcome = False
+            raise
+        finally:
+            semaphore.release()
+            self.in_flight -= 1
+            if probe:
+                self.probing = False
+            if outcome is not None:
+                self._record(outcome, time.monotonic() - started, slow_call)
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "failures": self.failures,
+            "opens": self.opens,
+            "rejected_open": self.rejected_open,
+            "rejected_busy": self.rejected_busy,
+        }
+
+
+_guards = {}
+
+
+def upstream_guard(name, limit=8):
+    if name not in _guards:
+        _guards[name] = UpstreamGuard(name, limit)
+    return _guards[name]
+
+
+class RateLimiter:
+    # Token bucket per client in this worker; LRU-bounded
+    def __init__(self, rate=RATE_LIMIT_RPS, burst=RATE_LIMIT_BURST, max_clients=RATE_LIMIT_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def take(self, client, cost=1.0):
+        # Returns 0 when allowed, else seconds until `cost` tokens are available
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+            self.allowed += 1
+        else:
+            wait = (cost - tokens) / self.rate if self.rate > 0 else 60.0
+            self.limited += 1
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+rate_limiter = RateLimiter()
+_admission = {"in_flight": 0, "rejected": 0, "quota_limited": 0}
+
+
+def client_key(request: Request):
+    # The connecting address. uvicorn replaces it with the X-Forwarded-For client
+    # only when the peer is listed in FORWARDED_ALLOW_IPS (see serve.py);
+    # otherwise every request through a proxy shares the proxy's bucket
+    return request.client.host if request.client else "unknown"
+
+
+def too_many_requests(retry_after, message):
+    retry_after = max(1, int(retry_after + 0.999))
+    return JSONResponse(
+        status_code=429,
+        content={"error": message, "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+async def shared_quota_exceeded(client, cost):
+    # Fixed one-minute window shared by all workers
+    window = int(time.time() // 60)
+    used = await asyncio.to_thread(shared_state.incr, f"ratelimit:{client}:{window}", cost, 120)
+    return used > RATE_LIMIT_PER_MINUTE
+
+
+async def admission_middleware(request: Request, call_next):
+    path = request.url.path
+    if request.method == "OPTIONS" or path in EXEMPT_PATHS:
+        return await call_next(request)
+
+    client = client_key(request)
+    if RATE_LIMIT_RPS > 0:
+        wait = rate_limiter.take(client, ROUTE_COSTS.get(path, DEFAULT_COST))
+        if wait:
+            return too_many_requests(wait, "Too many requests, slow down")
+    if path in ROUTE_COSTS and RATE_LIMIT_RPS > 0 and RATE_LIMIT_PER_MINUTE > 0:
+        try:
+            if await shared_quota_exceeded(client, ROUTE_COSTS[path]):
+                _admission["quota_limited"] += 1
+                return too_many_requests(60 - time.time() % 60, "Per-minute quota used up")
+        except Exception as e:
+            print("⚠️ Shared rate limit unavailable:", e)
+
+    if _admission["in_flight"] >= MAX_INFLIGHT_REQUESTS:
+        _admission["rejected"] += 1
+        return JSONResponse(status_code=503, content={"error": "Server busy, try again shortly", "retry_after": 1},
+                            headers={"Retry-After": "1"})
+    # Streaming responses leave the count once their headers are sent
+    _admission["in_flight"] += 1
+    try:
+        return await call_next(request)
+    finally:
+        _admission["in_flight"] -= 1
+
+
+def admission_stats():
+    return {
+        "in_flight": _admission["in_flight"],
+        "max_in_flight": MAX_INFLIGHT_REQUESTS,
+        "rejected_overload": _admission["rejected"],
+        "rate_limited": rate_limiter.limited,
+        "quota_limited": _admission["quota_limited"],
+        "allowed": rate_limiter.allowed,
+        "upstreams": {name: guard.stats() for name, guard in _guards.items()},
+    }
+
+
+@register_collector
+def admission_gauges():
+    guards = {name: guard.stats() for name, guard in _guards.items()}
+    return {
+        "agrisaarthi_rate_limited_total": ("Requests refused with 429, by limit.", {
+            (("limit", "token_bucket"),): rate_limiter.limited, (("limit", "minute_quota"),): _admission["quota_limited"],
+        }),
+        "agrisaarthi_overload_rejected_total": ("Requests refused with 503 at the in-flight cap.", {(): _admission["rejected"]}),
+        "agrisaarthi_requests_in_flight": ("Requests in flight on this worker.", {(): _admission["in_flight"]}),
+        "agrisaarthi_circuit_open": ("1 while the upstream circuit breaker is open or probing.", {
+            (("upstream", name),): int(g["state"] != "closed") for name, g in guards.items()
+        }),
+        "agrisaarthi_upstream_rejected_total": ("Upstream calls refused by the guard, by reason.", {
+            **{(("upstream", name), ("reason", "open")): g["rejected_open"] for name, g in guards.items()},
+            **{(("upstream", name), ("reason", "busy")): g["rejected_busy"] for name, g in guards.items()},
+        }),
+        "agrisaarthi_upstream_in_flight": ("Calls in flight per upstream.", {(("upstream", name),): g["in_flight"] for name, g in guards.items()}),
+    }
@@ -0,0 +1,130 @@
+# ✅ backend/benchmarks/bench_cold_start.py
+# Cold start of a worker: `import main` time (with a python -X importtime
+# breakdown of main's direct imports) and spawn-to-first-response of uvicorn.
+# Fails with --check when the median import time is over the target.
+#
+#   cd backend && python -m benchmarks.bench_cold_start --runs 5
+#   python -m benchmarks.bench_cold_start --check --target 0.6
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results", "cold_start")
+COLD_START_TARGET = float(os.getenv("COLD_START_TARGET", "0.6"))
+# Must stay out of `import main`; they are loaded lazily / by the warm-up thread
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "inference_sdk", "feedparser", "PIL", "requests"]
+
+
+def import_profile():
+    # Runs `import main` in a fresh interpreter; returns (seconds, {module: cumulative seconds}, heavy modules loaded)
+    code = f"import sys, main; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    children = {}
+    total = None
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if depth == 1:
+            children[name] = int(cumulative) / 1e6
+        elif depth == 0 and name == "main":
+            total = int(cumulative) / 1e6
+            break
+        elif depth == 0:
+            children.clear()  # a top-level import before main (site, encodings, ...)
+    heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return total, children, heavy
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_response(timeout=60):
+    port = free_port()
+    env = {**os.environ, "MANDI_REFRESH_INTERVAL": "86400", "REELS_REFRESH_INTERVAL": "86400"}
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError("uvicorn did not answer in time")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure worker cold-start time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest direct imports of main to show")
+    parser.add_argument("--target", type=float, default=COLD_START_TARGET, help="median import budget in seconds")
+    parser.add_argument("--check", action="store_true", help="exit 1 if over target or a heavy module is imported eagerly")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    imports, profiles, heavy = [], [], set()
+    for _ in range(args.runs):
+        total, children, loaded = import_profile()
+        imports.append(total)
+        profiles.append(children)
+        heavy.update(loaded)
+    first_response = [time_to_first_response() for _ in range(args.runs)]
+
+    modules = {name: statistics.median(p.get(name, 0) for p in profiles) for name in profiles[-1]}
+    slowest = sorted(modules.items(), key=lambda item: -item[1])[:args.top]
+    result = {
+        "meta": {"timestamp": datetime.now().isoformat(timespec="seconds"), "runs": args.runs, "target": args.target},
+        "import_main_s": round(statistics.median(imports), 3),
+        "first_response_s": round(statistics.median(first_response), 3),
+        "eager_heavy_modules": sorted(heavy),
+        "slowest_imports_s": {name: round(seconds, 3) for name, seconds in slowest},
+    }
+
+    print(f"import main       : {result['import_main_s']:.3f} s median of {args.runs} (target {args.target:.2f} s)")
+    print(f"first response    : {result['first_response_s']:.3f} s (uvicorn spawn -> GET /)")
+    print(f"heavy at import   : {', '.join(result['eager_heavy_modules']) or 'none'}")
+    print("slowest direct imports of main:")
+    for name, seconds in slowest:
+        print(f"  {name:<28}{seconds * 1000:8.1f} ms")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved {os.path.relpath(path, BACKEND_DIR)}")
+
+    if args.check and (result["import_main_s"] > args.target or result["eager_heavy_modules"]):
+        print("⚠️ Cold start over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# ✅ backend/benchmarks/bench_llm_client.py
+# Concurrent OpenRouter throughput: blocking requests.post inside async
+# handlers (old path) vs the shared pooled async client (new path).
+#
+#   cd backend && python -m benchmarks.bench_llm_client --requests 64 --latency 0.2
+import os
+import sys
+import time
+import asyncio
+import argparse
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubServer, openrouter_app
+import llm_client
+
+
+async def blocking_call(url, prompt):
+    # What the handlers used to do: a sync HTTP call on the event loop.
+    res = requests.post(url, json={"model": llm_client.DEFAULT_MODEL, "messages": [{"role": "user", "content": prompt}]})
+    res.raise_for_status()
+    return res.json()["choices"][0]["message"]["content"]
+
+
+async def run_batch(fn, n):
+    start = time.perf_counter()
+    await asyncio.gather(*(fn(f"question {i}") for i in range(n)))
+    return time.perf_counter() - start
+
+
+async def main(n, url):
+    before = await run_batch(lambda p: blocking_call(url, p), n)
+    after = await run_batch(lambda p: llm_client.chat_completion(p), n)
+    await llm_client.close_client()
+    return before, after
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    openrouter_app.state.latency = args.latency
+    with StubServer(openrouter_app) as stub:
+        llm_client.OPENROUTER_URL = f"{stub.url}/api/v1/chat/completions"
+        before, after = asyncio.run(main(args.requests, llm_client.OPENROUTER_URL))
+
+    print(f"{args.requests} completions @ {args.latency * 1000:.0f} ms stub latency "
+          f"(LLM_MAX_CONCURRENCY={llm_client.LLM_MAX_CONCURRENCY})")
+    print(f"  blocking requests.post : {before:7.2f} s  {args.requests / before:8.1f} req/s")
+    print(f"  pooled async client    : {after:7.2f} s  {args.requests / after:8.1f} req/s")
+    print(f"  speedup                : {before / after:7.1f}x")
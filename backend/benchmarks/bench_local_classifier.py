@@ -0,0 +1,205 @@
+# ✅ backend/benchmarks/bench_local_classifier.py
+# CPU latency of the local disease classifier (local_classifier.py): raw model
+# time per batch size, then end-to-end through the micro-batching pool under
+# concurrency, unbatched vs batched. Without --model-dir a small random-weight
+# CNN is exported to ONNX (needs the onnx package) in fp32 and int8 (static
+# QDQ quantization), so the numbers show the runtime/batching overhead rather
+# than a real model's accuracy.
+#
+#   cd backend && python -m benchmarks.bench_local_classifier
+#   python -m benchmarks.bench_local_classifier --model-dir crop_diagnosis/models --crop tomato
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from local_classifier import LocalClassifier, CropModel, intra_op_threads
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results", "local_classifier")
+SYNTHETIC_LABELS = ["Early Blight", "Late Blight", "Leaf Mold", "Healthy"]
+
+
+def build_synthetic_model(path, input_size=224, classes=len(SYNTHETIC_LABELS), seed=0):
+    # Four strided 3x3 convs (16-32-64-128 channels) -> global pool -> linear, batch dim dynamic
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(seed)
+    nodes, weights = [], []
+    channels, previous = 3, "image"
+    for i, width in enumerate((16, 32, 64, 128)):
+        w = rng.normal(0, (2 / (9 * channels)) ** 0.5, (width, channels, 3, 3)).astype(np.float32)
+        weights += [numpy_helper.from_array(w, f"conv{i}.w"), numpy_helper.from_array(np.zeros(width, np.float32), f"conv{i}.b")]
+        nodes += [
+            helper.make_node("Conv", [previous, f"conv{i}.w", f"conv{i}.b"], [f"conv{i}"], pads=[1, 1, 1, 1], strides=[2, 2]),
+            helper.make_node("Relu", [f"conv{i}"], [f"relu{i}"]),
+        ]
+        channels, previous = width, f"relu{i}"
+    fc = rng.normal(0, 0.1, (channels, classes)).astype(np.float32)
+    weights += [numpy_helper.from_array(fc, "fc.w"), numpy_helper.from_array(np.zeros(classes, np.float32), "fc.b")]
+    nodes += [
+        helper.make_node("GlobalAveragePool", [previous], ["pool"]),
+        helper.make_node("Flatten", ["pool"], ["flat"]),
+        helper.make_node("Gemm", ["flat", "fc.w", "fc.b"], ["logits"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "synthetic-crop-classifier",
+        [helper.make_tensor_value_info("image", TensorProto.FLOAT, ["N", 3, input_size, input_size])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["N", classes])],
+        initializer=weights,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+def quantize(source, target, input_size=224, samples=16):
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class RandomImages(CalibrationDataReader):
+        def __init__(self):
+            rng = np.random.default_rng(1)
+            self.batches = iter([{"image": rng.normal(0, 1, (1, 3, input_size, input_size)).astype(np.float32)} for _ in range(samples)])
+
+        def get_next(self):
+            return next(self.batches, None)
+
+    quantize_static(source, target, RandomImages(), quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+
+
+def synthetic_models(workdir, input_size):
+    labels = os.path.join(workdir, "labels.json")
+    with open(labels, "w", encoding="utf-8") as f:
+        json.dump({"labels": SYNTHETIC_LABELS, "input_size": input_size}, f)
+    fp32 = os.path.join(workdir, "fp32")
+    int8 = os.path.join(workdir, "int8")
+    for d in (fp32, int8):
+        os.makedirs(d)
+        os.link(labels, os.path.join(d, "bench.json"))
+    build_synthetic_model(os.path.join(fp32, "bench.onnx"), input_size)
+    quantize(os.path.join(fp32, "bench.onnx"), os.path.join(int8, "bench.onnx"), input_size)
+    return {"fp32": (fp32, "bench"), "int8": (int8, "bench")}
+
+
+def photos(count, seed=0):
+    # Phone-sized frames, as /diagnose hands them over after prepare_image
+    rng = np.random.default_rng(seed)
+    return [Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)) for _ in range(count)]
+
+
+def model_latency(model, images, batch_sizes, rounds):
+    # Median ms per batch for model.predict alone (preprocessing excluded)
+    prepared = np.stack([model.preprocess(image) for image in images])
+    result = {}
+    for size in batch_sizes:
+        if size > 1 and not model.batched:
+            continue
+        batch = prepared[:size]
+        model.predict(batch)  # warm-up
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            model.predict(batch)
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        result[size] = {"batch_ms": round(median * 1000, 2), "per_image_ms": round(median * 1000 / size, 2)}
+    return result
+
+
+async def pool_run(classifier, crop, images, requests, concurrency):
+    # `requests` classify calls, at most `concurrency` in flight
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await classifier.classify(crop, images[i % len(images)])
+            latencies.append(time.perf_counter() - started)
+
+    await classifier.classify(crop, images[0])  # load + warm-up
+    classifier.batches = classifier.images = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "images_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "avg_batch_size": classifier.stats()["avg_batch_size"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU latency of the local crop disease classifier.")
+    parser.add_argument("--model-dir", help="benchmark real models from this directory instead of a synthetic one")
+    parser.add_argument("--crop", default="tomato")
+    parser.add_argument("--input-size", type=int, default=224)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--batch-wait-ms", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    images = photos(args.batch_size)
+    batch_sizes = sorted({1, 4, args.batch_size})
+    result = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "cpus": os.cpu_count(),
+            **{k: v for k, v in vars(args).items() if k != "no_save"},
+        },
+        "variants": {},
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.model_dir:
+            variants = {"model": (args.model_dir, args.crop)}
+        else:
+            variants = synthetic_models(workdir, args.input_size)
+
+        for name, (model_dir, crop) in variants.items():
+            with open(os.path.join(model_dir, crop + ".json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            path = LocalClassifier(model_dir).model_path(crop)
+            model = CropModel(path, meta, threads=intra_op_threads(1))
+            variant = {"model": os.path.basename(path), "size_kb": round(os.path.getsize(path) / 1024, 1)}
+            variant["model_latency"] = model_latency(model, images, batch_sizes, args.rounds)
+            for label, batch_size in (("unbatched", 1), ("batched", args.batch_size)):
+                classifier = LocalClassifier(model_dir, batch_size=batch_size, batch_wait_ms=args.batch_wait_ms, threads=args.threads)
+                variant[label] = asyncio.run(pool_run(classifier, crop, images, args.requests, args.concurrency))
+            result["variants"][name] = variant
+
+            print(f"{name}: {variant['model']} ({variant['size_kb']} KB)")
+            for size, timing in variant["model_latency"].items():
+                print(f"  model batch={size:<3} {timing['batch_ms']:8.2f} ms/batch {timing['per_image_ms']:8.2f} ms/image")
+            for label in ("unbatched", "batched"):
+                run = variant[label]
+                print(f"  pool {label:<10} {run['images_per_s']:8.1f} img/s  p50 {run['p50_ms']:7.1f} ms  "
+                      f"p95 {run['p95_ms']:7.1f} ms  avg batch {run['avg_batch_size']}")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved {os.path.relpath(path, os.path.dirname(os.path.dirname(__file__)))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# ✅ backend/benchmarks/bench_mandi_analytics.py
+# Cost of keeping the mandi analytics current (full rebuild vs the update
+# after an incremental ingest that adds a day or changes nothing) and per-query latency of the precomputed
+# answers vs computing the same 7/30-day rolling stats from the rows per
+# request with pandas.
+#
+#   cd backend && python -m benchmarks.bench_mandi_analytics --markets 1500 --commodities 20 --days 90
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mandi_analytics import MandiAnalytics
+
+
+def make_frame(markets, commodities, days, coverage, seed=7):
+    # One row per (market, commodity, day) reported, like the store frame
+    rng = np.random.default_rng(seed)
+    series = markets * commodities
+    last = np.datetime64("today", "D")
+    day = np.repeat(np.arange(days), series)
+    sid = np.tile(np.arange(series), days)
+    keep = rng.random(len(day)) < coverage
+    day, sid = day[keep], sid[keep]
+    market = sid // commodities
+    base = 1000 + (sid % commodities) * 150
+    return pd.DataFrame({
+        "state": [f"State-{m % 20}" for m in market],
+        "district": [f"District-{m // 5}" for m in market],
+        "market": [f"Market-{m}" for m in market],
+        "commodity": [f"Commodity-{c}" for c in sid % commodities],
+        "_date": (last - (days - 1) + day).astype("datetime64[ns]"),
+        "modal_price": base + day * 3 + rng.integers(-100, 100, len(day)),
+    })
+
+
+def pandas_rolling(df, market, commodity):
+    # What a request would otherwise do: filter, resample daily, roll
+    rows = df[(df["market"] == market) & (df["commodity"] == commodity)]
+    daily = rows.groupby(rows["_date"].dt.normalize())["modal_price"].mean().asfreq("D")
+    return {w: daily.rolling(w, min_periods=1).agg(["mean", "min", "max"]).iloc[-1].to_dict() for w in (7, 30)}
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--markets", type=int, default=1500)
+    parser.add_argument("--commodities", type=int, default=20)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--coverage", type=float, default=0.6, help="share of market-days with a report")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    full = make_frame(args.markets, args.commodities, args.days, args.coverage)
+    last_day = full["_date"].max()
+    earlier = full[full["_date"] < last_day]
+    print(f"{len(full)} rows, {args.markets * args.commodities} series, {args.days} days")
+
+    analytics = MandiAnalytics(days=args.days)
+    start = time.perf_counter()
+    analytics.on_mandi_update(earlier)
+    rebuild = time.perf_counter() - start
+    start = time.perf_counter()
+    analytics.on_mandi_update(full)
+    update = time.perf_counter() - start
+    start = time.perf_counter()
+    analytics.on_mandi_update(full)
+    unchanged = time.perf_counter() - start
+    print(f"full rebuild         : {rebuild * 1000:8.1f} ms")
+    print(f"incremental (+1 day) : {update * 1000:8.1f} ms")
+    print(f"incremental (no change): {unchanged * 1000:6.1f} ms  ({analytics.status()['incremental_updates']} incremental, "
+          f"{analytics.status()['rebuilds']} rebuild)")
+
+    rng = np.random.default_rng(1)
+    picks = [(f"Market-{rng.integers(args.markets)}", f"Commodity-{rng.integers(args.commodities)}") for _ in range(args.queries)]
+    cycle = iter(picks * 2)
+    on_the_fly = timed(lambda: pandas_rolling(full, *next(cycle)), min(args.queries, 50))
+    cycle = iter(picks * 2)
+    rolling = timed(lambda: analytics.rolling_stats(*next(cycle)), args.queries)
+    spread = timed(lambda: analytics.spread(f"District-{rng.integers(args.markets // 5)}"), args.queries)
+    movers = timed(lambda: analytics.top_movers(state=f"State-{rng.integers(20)}", limit=10), args.queries)
+    print(f"rolling, pandas per request : {on_the_fly:8.3f} ms")
+    print(f"rolling, precomputed        : {rolling:8.3f} ms  ({on_the_fly / rolling:.0f}x)")
+    print(f"district spread             : {spread:8.3f} ms")
+    print(f"top movers (state)          : {movers:8.3f} ms")
@@ -0,0 +1,44 @@
+# ✅ backend/benchmarks/bench_mandi_ingest.py
+# Rows/sec of the bulk mandi ingester against the data.gov.in stub replaying
+# the recorded page in fixtures/mandi_page.json.
+#
+#   cd backend && python -m benchmarks.bench_mandi_ingest --rows 50000 --concurrency 8
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubServer, datagov_app
+import mandi_rates
+import mandi_ingest
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "mandi_page.json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        recorded = json.load(f)["records"]
+    datagov_app.state.records = (recorded * (args.rows // len(recorded) + 1))[:args.rows]
+    datagov_app.state.latency = args.latency
+
+    with StubServer(datagov_app) as stub, tempfile.TemporaryDirectory() as out:
+        mandi_rates.BASE_URL = f"{stub.url}/resource/9ef84268-d588-465a-a308-a864a43d0070"
+        for concurrency in sorted({1, args.concurrency}):
+            result = asyncio.run(mandi_ingest.ingest(full=True, snapshot_dir=out, concurrency=concurrency, page_size=args.page_size))
+            size = sum(os.path.getsize(p) for p in mandi_ingest.part_files(out))
+            print(f"full   concurrency={concurrency:<3} rows={result['last_sync_rows']:<7} "
+                  f"{result['seconds']:6.2f} s  {result['rows_per_sec']:10.1f} rows/s  snapshot={size / 1024:.0f} KiB")
+        result = asyncio.run(mandi_ingest.ingest(snapshot_dir=out, concurrency=args.concurrency, page_size=args.page_size))
+        print(f"incr.  concurrency={args.concurrency:<3} rows={result['last_sync_rows']:<7} {result['seconds']:6.2f} s  "
+              f"(since {result['last_arrival_date']}, {datagov_app.state.calls} stub calls total)")
@@ -0,0 +1,369 @@
+# ✅ backend/benchmarks/loadtest.py
+# Load test for the whole API. Starts the stub upstreams (stubs.py), runs the
+# backend against them in a subprocess (serve.py) and drives each endpoint at
+# a fixed concurrency, reporting throughput and p50/p95/p99 latency. Every
+# run is saved to benchmarks/results/ and compared with the previous run (or
+# --baseline), so regressions show up as a diff.
+#
+#   cd backend && python -m benchmarks.loadtest
+#   python -m benchmarks.loadtest --endpoints krishigpt,news --concurrency 32 --requests 400
+#   python -m benchmarks.loadtest --workers 4 --latency 0.1 --fail-on-regression
+import io
+import os
+import sys
+import json
+import time
+import socket
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import date, datetime, timedelta
+
+import httpx
+import numpy as np
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stubs import StubServer, openrouter_app, datagov_app, roboflow_app, rss_app, youtube_app
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+STUBS = {"openrouter": openrouter_app, "data.gov.in": datagov_app, "roboflow": roboflow_app, "rss": rss_app, "youtube": youtube_app}
+
+MANDI_COMBOS = [
+    ("Maharashtra", "Pune", "Pune"), ("Maharashtra", "Pune", "Junnar"), ("Maharashtra", "Nashik", "Lasalgaon"),
+    ("Karnataka", "Kolar", "Kolar"), ("Gujarat", "Rajkot", "Gondal"),
+]
+COMMODITIES = ["Tomato", "Onion", "Potato", "Wheat"]
+QUESTIONS = [
+    "How do I control early blight in tomato?", "When should I sow wheat in Maharashtra?",
+    "What is the right spacing for onion transplanting?", "How much urea does maize need per acre?",
+    "How to store potatoes after harvest?", "Which crop is best after soybean?",
+    "How do I make jeevamrut at home?", "What causes yellow leaves in chilli?",
+]
+LANGUAGES = ["en", "en", "hi", "mr"]
+CALENDAR_CROPS = ["Tomato", "Onion", "Wheat", "Cotton", "Sugarcane", "Dragon fruit"]
+
+
+def make_images(n=8, size=(1024, 768)):
+    # Distinct leaf-ish JPEGs; the perceptual-hash cache treats each as its own photo
+    images = []
+    for seed in range(n):
+        rng = np.random.default_rng(seed)
+        base = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        base[..., 1] = 90 + seed * 12
+        base[..., 0] = np.linspace(20, 160, size[0], dtype=np.uint8)[None, :] if seed % 2 else 40
+        noise = rng.integers(0, 60, base.shape, dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(base + noise).save(buffer, format="JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+def build_scenarios():
+    # endpoint -> fn(rng) returning httpx request kwargs
+    images = make_images()
+    sowing = (date.today() + timedelta(days=7)).isoformat()
+
+    def diagnose(rng):
+        i = rng.randrange(len(images))
+        crop = ["tomato", "potato", "onion"][i % 3]
+        return {"method": "POST", "url": "/diagnose", "files": {"image": (f"leaf{i}.jpg", images[i], "image/jpeg")},
+                "data": {"crop": crop, "language": rng.choice(LANGUAGES)}}
+
+    def diagnose_batch(rng):
+        # A field survey: a dozen photos of one crop, some repeated
+        picks = [rng.randrange(len(images)) for _ in range(12)]
+        return {"method": "POST", "url": "/diagnose/batch",
+                "files": [("images", (f"leaf{i}.jpg", images[i], "image/jpeg")) for i in picks],
+                "data": {"crop": rng.choice(["tomato", "potato", "onion"]), "language": rng.choice(LANGUAGES)}}
+
+    def krishigpt(rng):
+        # Same questions in slightly different wording, as farmers type them
+        query = rng.choice(QUESTIONS)
+        query = rng.choice([query, query.lower().rstrip("?"), f"Please tell me, {query}"])
+        return {"method": "POST", "url": "/krishigpt", "json": {"query": query, "language": rng.choice(LANGUAGES)}}
+
+    def mandi_rates(rng):
+        state, district, _ = rng.choice(MANDI_COMBOS)
+        params = {"state": state, "district": district}
+        if rng.random() < 0.5:
+            params["commodity"] = rng.choice(COMMODITIES)
+        return {"method": "GET", "url": "/mandi-rates", "params": params}
+
+    def predict_price_trend(rng):
+        state, _, market = rng.choice(MANDI_COMBOS)
+        return {"method": "GET", "url": "/predict-price-trend", "params": {"state": state, "market": market, "commodity": rng.choice(COMMODITIES)}}
+
+    def mandi_analytics(rng):
+        state, district, market = rng.choice(MANDI_COMBOS)
+        commodity = rng.choice(COMMODITIES)
+        return rng.choice([
+            {"method": "GET", "url": "/mandi-analytics/rolling", "params": {"market": market, "commodity": commodity, "history": 30}},
+            {"method": "GET", "url": "/mandi-analytics/spread", "params": {"district": district}},
+            {"method": "GET", "url": "/mandi-analytics/movers", "params": {"state": state}},
+        ])
+
+    def fertilizer_advice(rng):
+        return {"method": "POST", "url": "/fertilizer-advice", "json": {
+            "crop": rng.choice(["tomato", "onion", "wheat", "cotton"]), "soil_ph": rng.choice(["6.5", "7.2", "8.0"]),
+            "crop_age": rng.choice(["20", "45", "70"]), "weather": rng.choice(["sunny", "rainy"]), "language": rng.choice(LANGUAGES)}}
+
+    def generate_calendar(rng):
+        return {"method": "POST", "url": "/generate-calendar", "json": {
+            "crop": rng.choice(CALENDAR_CROPS), "sowingDate": sowing, "soilType": rng.choice(["black", "loamy", "sandy"]),
+            "farmSize": rng.choice(["1", "2.5", "5"]), "location": "Pune", "language": rng.choice(LANGUAGES)}}
+
+    def news(rng):
+        return {"method": "GET", "url": "/news", "params": {"district": rng.choice(["Pune", "Nashik", "Kolar"])}}
+
+    def reels(rng):
+        return {"method": "GET", "url": "/reels", "params": {"language": rng.choice(["en", "hi", "mr"])}}
+
+    return {
+        "diagnose": diagnose, "diagnose-batch": diagnose_batch, "krishigpt": krishigpt, "mandi-rates": mandi_rates,
+        "predict-price-trend": predict_price_trend, "mandi-analytics": mandi_analytics, "fertilizer-advice": fertilizer_advice,
+        "generate-calendar": generate_calendar, "news": news, "reels": reels,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def backend_env(stubs, workdir):
+    return {
+        **os.environ,
+        "OPENROUTER_URL": f"{stubs['openrouter'].url}/api/v1/chat/completions",
+        "OPENROUTER_API_KEY": "loadtest",
+        "DATA_GOV_BASE_URL": f"{stubs['data.gov.in'].url}/resource/9ef84268-d588-465a-a308-a864a43d0070",
+        "DATA_GOV_API_KEY": "loadtest",
+        "ROBOFLOW_API_URL": stubs["roboflow"].url,
+        "ROBOFLOW_API_KEY": "loadtest",
+        "AGRI_RSS_FEEDS": f"{stubs['rss'].url}/agrifarming/feed,{stubs['rss'].url}/justagriculture/feed",
+        "YOUTUBE_SEARCH_URL": f"{stubs['youtube'].url}/youtube/v3/search",
+        "YOUTUBE_API_KEY": "loadtest",
+        # Fresh caches and state for every run
+        "STATE_PATH": os.path.join(workdir, "shared_state.sqlite3"),
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.sqlite3"),
+        "KRISHIGPT_INDEX_PATH": os.path.join(workdir, "krishigpt_answers.sqlite3"),
+        "NEWS_CACHE_PATH": os.path.join(workdir, "news_summaries.sqlite3"),
+        "TRANSLATION_CACHE_PATH": os.path.join(workdir, "translations.sqlite3"),
+        "PRICE_ALERTS_PATH": os.path.join(workdir, "price_alerts.sqlite3"),
+        "REELS_CACHE_PATH": os.path.join(workdir, "reels.json"),
+        "MANDI_SNAPSHOT_DIR": os.path.join(workdir, "mandi_snapshot"),
+        "STATE_BACKEND": "sqlite",
+        # Every request comes from one address; upstream guards stay on
+        "RATE_LIMIT_RPS": "0",
+    }
+
+
+def start_backend(env, port, workers, timeout=90):
+    log = tempfile.TemporaryFile(mode="w+")
+    proc = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            log.seek(0)
+            raise RuntimeError("Backend exited during startup:\n" + log.read()[-2000:])
+        try:
+            status = httpx.get(f"http://127.0.0.1:{port}/mandi-rates/status", timeout=2).json()
+            # Wait for the background mandi sync so /mandi-rates is measured from the store
+            if status.get("ready") and status.get("rows"):
+                return proc, log
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError("Backend did not become ready in time")
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 2) if values else None
+
+
+async def drive(client, scenario, total, concurrency, seed):
+    rng = random.Random(seed)
+    requests = [scenario(rng) for _ in range(total)]
+    latencies = []
+    errors = 0
+    cursor = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for kwargs in cursor:
+            started = time.perf_counter()
+            try:
+                res = await client.request(**kwargs)
+                failed = res.status_code >= 400 or (res.headers.get("content-type", "").startswith("application/json") and "error" in res.json())
+            except (httpx.HTTPError, ValueError):
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def run_endpoint(base_url, name, scenario, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        if args.warmup:
+            await drive(client, scenario, args.warmup, args.concurrency, seed=args.seed + 1)
+        calls_before = {stub: app.state.calls for stub, app in STUBS.items()}
+        latencies, errors, elapsed = await drive(client, scenario, args.requests, args.concurrency, seed=args.seed)
+    upstream = {stub: app.state.calls - calls_before[stub] for stub, app in STUBS.items() if app.state.calls - calls_before[stub]}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else None,
+        "upstream_calls": upstream,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def previous_result(path=None):
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return path, json.load(f)
+    if not os.path.isdir(RESULTS_DIR):
+        return None, None
+    runs = sorted(name for name in os.listdir(RESULTS_DIR) if name.endswith(".json"))
+    if not runs:
+        return None, None
+    path = os.path.join(RESULTS_DIR, runs[-1])
+    with open(path, encoding="utf-8") as f:
+        return path, json.load(f)
+
+
+def compare(current, baseline, threshold):
+    # Returns (rows, regressions): p95 up or throughput down by more than threshold
+    rows, regressions = [], []
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before or not before.get("p95_ms") or not before.get("rps"):
+            continue
+        p95_change = now["p95_ms"] / before["p95_ms"] - 1
+        rps_change = now["rps"] / before["rps"] - 1
+        regressed = p95_change > threshold or rps_change < -threshold
+        rows.append((name, p95_change, rps_change, regressed))
+        if regressed:
+            regressions.append(name)
+    return rows, regressions
+
+
+def print_report(result):
+    print(f"{'endpoint':<22}{'req':>6}{'err':>5}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  upstream calls")
+    for name, r in result["endpoints"].items():
+        upstream = ", ".join(f"{k}={v}" for k, v in r["upstream_calls"].items()) or "-"
+        print(f"{name:<22}{r['requests']:>6}{r['errors']:>5}{r['rps']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}  {upstream}")
+
+
+def main():
+    scenarios = build_scenarios()
+    parser = argparse.ArgumentParser(description="Load-test every API endpoint against stub upstreams.")
+    parser.add_argument("--endpoints", default=",".join(scenarios), help="comma-separated subset of: " + ", ".join(scenarios))
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per endpoint first")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub upstream latency in seconds")
+    parser.add_argument("--workers", type=int, default=1, help="backend worker processes")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="", help="suffix for the results file name")
+    parser.add_argument("--baseline", help="results file to compare with (default: the latest in results/)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative p95/throughput change counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.endpoints.split(",") if n.strip()]
+    unknown = [n for n in names if n not in scenarios]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+
+    baseline_path, baseline = previous_result(args.baseline)
+
+    for app in STUBS.values():
+        app.state.latency = args.latency
+    servers = {name: StubServer(app).start() for name, app in STUBS.items()}
+    port = free_port()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            proc, log = start_backend(backend_env(servers, workdir), port, args.workers)
+            try:
+                endpoints = {}
+                for name in names:
+                    endpoints[name] = asyncio.run(run_endpoint(f"http://127.0.0.1:{port}", name, scenarios[name], args))
+                    print(f"✅ {name}: {endpoints[name]['rps']} req/s, p95 {endpoints[name]['p95_ms']} ms")
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+                log.close()
+    finally:
+        for server in servers.values():
+            server.stop()
+
+    result = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "stub_latency": args.latency,
+            "workers": args.workers,
+            "seed": args.seed,
+        },
+        "endpoints": endpoints,
+    }
+    print()
+    print_report(result)
+
+    regressions = []
+    if baseline:
+        rows, regressions = compare(result, baseline, args.threshold)
+        print(f"\nvs {os.path.relpath(baseline_path, BACKEND_DIR)} ({baseline['meta'].get('commit')}):")
+        for name, p95_change, rps_change, regressed in rows:
+            flag = "  ⚠️ REGRESSION" if regressed else ""
+            print(f"  {name:<22} p95 {p95_change:+7.1%}   rps {rps_change:+7.1%}{flag}")
+        if baseline["meta"].get("stub_latency") != args.latency or baseline["meta"].get("concurrency") != args.concurrency:
+            print("  (baseline used different --latency/--concurrency; compare with care)")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{stamp}{'-' + args.label if args.label else ''}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved {os.path.relpath(path, BACKEND_DIR)}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
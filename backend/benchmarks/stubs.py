@@ -0,0 +1,264 @@
+# ✅ backend/benchmarks/stubs.py
+# Local stand-ins for upstream APIs so the backend can be exercised offline.
+# Each stub replies after a configurable delay (STUB_LATENCY seconds) and
+# replays the recorded response envelopes in fixtures/, varying only the
+# fields the backend actually reads (content, class, ids, dates).
+import os
+import re
+import copy
+import json
+import time
+import asyncio
+import threading
+import random
+import uvicorn
+from datetime import date, timedelta
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+
+STUB_LATENCY = float(os.getenv("STUB_LATENCY", "0.2"))
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read() if name.endswith(".xml") else json.load(f)
+
+
+OPENROUTER_FIXTURE = load_fixture("openrouter_completion.json")
+ROBOFLOW_FIXTURE = load_fixture("roboflow_workflow.json")
+YOUTUBE_FIXTURE = load_fixture("youtube_search.json")
+RSS_FIXTURE = load_fixture("rss_feed.xml")
+
+openrouter_app = FastAPI()
+openrouter_app.state.latency = STUB_LATENCY
+openrouter_app.state.calls = 0
+# Injected failures, one per upcoming call: an HTTP status to reply with, or
+# "drop" / "drop-late" to cut a stream before / after its first token
+openrouter_app.state.fail_next = []
+
+
+def stub_answer(prompt):
+    if "Reply only with a number" in prompt:
+        return "95"
+    if "day-wise farming activity schedule" in prompt:
+        start = date.today()
+        return "\n".join(
+            f"{(start + timedelta(days=i)).strftime('%B %d, %Y')}: Stub activity for day {i + 1}"
+            for i in range(0, 100, 5)
+        )
+    if "Reply with only a JSON list of the same length and order." in prompt:
+        items = json.loads(prompt[prompt.index("["):])
+        return json.dumps([f"[translated] {item}" for item in items], ensure_ascii=False)
+    if "Reply with only the translation." in prompt:
+        return "[translated] " + prompt.split("\n\n", 1)[1]
+    return f"Stub answer for: {prompt[:60]}"
+
+
+@openrouter_app.post("/api/v1/chat/completions")
+async def fake_completion(request: Request):
+    body = await request.json()
+    openrouter_app.state.calls += 1
+    prompt = body["messages"][-1]["content"]
+    failure = openrouter_app.state.fail_next.pop(0) if openrouter_app.state.fail_next else None
+    if isinstance(failure, int):
+        await asyncio.sleep(openrouter_app.state.latency)
+        return Response('{"error": {"message": "Injected failure"}}', status_code=failure, media_type="application/json")
+
+    if body.get("stream"):
+        # Time-to-first-token is a fraction of the full latency; the rest is spread over chunks
+        words = stub_answer(prompt).split(" ")
+        step = openrouter_app.state.latency * 0.8 / max(len(words), 1)
+
+        async def chunks():
+            yield ": OPENROUTER PROCESSING\n\n"
+            await asyncio.sleep(openrouter_app.state.latency * 0.2)
+            if failure == "drop":
+                raise ConnectionResetError("Injected drop before the first token")
+            for i, word in enumerate(words):
+                delta = word if i == 0 else " " + word
+                yield "data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}) + "\n\n"
+                await asyncio.sleep(step)
+                if failure == "drop-late":
+                    raise ConnectionResetError("Injected drop after the first token")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    await asyncio.sleep(openrouter_app.state.latency)
+    answer = stub_answer(prompt)
+    reply = copy.deepcopy(OPENROUTER_FIXTURE)
+    reply["id"] = f"gen-stub-{openrouter_app.state.calls}"
+    reply["model"] = body.get("model")
+    reply["choices"][0]["message"]["content"] = answer
+    reply["usage"] = {
+        "prompt_tokens": len(prompt.split()),
+        "completion_tokens": len(answer.split()),
+        "total_tokens": len(prompt.split()) + len(answer.split()),
+    }
+    return reply
+
+
+def make_mandi_records(n=5000, days=60, seed=7):
+    rng = random.Random(seed)
+    markets = [
+        ("Maharashtra", "Pune", "Pune"), ("Maharashtra", "Pune", "Junnar"),
+        ("Maharashtra", "Nashik", "Lasalgaon"), ("Maharashtra", "Nashik", "Nashik"),
+        ("Karnataka", "Kolar", "Kolar"), ("Gujarat", "Rajkot", "Gondal"),
+    ]
+    commodities = {"Tomato": 1500, "Onion": 2200, "Potato": 1800, "Wheat": 2400}
+    start = date.today() - timedelta(days=days)
+    records = []
+    for i in range(n):
+        state, district, market = markets[i % len(markets)]
+        commodity = list(commodities)[(i // len(markets)) % len(commodities)]
+        day = start + timedelta(days=rng.randrange(days))
+        modal = commodities[commodity] + (day - start).days * 5 + rng.randint(-150, 150)
+        records.append({
+            "state": state, "district": district, "market": market,
+            "commodity": commodity, "variety": f"Local-{i}", "grade": "FAQ",
+            "arrival_date": day.strftime("%d/%m/%Y"),
+            "min_price": str(modal - 200), "max_price": str(modal + 200), "modal_price": str(modal),
+        })
+    return records
+
+
+datagov_app = FastAPI()
+datagov_app.state.latency = STUB_LATENCY
+datagov_app.state.records = make_mandi_records()
+datagov_app.state.calls = 0
+
+
+@datagov_app.get("/resource/{resource_id}")
+async def fake_resource(resource_id: str, request: Request):
+    params = request.query_params
+    datagov_app.state.calls += 1
+    await asyncio.sleep(datagov_app.state.latency)
+    rows = datagov_app.state.records
+    for field in ("state", "district", "commodity", "arrival_date"):
+        value = params.get(f"filters[{field}]")
+        if value:
+            rows = [r for r in rows if r[field] == value]
+    offset = int(params.get("offset", 0))
+    limit = int(params.get("limit", 10))
+    page = rows[offset:offset + limit]
+    return {"total": len(rows), "count": len(page), "offset": offset, "limit": limit, "records": page}
+
+
+roboflow_app = FastAPI()
+roboflow_app.state.latency = STUB_LATENCY
+roboflow_app.state.calls = 0
+ROBOFLOW_CLASSES = {
+    "custom-workflow-4": ["Tomato___Early_blight", "Tomato___Late_blight", "Tomato___healthy"],
+    "custom-workflow-3": ["Potato___Early_blight", "Potato___Late_blight", "Potato___healthy"],
+    "custom-workflow-2": ["Onion___Purple_blotch", "Onion___healthy"],
+}
+
+
+@roboflow_app.post("/{workspace}/workflows/{workflow_id}")
+async def fake_workflow(workspace: str, workflow_id: str, request: Request):
+    body = await request.json()
+    roboflow_app.state.calls += 1
+    await asyncio.sleep(roboflow_app.state.latency)
+    classes = ROBOFLOW_CLASSES.get(workflow_id, ["unknown"])
+    image = body.get("inputs", {}).get("image", {})
+    label = classes[len(str(image.get("value", ""))) % len(classes)]
+    outputs = copy.deepcopy(ROBOFLOW_FIXTURE)
+    predictions = outputs[0]["predictions"]
+    predictions["predictions"][0]["class"] = label
+    predictions["top"] = label
+    return {"outputs": outputs}
+
+
+rss_app = FastAPI()
+rss_app.state.latency = STUB_LATENCY
+rss_app.state.calls = 0
+
+
+def make_rss(feed):
+    # The recorded feed, re-dated to the last few days and with per-feed GUIDs
+    now = datetime.now(timezone.utc)
+    dates = iter(range(1000))
+    xml = re.sub(r"<pubDate>[^<]*</pubDate>", lambda _: f"<pubDate>{format_datetime(now - timedelta(days=next(dates)))}</pubDate>", RSS_FIXTURE)
+    return xml.replace("?p=", f"?feed={feed}&amp;p=")
+
+
+@rss_app.get("/{feed}/feed")
+async def fake_feed(feed: str, request: Request):
+    rss_app.state.calls += 1
+    await asyncio.sleep(rss_app.state.latency)
+    etag = f'"{feed}-v1"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(make_rss(feed), media_type="application/rss+xml", headers={"ETag": etag})
+
+
+youtube_app = FastAPI()
+youtube_app.state.latency = STUB_LATENCY
+youtube_app.state.calls = 0
+youtube_app.state.quota = 10000
+
+
+@youtube_app.get("/youtube/v3/search")
+async def fake_search(request: Request):
+    params = request.query_params
+    youtube_app.state.calls += 1
+    await asyncio.sleep(youtube_app.state.latency)
+    if youtube_app.state.quota < 100:
+        return Response('{"error": {"code": 403, "errors": [{"reason": "quotaExceeded"}]}}', status_code=403,
+                        media_type="application/json")
+    youtube_app.state.quota -= 100
+    page = int(params.get("pageToken", "P0")[1:])
+    size = int(params.get("maxResults", 10))
+    recorded = YOUTUBE_FIXTURE["items"]
+    items = []
+    for i in range(size):
+        item = copy.deepcopy(recorded[i % len(recorded)])
+        item["id"]["videoId"] = f"{item['id']['videoId']}p{page}x{i}"
+        items.append(item)
+    reply = {**YOUTUBE_FIXTURE, "items": items, "nextPageToken": f"P{page + 1}" if page < 9 else None}
+    reply["pageInfo"] = {**reply["pageInfo"], "resultsPerPage": size}
+    return reply
+
+
+class StubServer:
+    # Runs a stub app with uvicorn on a background thread.
+    def __init__(self, app, host="127.0.0.1", port=0, lifespan="off"):
+        self.app = app
+        self.lifespan = lifespan
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning", lifespan=self.lifespan)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        if not self.port:
+            self.port = self.server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.should_exit = True
+            self.thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    uvicorn.run(openrouter_app, host="127.0.0.1", port=int(os.getenv("STUB_PORT", "8900")))
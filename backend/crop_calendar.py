@@ -0,0 +1,236 @@
+# ✅ backend/crop_calendar.py
+# Local crop calendar engine. A table of crop durations, stage splits and
+# fertilizer schedules plus soil-specific irrigation intervals produces a
+# structured day-wise schedule without any network call. The LLM is only
+# used (optionally) to translate the notes, through the translation memory,
+# and to add tips cached per (crop, soil, language).
+import json
+import re
+from datetime import datetime, timedelta
+
+from llm_client import chat_completion
+from translation import translate_segments
+
+# Share of the season spent in each stage (cumulative end points)
+DEFAULT_STAGES = [
+    ("Germination", 0.10),
+    ("Vegetative growth", 0.45),
+    ("Flowering", 0.65),
+    ("Fruiting / grain filling", 0.90),
+    ("Maturity and harvest", 1.00),
+]
+
+# duration in days; fertilizer as (day after sowing, product, kg per acre);
+# water: multiplier on the soil irrigation interval (<1 = thirstier crop)
+CROP_TEMPLATES = {
+    "tomato": {"duration": 120, "water": 0.8, "fertilizer": [(0, "DAP", 50), (0, "MOP", 40), (25, "Urea", 30), (50, "Urea", 30), (70, "NPK 19:19:19 (foliar)", 2)]},
+    "potato": {"duration": 100, "water": 0.8, "fertilizer": [(0, "DAP", 70), (0, "MOP", 50), (30, "Urea", 40)],
+               "stages": [("Sprouting", 0.15), ("Vegetative growth", 0.40), ("Tuber initiation", 0.55), ("Tuber bulking", 0.90), ("Maturity and harvest", 1.00)]},
+    "onion": {"duration": 120, "water": 0.8, "fertilizer": [(0, "DAP", 50), (0, "MOP", 35), (30, "Urea", 25), (45, "Urea", 25)],
+              "stages": [("Establishment", 0.15), ("Vegetative growth", 0.50), ("Bulb initiation", 0.65), ("Bulb development", 0.90), ("Maturity and harvest", 1.00)]},
+    "rice": {"duration": 120, "water": 0.4, "fertilizer": [(0, "DAP", 50), (0, "MOP", 25), (21, "Urea", 35), (45, "Urea", 35)],
+             "stages": [("Seedling", 0.15), ("Tillering", 0.45), ("Panicle initiation and flowering", 0.70), ("Grain filling", 0.90), ("Maturity and harvest", 1.00)]},
+    "wheat": {"duration": 120, "water": 1.3, "fertilizer": [(0, "DAP", 50), (0, "MOP", 20), (21, "Urea", 45), (45, "Urea", 30)],
+              "stages": [("Germination", 0.10), ("Tillering", 0.40), ("Jointing and heading", 0.65), ("Grain filling", 0.90), ("Maturity and harvest", 1.00)]},
+    "maize": {"duration": 100, "water": 1.0, "fertilizer": [(0, "DAP", 50), (0, "MOP", 25), (25, "Urea", 40), (45, "Urea", 30)],
+              "stages": [("Germination", 0.10), ("Vegetative growth", 0.50), ("Tasseling and silking", 0.65), ("Grain filling", 0.90), ("Maturity and harvest", 1.00)]},
+    "cotton": {"duration": 160, "water": 1.2, "fertilizer": [(0, "DAP", 50), (0, "MOP", 25), (30, "Urea", 30), (60, "Urea", 30), (90, "MgSO4 (foliar)", 2)],
+               "stages": [("Germination", 0.08), ("Vegetative growth", 0.35), ("Squaring and flowering", 0.60), ("Boll development", 0.85), ("Boll opening and picking", 1.00)]},
+    "soybean": {"duration": 95, "water": 1.2, "fertilizer": [(0, "DAP", 60), (0, "MOP", 20), (35, "Sulphur", 8)]},
+    "sugarcane": {"duration": 330, "water": 0.8, "fertilizer": [(0, "DAP", 60), (0, "MOP", 40), (45, "Urea", 50), (90, "Urea", 50), (120, "Urea", 40)],
+                  "stages": [("Germination", 0.10), ("Tillering", 0.35), ("Grand growth", 0.75), ("Ripening", 0.95), ("Harvest", 1.00)]},
+    "chickpea": {"duration": 100, "water": 1.6, "fertilizer": [(0, "DAP", 40), (0, "Sulphur", 8)]},
+    "groundnut": {"duration": 110, "water": 1.1, "fertilizer": [(0, "SSP", 100), (0, "MOP", 20), (40, "Gypsum", 160)],
+                  "stages": [("Germination", 0.10), ("Vegetative growth", 0.35), ("Flowering and pegging", 0.60), ("Pod development", 0.90), ("Maturity and harvest", 1.00)]},
+    "chilli": {"duration": 150, "water": 0.9, "fertilizer": [(0, "DAP", 50), (0, "MOP", 30), (30, "Urea", 25), (60, "Urea", 25), (90, "NPK 19:19:19 (foliar)", 2)]},
+    "mustard": {"duration": 110, "water": 1.5, "fertilizer": [(0, "DAP", 40), (0, "Sulphur", 10), (30, "Urea", 30)]},
+}
+
+CROP_ALIASES = {"paddy": "rice", "corn": "maize", "gram": "chickpea", "chana": "chickpea", "peanut": "groundnut", "chili": "chilli"}
+
+# Days between irrigations on each soil (before the crop's water multiplier)
+SOIL_IRRIGATION_DAYS = {"sandy": 4, "red": 6, "loamy": 7, "alluvial": 7, "clay": 9, "black": 10}
+DEFAULT_IRRIGATION_DAYS = 7
+
+# Season length bounds (e.g. for a duration guessed by the LLM), and caps on the
+# repeating events so a calendar stays a few hundred entries at most
+MIN_SEASON_DAYS = 30
+MAX_SEASON_DAYS = 400
+MAX_IRRIGATION_EVENTS = 120
+MAX_SCOUTING_EVENTS = 52
+# "95", "About 90-120 days", "90 to 120": the upper bound of a range
+DURATION_RANGE = re.compile(r"(\d+)(?:\s*(?:-|–|to)\s*(\d+))?")
+
+DATE_FORMATS = ["%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%B %d, %Y"]
+# Farm sizes arrive as free text ("2", "2.5 acres", "1 hectare", "20 guntha"); acres by default
+AREA_UNITS = [("hect", 2.47105), ("ha", 2.47105), ("guntha", 1 / 40), ("bigha", 0.62)]
+FARM_SIZE_NUMBER = re.compile(r"\d+(?:\.\d+)?|\.\d+")
+LANGUAGES = {"hi": "Hindi", "mr": "Marathi"}
+
+
+def find_template(crop):
+    key = (crop or "").strip().lower()
+    key = CROP_ALIASES.get(key, key)
+    return key, CROP_TEMPLATES.get(key)
+
+
+def parse_sowing_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised sowing date: {value}")
+
+
+def parse_farm_size(value):
+    # Returns acres; raises ValueError when there is no positive number in it
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        acres = float(value)
+    else:
+        text = str(value or "").strip().lower()
+        match = FARM_SIZE_NUMBER.search(text.replace(",", ""))
+        if not match:
+            raise ValueError(f"Unrecognised farm size: {value}")
+        unit = text[match.end():].strip()
+        factor = next((f for prefix, f in AREA_UNITS if unit.startswith(prefix)), 1.0)
+        acres = float(match.group()) * factor
+    if not 0 < acres < 1e6:
+        raise ValueError(f"Unrecognised farm size: {value}")
+    return acres
+
+
+def parse_duration(text):
+    # Days from free text; None when there is no number in it
+    match = DURATION_RANGE.search(str(text or ""))
+    if not match:
+        return None
+    return int(match.group(2) or match.group(1))
+
+
+def season_days(days):
+    return min(max(int(days), MIN_SEASON_DAYS), MAX_SEASON_DAYS)
+
+
+def irrigation_interval(soil_type, water=1.0):
+    soil = (soil_type or "").strip().lower()
+    base = next((days for name, days in SOIL_IRRIGATION_DAYS.items() if name in soil), DEFAULT_IRRIGATION_DAYS)
+    return max(2, round(base * water))
+
+
+def generate_schedule(crop, sowing_date, soil_type, farm_size, total_days=None):
+    key, template = find_template(crop)
+    template = template or {"duration": 100, "water": 1.0, "fertilizer": [(0, "DAP", 50), (30, "Urea", 35)]}
+    start = parse_sowing_date(sowing_date) if isinstance(sowing_date, str) else sowing_date
+    duration = season_days(total_days or template["duration"])
+    acres = parse_farm_size(farm_size) if farm_size else 1.0
+
+    events = [(0, "sowing", f"Sow {crop} seeds / transplant seedlings; apply basal fertilizer")]
+
+    stages = []
+    stage_start = 0
+    for name, end in template.get("stages", DEFAULT_STAGES):
+        stage_end = round(duration * end)
+        stages.append({
+            "stage": name,
+            "start": (start + timedelta(days=stage_start)).isoformat(),
+            "end": (start + timedelta(days=stage_end)).isoformat(),
+        })
+        if stage_start > 0:
+            events.append((stage_start, "stage", f"Growth stage: {name} begins"))
+        stage_start = stage_end
+
+    for day, product, rate in template["fertilizer"]:
+        if day < duration:
+            events.append((day, "fertilizer", f"Apply fertilizer: {product} @ {rate} kg/acre", round(rate * acres, 1)))
+
+    # Irrigate on a soil-dependent interval, stopping ~10 days before harvest
+    interval = irrigation_interval(soil_type, template.get("water", 1.0))
+    interval = max(interval, -(-duration // MAX_IRRIGATION_EVENTS))
+    for day in range(interval, max(duration - 10, interval), interval):
+        events.append((day, "irrigation", "Irrigate the field (check soil moisture first)"))
+
+    scouting = max(7, -(-duration // MAX_SCOUTING_EVENTS))
+    for day in range(14, duration - 7, scouting):
+        events.append((day, "scouting", "Scout for pests and diseases; spray only if needed"))
+
+    events.append((duration, "harvest", f"Harvest {crop}"))
+
+    order = {"sowing": 0, "stage": 1, "fertilizer": 2, "irrigation": 3, "scouting": 4, "harvest": 5}
+    events.sort(key=lambda e: (e[0], order[e[1]]))
+
+    schedule = []
+    for event in events:
+        day, kind, activity = event[:3]
+        item = {
+            "date": (start + timedelta(days=day)).isoformat(),
+            "day": day,
+            "type": kind,
+            "activity": activity,
+        }
+        if len(event) > 3:
+            item["quantity_kg"] = event[3]
+        schedule.append(item)
+
+    return {
+        "crop": crop,
+        "template": key if key in CROP_TEMPLATES else None,
+        "sowing_date": start.isoformat(),
+        "harvest_date": (start + timedelta(days=duration)).isoformat(),
+        "total_days": duration,
+        "irrigation_interval_days": interval,
+        "stages": stages,
+        "events": schedule,
+    }
+
+
+def calendar_text(schedule):
+    # Same 'Month D, YYYY: activity' lines the frontend already parses
+    lines = []
+    for event in schedule["events"]:
+        day = datetime.strptime(event["date"], "%Y-%m-%d")
+        activity = event["activity"]
+        if "quantity_kg" in event:
+            activity += f" (total {event['quantity_kg']} kg)"
+        lines.append(f"{day.strftime('%B')} {day.day}, {day.year}: {activity}")
+    return "\n".join(lines)
+
+
+async def localise_schedule(schedule, language):
+    # Translates the distinct notes through the translation memory. The notes
+    # don't depend on dates or farm size, so they are shared across calendars.
+    if language not in LANGUAGES:
+        return schedule
+    phrases = sorted({e["activity"] for e in schedule["events"]} | {s["stage"] for s in schedule["stages"]})
+    try:
+        translated = await translate_segments(phrases, language)
+    except Exception as e:
+        print("⚠️ Calendar translation failed:", e)
+        return schedule
+
+    lookup = dict(zip(phrases, translated))
+    return {
+        **schedule,
+        "language": language,
+        "stages": [{**s, "stage": lookup.get(s["stage"], s["stage"])} for s in schedule["stages"]],
+        "events": [{**e, "activity": lookup.get(e["activity"], e["activity"])} for e in schedule["events"]],
+    }
+
+
+async def enrichment_tips(crop, soil_type, language="en"):
+    # Optional extra agronomy tips, cached per (crop, soil, language).
+    language_name = LANGUAGES.get(language, "English")
+    prompt = (
+        f"Give 5 short practical tips for growing {crop} on {soil_type} soil in India, in simple {language_name}. "
+        "Reply with only a JSON list of strings."
+    )
+    try:
+        reply = await chat_completion(prompt, model="anthropic/claude-3-haiku", temperature=0, cache=True)
+    except Exception as e:
+        print("⚠️ Calendar enrichment failed:", e)
+        return []
+    match = re.search(r"\[.*\]", reply, re.S)
+    try:
+        return [str(t) for t in json.loads(match.group(0))] if match else []
+    except ValueError:
+        return []
@@ -0,0 +1,225 @@
+# ✅ backend/diagnosis.py
+# Crop disease classification for /diagnose. Uploads stay in memory: the
+# image is decoded and downscaled once, re-encoded as JPEG and sent to the
+# Roboflow workflow as base64. Results are cached per crop by perceptual
+# hash (dHash), so repeat or near-identical photos skip Roboflow entirely;
+# exact hashes are also kept in shared state for the other workers.
+#
+# DIAGNOSE_BACKEND picks who classifies:
+#   remote       Roboflow only (default)
+#   local        the on-CPU model in local_classifier.py only
+#   local-first  the local model, then Roboflow when it is below
+#                LOCAL_MIN_CONFIDENCE or has no model for the crop; if Roboflow
+#                is unreachable the local answer is returned (and not cached)
+# Roboflow calls go through an upstream guard (admission.py): at most
+# ROBOFLOW_MAX_CONCURRENCY at a time, and none while its breaker is open.
+import io
+import os
+import json
+import time
+import base64
+import asyncio
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageOps
+from dotenv import load_dotenv
+from shared_state import shared_state
+from metrics import track_upstream
+from local_classifier import local_classifier
+from admission import upstream_guard
+
+load_dotenv()
+ROBOFLOW_API_KEY = os.getenv("ROBOFLOW_API_KEY")
+ROBOFLOW_API_URL = os.getenv("ROBOFLOW_API_URL", "https://detect.roboflow.com")
+
+WORKSPACE_NAME = "agrisaarthi"
+project_versions = {
+    "tomato": "custom-workflow-4",
+    "potato": "custom-workflow-3",
+    "onion": "custom-workflow-2"
+}
+
+DIAGNOSE_MAX_SIDE = int(os.getenv("DIAGNOSE_MAX_SIDE", "640"))
+DIAGNOSE_JPEG_QUALITY = int(os.getenv("DIAGNOSE_JPEG_QUALITY", "90"))
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "4"))
+PHASH_CACHE_SIZE = int(os.getenv("PHASH_CACHE_SIZE", "2048"))
+PHASH_CACHE_TTL = float(os.getenv("PHASH_CACHE_TTL", str(7 * 24 * 3600)))
+DIAGNOSE_BACKEND = os.getenv("DIAGNOSE_BACKEND", "remote")
+LOCAL_MIN_CONFIDENCE = float(os.getenv("LOCAL_MIN_CONFIDENCE", "0.7"))
+ROBOFLOW_MAX_CONCURRENCY = int(os.getenv("ROBOFLOW_MAX_CONCURRENCY", "8"))
+
+roboflow = upstream_guard("roboflow", ROBOFLOW_MAX_CONCURRENCY)
+
+# Roboflow setup: inference_sdk takes ~0.6 s to import, so the client is built on first use
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from inference_sdk import InferenceHTTPClient
+            _client = InferenceHTTPClient(
+                api_url=ROBOFLOW_API_URL,
+                api_key=ROBOFLOW_API_KEY
+            )
+    return _client
+
+
+def prepare_image(data: bytes, max_side=DIAGNOSE_MAX_SIDE):
+    # Decode once, honour EXIF rotation from phone cameras, shrink to max_side.
+    image = Image.open(io.BytesIO(data))
+    # JPEG draft mode decodes straight at a reduced scale (1/2, 1/4, 1/8)
+    image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    return image
+
+
+def load_image(data: bytes):
+    # prepare_image plus its dHash, in one worker-thread hop
+    image = prepare_image(data)
+    return image, dhash(image)
+
+
+def encode_jpeg(image, quality=DIAGNOSE_JPEG_QUALITY):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def dhash(image, size=8):
+    # 64-bit difference hash: compares neighbouring pixels of a 9x8 thumbnail.
+    pixels = np.asarray(image.convert("L").resize((size + 1, size), Image.LANCZOS), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class PerceptualHashCache:
+    # Per-crop LRU of hash -> result; lookups accept hashes within max_distance bits.
+    def __init__(self, maxsize=PHASH_CACHE_SIZE, ttl=PHASH_CACHE_TTL, max_distance=PHASH_MAX_DISTANCE):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, crop, phash):
+        # Exact hash first, else the nearest unexpired hash within max_distance
+        now = time.time()
+        with self._lock:
+            entries = self._data.get(crop)
+            if entries:
+                best = None
+                exact = entries.get(phash)
+                if exact and exact[1] >= now:
+                    best = phash
+                else:
+                    best_distance = self.max_distance + 1
+                    for key, (_, expires_at) in list(entries.items()):
+                        if expires_at < now:
+                            del entries[key]
+                            continue
+                        distance = (key ^ phash).bit_count()
+                        if distance < best_distance:
+                            best, best_distance = key, distance
+                if best is not None:
+                    entries.move_to_end(best)
+                    self.hits += 1
+                    return entries[best][0]
+            self.misses += 1
+            return None
+
+    def set(self, crop, phash, result):
+        with self._lock:
+            entries = self._data.setdefault(crop, OrderedDict())
+            entries[phash] = (result, time.time() + self.ttl)
+            entries.move_to_end(phash)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": sum(len(v) for v in self._data.values()),
+        }
+
+
+diagnosis_cache = PerceptualHashCache()
+
+
+def parse_workflow_result(result):
+    outer = result[0].get("predictions", {})
+    inner = outer.get("predictions", [])
+    prediction = inner[0] if inner else {}
+    return prediction.get("class"), prediction.get("confidence")
+
+
+def run_roboflow(model_slug, image_b64):
+    with track_upstream("roboflow", model_slug):
+        result = get_client().run_workflow(
+            workspace_name=WORKSPACE_NAME,
+            workflow_id=model_slug,
+            images={"image": image_b64},
+            use_cache=True
+        )
+    return parse_workflow_result(result)
+
+
+async def predict(crop, model_slug, image):
+    # Returns (result, cacheable) following DIAGNOSE_BACKEND
+    local = None
+    if DIAGNOSE_BACKEND in ("local", "local-first"):
+        try:
+            with track_upstream("local-model", crop):
+                crop_disease, confidence = await local_classifier.classify(crop, image)
+            local = {"class": crop_disease, "confidence": confidence, "source": "local"}
+        except Exception as e:
+            if DIAGNOSE_BACKEND == "local":
+                raise
+            if not isinstance(e, LookupError):
+                print("⚠️ Local classifier failed, asking Roboflow:", e)
+        if local and (DIAGNOSE_BACKEND == "local" or local["confidence"] >= LOCAL_MIN_CONFIDENCE):
+            return local, True
+
+    image_b64 = await asyncio.to_thread(encode_jpeg, image)
+    try:
+        async with roboflow.guard():
+            crop_disease, confidence = await asyncio.to_thread(run_roboflow, model_slug, image_b64)
+    except Exception as e:
+        if local is None:
+            raise
+        print("⚠️ Roboflow unavailable, using the local prediction:", e)
+        return local, False
+    return {"class": crop_disease, "confidence": confidence, "source": "roboflow"}, True
+
+
+async def classify_image(crop: str, data: bytes):
+    # Returns {"class", "confidence", "source", "cached"}; raises KeyError for unknown crops.
+    crop = crop.lower()
+    model_slug = project_versions[crop]
+
+    image, phash = await asyncio.to_thread(load_image, data)
+
+    cached = diagnosis_cache.get(crop, phash)
+    if cached is None:
+        shared = shared_state.get(f"diagnosis:{crop}:{phash:016x}")
+        if shared:
+            cached = json.loads(shared)
+            diagnosis_cache.set(crop, phash, cached)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    result, cacheable = await predict(crop, model_slug, image)
+    if result["class"] and cacheable:
+        diagnosis_cache.set(crop, phash, result)
+        shared_state.set(f"diagnosis:{crop}:{phash:016x}", json.dumps(result), ttl=PHASH_CACHE_TTL)
+    return {**result, "cached": False}
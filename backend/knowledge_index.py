@@ -0,0 +1,363 @@
+# ✅ backend/knowledge_index.py
+# Local retrieval for KrishiGPT: an in-process vector index over past
+# question/answer pairs (the semantic answer cache) and the curated passages
+# in knowledge/agri_kb.json. Text is embedded on the CPU by
+#   hashing (default)  signed feature hashing of words, crop names and
+#                      character n-grams; numpy only, matches rewordings
+#                      within a language
+#   onnx               a sentence-embedding model exported to ONNX in
+#                      EMBED_MODEL_DIR (model.onnx + tokenizer.json, e.g.
+#                      paraphrase-multilingual-MiniLM-L12-v2); needs
+#                      onnxruntime and tokenizers, and also matches across
+#                      English, Hindi and Marathi
+# A cached answer is only reused for the same language and the same crops and
+# numbers, so "tomato leaves yellow" never answers a potato question. Answers
+# live in SQLite so every worker shares them; each worker keeps the vectors in
+# memory and picks up rows added by the others before a lookup.
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+KRISHIGPT_INDEX_PATH = os.getenv("KRISHIGPT_INDEX_PATH", os.path.join(BACKEND_DIR, "cache", "krishigpt_answers.sqlite3"))
+KRISHIGPT_KB_PATH = os.getenv("KRISHIGPT_KB_PATH", os.path.join(BACKEND_DIR, "knowledge", "agri_kb.json"))
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "hashing")
+EMBED_MODEL_DIR = os.getenv("EMBED_MODEL_DIR", os.path.join(BACKEND_DIR, "knowledge", "embedder"))
+EMBED_DIM = int(os.getenv("EMBED_DIM", "2048"))
+EMBED_MAX_TOKENS = int(os.getenv("EMBED_MAX_TOKENS", "128"))
+# Cosine similarity needed to reuse a past answer / to inject a passage; the
+# defaults suit the hashing embedder, sentence models usually want ~0.9 / 0.5
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85"))
+PASSAGE_MIN_SCORE = float(os.getenv("PASSAGE_MIN_SCORE", "0.2"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(30 * 24 * 3600)))
+ANSWER_CACHE_MAX = int(os.getenv("ANSWER_CACHE_MAX", "20000"))
+
+# Crop names in English, Hindi and Marathi -> one canonical name
+CROP_TERMS = {
+    "tomato": ["tomato", "tomatoes", "टमाटर", "टोमॅटो", "टोमाटो"],
+    "potato": ["potato", "potatoes", "आलू", "बटाटा", "बटाटे"],
+    "onion": ["onion", "onions", "प्याज", "कांदा", "कांदे"],
+    "wheat": ["wheat", "गेहूं", "गेहूँ", "गहू"],
+    "rice": ["rice", "paddy", "धान", "चावल", "भात"],
+    "cotton": ["cotton", "कपास", "कापूस"],
+    "maize": ["maize", "corn", "मक्का", "मका"],
+    "soybean": ["soybean", "soyabean", "soya", "सोयाबीन"],
+    "sugarcane": ["sugarcane", "गन्ना", "ऊस"],
+    "chilli": ["chilli", "chili", "mirchi", "मिर्च", "मिर्ची", "मिरची"],
+    "brinjal": ["brinjal", "eggplant", "बैंगन", "वांगी", "वांगे"],
+    "grape": ["grape", "grapes", "अंगूर", "द्राक्ष", "द्राक्षे"],
+    "pomegranate": ["pomegranate", "अनार", "डाळिंब"],
+    "banana": ["banana", "केला", "केळी"],
+    "groundnut": ["groundnut", "peanut", "मूंगफली", "भुईमूग", "शेंगदाणा"],
+    "chickpea": ["chickpea", "gram", "चना", "हरभरा"],
+    "mustard": ["mustard", "सरसों", "मोहरी"],
+}
+# Fertilizers: "urea per acre" and "DAP per acre" are different questions
+INPUT_TERMS = {
+    "urea": ["urea", "यूरिया", "युरिया"],
+    "dap": ["dap", "डीएपी"],
+    "mop": ["mop", "potash", "पोटाश", "पोटॅश"],
+    "ssp": ["ssp", "superphosphate"],
+    "npk": ["npk", "एनपीके"],
+    "zinc": ["zinc", "जिंक", "झिंक"],
+}
+TERM_LOOKUP = {
+    **{term: "crop:" + crop for crop, terms in CROP_TERMS.items() for term in terms},
+    **{term: "input:" + name for name, terms in INPUT_TERMS.items() for term in terms},
+}
+# Postpositions written joined to the noun, mostly Marathi ("टोमॅटोची")
+ATTACHED_SUFFIXES = ("च्या", "ची", "चे", "चा", "ला", "ना", "त", "मध्ये", "वर", "ने")
+STOPWORDS = set(
+    "a an the is are was were be my our your i we you it its of in on at to for from by with and or "
+    "what why how when which who do does did can could should will would please tell me about this that "
+    "these those there here have has had any some much many"
+    .split()
+) | {"के", "की", "का", "है", "हैं", "में", "से", "को", "और", "क्या", "क्यों", "कैसे", "कब", "पर", "यह", "मेरे", "मेरी", "मेरा", "हो", "रहे", "रही", "रहा",
+     "चे", "ची", "चा", "आहे", "आहेत", "मध्ये", "काय", "का", "कसे", "कधी", "वर", "हे", "माझे", "माझी", "माझा", "आणि", "होत"}
+
+
+def normalize(text):
+    # NFKC, lower case, punctuation/symbols to spaces (Devanagari vowel signs survive)
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return " ".join("".join(" " if unicodedata.category(c)[0] in "PSZC" else c for c in text).split())
+
+
+def key_term(word):
+    if word in TERM_LOOKUP:
+        return TERM_LOOKUP[word]
+    for suffix in ATTACHED_SUFFIXES:
+        if word.endswith(suffix) and word[:-len(suffix)] in TERM_LOOKUP:
+            return TERM_LOOKUP[word[:-len(suffix)]]
+    return None
+
+
+def entities(text):
+    # Crops, fertilizers and numbers a cached answer has to agree on
+    found = set()
+    for word in normalize(text).split():
+        term = key_term(word)
+        if term:
+            found.add(term)
+        elif any(c.isdigit() for c in word):
+            found.add("num:" + word)
+    return found
+
+
+def _features(text):
+    words = [w for w in normalize(text).split() if w not in STOPWORDS]
+    for word in words:
+        yield word, 1.0
+        term = key_term(word)
+        if term:
+            yield term, 2.0
+        padded = f"<{word}>"
+        for n in (3, 4):
+            for i in range(len(padded) - n + 1):
+                yield "#" + padded[i:i + n], 0.25
+    for a, b in zip(words, words[1:]):
+        yield a + " " + b, 0.5
+
+
+class HashingEmbedder:
+    def __init__(self, dim=EMBED_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in _features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, h % self.dim] += weight if h & 0x80000000 else -weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+class OnnxEmbedder:
+    # Mean-pooled sentence embeddings from a transformer exported to ONNX
+    def __init__(self, model_dir=EMBED_MODEL_DIR):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(EMBED_MAX_TOKENS)
+        self.tokenizer.enable_padding()
+        self.session = ort.InferenceSession(os.path.join(model_dir, "model.onnx"), providers=["CPUExecutionProvider"])
+        self.inputs = {i.name for i in self.session.get_inputs()}
+        self.name = "onnx-" + os.path.basename(os.path.normpath(model_dir))
+        self.dim = self.embed(["warm up"]).shape[1]
+
+    def embed(self, texts):
+        encodings = self.tokenizer.encode_batch([normalize(t) or " " for t in texts])
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.inputs:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]
+        if hidden.ndim == 3:
+            weights = mask[:, :, None].astype(np.float32)
+            hidden = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        hidden = hidden.astype(np.float32)
+        return hidden / np.maximum(np.linalg.norm(hidden, axis=1, keepdims=True), 1e-9)
+
+
+def build_embedder(backend=EMBED_BACKEND):
+    if backend == "onnx":
+        try:
+            return OnnxEmbedder()
+        except Exception as e:
+            print("⚠️ ONNX embedder unavailable, falling back to hashing:", e)
+    return HashingEmbedder()
+
+
+class VectorIndex:
+    # Row-normalised vectors in one growable matrix; search is a dot product
+    def __init__(self, dim):
+        self.dim = dim
+        self._vectors = np.zeros((64, dim), dtype=np.float32)
+        self.ids = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, vectors):
+        needed = len(self.ids) + len(ids)
+        if needed > len(self._vectors):
+            grown = np.zeros((max(needed, 2 * len(self._vectors)), self.dim), dtype=np.float32)
+            grown[:len(self.ids)] = self._vectors[:len(self.ids)]
+            self._vectors = grown
+        self._vectors[len(self.ids):needed] = vectors
+        self.ids.extend(ids)
+
+    def search(self, vector, k=5):
+        # [(id, score)] best first
+        if not self.ids:
+            return []
+        scores = self._vectors[:len(self.ids)] @ vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [(self.ids[i], float(scores[i])) for i in top[np.argsort(-scores[top])]]
+
+
+class KnowledgeIndex:
+    def __init__(self, path=KRISHIGPT_INDEX_PATH, kb_path=KRISHIGPT_KB_PATH):
+        self.path = path
+        self.kb_path = kb_path
+        self._lock = threading.RLock()
+        self._conn = None
+        self.embedder = None
+        self.passages = {}
+        self.passage_index = None
+        self.answers = {}
+        self.answer_index = None
+        self.last_rowid = 0
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def load(self):
+        # Embeds the knowledge base and past answers once; safe to call repeatedly
+        with self._lock:
+            if self._conn is not None:
+                return
+            self.embedder = build_embedder()
+            try:
+                with open(self.kb_path, encoding="utf-8") as f:
+                    passages = json.load(f)
+            except Exception as e:
+                print("⚠️ KrishiGPT knowledge base not loaded:", e)
+                passages = []
+            self.passages = {p["id"]: p for p in passages}
+            self.passage_index = VectorIndex(self.embedder.dim)
+            if passages:
+                # Title + keywords and title + text separately, so a short Hindi or
+                # Marathi keyword match is not drowned out by the English text
+                ids = [p["id"] for p in passages] * 2
+                texts = [f"{p['title']}. {' '.join(p.get('keywords', []))}" for p in passages]
+                texts += [f"{p['title']}. {p['text']}" for p in passages]
+                self.passage_index.add(ids, self.embedder.embed(texts))
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "id INTEGER PRIMARY KEY, language TEXT NOT NULL, question TEXT NOT NULL, answer TEXT NOT NULL, "
+                "entities TEXT NOT NULL, embedder TEXT NOT NULL, embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+            self.answer_index = VectorIndex(self.embedder.dim)
+            self.sync()
+            print(f"✅ KrishiGPT index ready: {len(self.passages)} passages, {len(self.answers)} answers ({self.embedder.name})")
+
+    def sync(self):
+        # Indexes answers stored since the last sync (possibly by another worker)
+        with self._lock:
+            if len(self.answers) > 2 * ANSWER_CACHE_MAX:
+                # Rows pruned from SQLite are still in memory: rebuild
+                self.answers = {}
+                self.answer_index = VectorIndex(self.embedder.dim)
+                self.last_rowid = 0
+            rows = self._conn.execute(
+                "SELECT id, language, question, answer, entities, embedder, embedding, created_at "
+                "FROM answers WHERE id > ? AND created_at > ? ORDER BY id",
+                (self.last_rowid, time.time() - ANSWER_CACHE_TTL),
+            ).fetchall()
+            if not rows:
+                return 0
+            stale = [i for i, row in enumerate(rows) if row[5] != self.embedder.name]
+            vectors = np.stack([np.frombuffer(row[6], dtype=np.float32) if row[5] == self.embedder.name
+                                else np.zeros(self.embedder.dim, dtype=np.float32) for row in rows])
+            if stale:
+                # Stored by a different embedder: re-embed the questions
+                vectors[stale] = self.embedder.embed([rows[i][2] for i in stale])
+            for row in rows:
+                self.answers[row[0]] = {
+                    "language": row[1], "question": row[2], "answer": row[3],
+                    "entities": set(json.loads(row[4])), "created_at": row[7],
+                }
+            self.answer_index.add([row[0] for row in rows], vectors)
+            self.last_rowid = rows[-1][0]
+            return len(rows)
+
+    def lookup(self, query, language, threshold=ANSWER_CACHE_THRESHOLD):
+        # Best past answer to a near-identical question, or None
+        self.load()
+        self.sync()
+        vector = self.embedder.embed([query])[0]
+        wanted = entities(query)
+        now = time.time()
+        with self._lock:
+            for answer_id, score in self.answer_index.search(vector, k=8):
+                if score < threshold:
+                    break
+                answer = self.answers[answer_id]
+                if (answer["language"] == language and answer["entities"] == wanted
+                        and answer["created_at"] > now - ANSWER_CACHE_TTL):
+                    self.hits += 1
+                    return {"answer": answer["answer"], "question": answer["question"], "score": round(score, 4)}
+            self.misses += 1
+        return None
+
+    def retrieve(self, query, language, k=3, min_score=PASSAGE_MIN_SCORE):
+        # Knowledge base passages plus the closest past answer, best first
+        self.load()
+        vector = self.embedder.embed([query])[0]
+        results = []
+        seen = set()
+        for passage_id, score in self.passage_index.search(vector, k=2 * k):
+            if score >= min_score and passage_id not in seen:
+                seen.add(passage_id)
+                passage = self.passages[passage_id]
+                results.append({"title": passage["title"], "text": passage["text"], "score": round(score, 4)})
+        with self._lock:
+            for answer_id, score in self.answer_index.search(vector, k=8):
+                if score < min_score:
+                    break
+                answer = self.answers[answer_id]
+                if answer["language"] == language:
+                    results.append({"title": f"Earlier answer to: {answer['question']}", "text": answer["answer"],
+                                    "score": round(score, 4)})
+                    break
+        return sorted(results, key=lambda r: -r["score"])[:k]
+
+    def remember(self, query, language, answer):
+        self.load()
+        vector = self.embedder.embed([query])[0]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO answers (language, question, answer, entities, embedder, embedding, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (language, query.strip(), answer, json.dumps(sorted(entities(query))), self.embedder.name,
+                 vector.astype(np.float32).tobytes(), time.time()),
+            )
+            # Keep the newest ANSWER_CACHE_MAX unexpired rows
+            self._conn.execute(
+                "DELETE FROM answers WHERE created_at < ? OR id <= (SELECT MAX(id) FROM answers) - ?",
+                (time.time() - ANSWER_CACHE_TTL, ANSWER_CACHE_MAX),
+            )
+            self._conn.commit()
+            self.stored += 1
+        self.sync()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "stored": self.stored,
+            "answers": len(self.answers),
+            "passages": len(self.passages),
+            "embedder": self.embedder.name if self.embedder else None,
+        }
+
+
+knowledge_index = KnowledgeIndex()
@@ -0,0 +1,202 @@
+# ✅ backend/llm_cache.py
+# Completion cache keyed on (model, messages, temperature, max_tokens).
+# Tier 1 is an in-process LRU with TTL, tier 2 an optional on-disk store
+# (SQLite by default) so hot answers survive restarts and are shared by all
+# workers. With STATE_BACKEND=redis the shared tier lives in Redis instead.
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from shared_state import STATE_BACKEND
+
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2048"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.dirname(__file__), "cache", "llm_cache.sqlite3"))
+
+
+def make_key(model, messages, temperature=None, max_tokens=None):
+    raw = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    def __init__(self, maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    # Any object with get/set/delete/clear can be plugged in as the disk tier.
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+
+
+class StateCache:
+    # Disk-tier adapter over the shared state backend (see shared_state.py).
+    def __init__(self, state, namespace, ttl=LLM_CACHE_TTL):
+        self.state = state
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.state.get(self.namespace + key)
+
+    def set(self, key, value, ttl=None):
+        self.state.set(self.namespace + key, value, ttl if ttl is not None else self.ttl)
+
+    def delete(self, key):
+        self.state.delete(self.namespace + key)
+
+    def clear(self):
+        self.state.clear(self.namespace)
+
+    def purge_expired(self):
+        self.state.purge_expired()
+
+
+def shared_tier(path, namespace, ttl=LLM_CACHE_TTL):
+    # SQLite files are already shared between workers on one node; a Redis
+    # state backend replaces them so several nodes share one cache.
+    if STATE_BACKEND == "redis":
+        from shared_state import shared_state
+        return StateCache(shared_state, namespace, ttl)
+    return SQLiteCache(path, ttl) if path else None
+
+
+class CompletionCache:
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else LRUCache()
+        self.disk = disk
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key, value, ttl=None):
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "memory_entries": len(self.memory),
+            "disk_enabled": self.disk is not None,
+        }
+
+
+def build_default_cache():
+    return CompletionCache(LRUCache(), shared_tier(LLM_CACHE_PATH, "llm:"))
+
+
+completion_cache = build_default_cache()
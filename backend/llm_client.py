@@ -0,0 +1,231 @@
+# ✅ backend/llm_client.py
+# Shared async OpenRouter client: one pooled httpx.AsyncClient per event loop,
+# a concurrency cap with a circuit breaker (admission.py), timeouts and retry
+# with exponential backoff.
+import os
+import asyncio
+import json
+import random
+import httpx
+from dotenv import load_dotenv
+
+from llm_cache import completion_cache, make_key
+from singleflight import flight_group
+from metrics import track_upstream, record_tokens
+from admission import upstream_guard
+
+load_dotenv()
+
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+APP_REFERER = "https://agrisaarthi.vercel.app"
+DEFAULT_MODEL = "anthropic/claude-3-haiku"
+
+# Tunables (env overridable)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "16"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+# Conversation history sent along with a question: most recent messages first, within both limits
+LLM_HISTORY_MESSAGES = int(os.getenv("LLM_HISTORY_MESSAGES", "6"))
+LLM_HISTORY_CHARS = int(os.getenv("LLM_HISTORY_CHARS", "4000"))
+
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_client = None
+_client_loop = None
+# Each attempt holds a slot; backoff sleeps don't, and an open breaker stops the retries
+openrouter = upstream_guard("openrouter", LLM_MAX_CONCURRENCY)
+
+
+def get_client():
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_client():
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+def build_headers(title=None):
+    headers = {
+        "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
+        "HTTP-Referer": APP_REFERER,
+        "Content-Type": "application/json",
+    }
+    if title:
+        headers["X-Title"] = title
+    return headers
+
+
+def build_payload(messages, model=DEFAULT_MODEL, temperature=0.7, max_tokens=None):
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+    }
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+    return payload
+
+
+def bounded_history(history, max_messages=LLM_HISTORY_MESSAGES, max_chars=LLM_HISTORY_CHARS):
+    # Accepts [{"role", "content"}] or [(question, answer)]; keeps the newest turns that fit
+    messages = []
+    for item in history or []:
+        if isinstance(item, dict):
+            messages.append((item.get("role"), item.get("content")))
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            messages += [("user", item[0]), ("assistant", item[1])]
+
+    kept = []
+    used = 0
+    for role, content in reversed(messages):
+        if role not in ("user", "assistant") or not isinstance(content, str) or not content.strip():
+            continue
+        if len(kept) >= max_messages:
+            break
+        content = content.strip()
+        if used + len(content) > max_chars:
+            if kept:
+                break
+            content = content[-max_chars:]
+        used += len(content)
+        kept.append({"role": role, "content": content})
+    kept.reverse()
+    # The conversation sent upstream has to start with the user
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+    return kept
+
+
+def _backoff_delay(attempt, retry_after=None):
+    if retry_after:
+        try:
+            return min(float(retry_after), LLM_BACKOFF_MAX)
+        except ValueError:
+            pass
+    delay = LLM_BACKOFF_BASE * (2 ** attempt)
+    return min(delay, LLM_BACKOFF_MAX) * (0.5 + random.random() / 2)
+
+
+async def post_completion(payload, title=None):
+    client = get_client()
+    headers = build_headers(title)
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            async with openrouter.guard() as outcome:
+                with track_upstream("openrouter", payload["model"]) as call:
+                    res = await client.post(OPENROUTER_URL, headers=headers, json=payload)
+                    call["outcome"] = str(res.status_code)
+                outcome["ok"] = res.status_code not in RETRY_STATUS_CODES
+        except (httpx.TimeoutException, httpx.TransportError):
+            if attempt >= LLM_MAX_RETRIES:
+                raise
+            await asyncio.sleep(_backoff_delay(attempt))
+            continue
+
+        if res.status_code in RETRY_STATUS_CODES and attempt < LLM_MAX_RETRIES:
+            await asyncio.sleep(_backoff_delay(attempt, res.headers.get("Retry-After")))
+            continue
+
+        res.raise_for_status()
+        data = res.json()
+        record_tokens(payload["model"], data.get("usage"))
+        return data
+
+
+async def chat_completion(prompt=None, messages=None, model=DEFAULT_MODEL, temperature=0.7, max_tokens=None, title=None,
+                          cache=False, cache_ttl=None):
+    if messages is None:
+        messages = [{"role": "user", "content": prompt}]
+
+    payload = build_payload(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+    if not cache:
+        data = await post_completion(payload, title=title)
+        return data["choices"][0]["message"]["content"]
+
+    key = make_key(model, messages, temperature, max_tokens)
+    cached = completion_cache.get(key)
+    if cached is not None:
+        return cached
+    # Identical cacheable prompts already in flight share one upstream call
+    return await flight_group("openrouter").do(key, _cached_completion, key, payload, title, cache_ttl)
+
+
+async def _cached_completion(key, payload, title, cache_ttl):
+    data = await post_completion(payload, title=title)
+    content = data["choices"][0]["message"]["content"]
+    if content:
+        completion_cache.set(key, content, cache_ttl)
+    return content
+
+
+async def chat_completion_stream(prompt=None, messages=None, model=DEFAULT_MODEL, temperature=0.7, max_tokens=None, title=None):
+    # Yields content deltas as OpenRouter streams them (stream: true).
+    if messages is None:
+        messages = [{"role": "user", "content": prompt}]
+    payload = build_payload(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+    payload["stream"] = True
+
+    client = get_client()
+    headers = build_headers(title)
+
+    started = False
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            # A long answer is not a slow upstream, so streams skip the slow-call check
+            async with openrouter.guard(slow_call=None) as outcome:
+                with track_upstream("openrouter-stream", payload["model"]) as call:
+                    async with client.stream("POST", OPENROUTER_URL, headers=headers, json=payload) as res:
+                        call["outcome"] = str(res.status_code)
+                        if res.status_code in RETRY_STATUS_CODES and attempt < LLM_MAX_RETRIES:
+                            outcome["ok"] = False
+                            retry_after = res.headers.get("Retry-After") or 0
+                        else:
+                            res.raise_for_status()
+
+                            async for line in res.aiter_lines():
+                                # Blank lines separate events; ": ..." lines are keep-alive comments
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[5:].strip()
+                                if data == "[DONE]":
+                                    return
+                                chunk = json.loads(data)
+                                if "error" in chunk:
+                                    raise RuntimeError(chunk["error"].get("message", "OpenRouter stream error"))
+                                record_tokens(payload["model"], chunk.get("usage"))
+                                if not chunk.get("choices"):
+                                    continue
+                                delta = chunk["choices"][0].get("delta", {}).get("content")
+                                if delta:
+                                    started = True
+                                    yield delta
+                            return
+        except (httpx.TimeoutException, httpx.TransportError):
+            # Only retry if nothing has been sent yet
+            if started or attempt >= LLM_MAX_RETRIES:
+                raise
+            await asyncio.sleep(_backoff_delay(attempt))
+            continue
+        await asyncio.sleep(_backoff_delay(attempt, retry_after))
@@ -0,0 +1,227 @@
+# ✅ backend/local_classifier.py
+# Optional on-CPU crop disease classifier, used by diagnosis.py when
+# DIAGNOSE_BACKEND is "local" or "local-first". One model per crop in
+# LOCAL_MODEL_DIR, ONNX (preferably int8-quantized) or TorchScript:
+#   tomato.onnx  (or tomato.pt)  +  tomato.json
+# The JSON is the list of class names in output order - the same names the
+# Roboflow workflow returns - or {"labels": [...], "input_size": 224,
+# "mean": [...], "std": [...], "softmax": true}. onnxruntime / torch are only
+# imported when a model is loaded; neither is in requirements.txt.
+#
+# Requests are micro-batched: callers queue images, and a dispatcher thread
+# gathers up to LOCAL_BATCH_SIZE of them (waiting at most LOCAL_BATCH_WAIT_MS
+# once a pool thread is free) and runs the batch on a LOCAL_THREADS pool.
+# While every pool thread is busy, new images keep queuing into the next batch.
+# A caller waits at most LOCAL_CLASSIFY_TIMEOUT seconds; an image still queued
+# by then is dropped from its batch (TimeoutError, so local-first asks Roboflow).
+import os
+import json
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+LOCAL_MODEL_DIR = os.getenv(
+    "LOCAL_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "crop_diagnosis", "models")
+)
+LOCAL_BATCH_SIZE = int(os.getenv("LOCAL_BATCH_SIZE", "8"))
+LOCAL_BATCH_WAIT_MS = float(os.getenv("LOCAL_BATCH_WAIT_MS", "5"))
+LOCAL_THREADS = int(os.getenv("LOCAL_THREADS", "2"))
+LOCAL_CLASSIFY_TIMEOUT = float(os.getenv("LOCAL_CLASSIFY_TIMEOUT", "10"))
+# Threads used inside one batch; 0 splits the cores evenly across LOCAL_THREADS
+LOCAL_INTRA_OP_THREADS = int(os.getenv("LOCAL_INTRA_OP_THREADS", "0"))
+
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+MODEL_EXTENSIONS = (".onnx", ".pt")
+
+
+def intra_op_threads(pool_threads=LOCAL_THREADS):
+    if LOCAL_INTRA_OP_THREADS > 0:
+        return LOCAL_INTRA_OP_THREADS
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return max(1, cores // max(1, pool_threads))
+
+
+class CropModel:
+    # A loaded model plus its preprocessing; predict() takes an NCHW float32 batch.
+    def __init__(self, path, meta, threads=None):
+        if isinstance(meta, list):
+            meta = {"labels": meta}
+        self.path = path
+        self.labels = list(meta["labels"])
+        self.input_size = int(meta.get("input_size", 224))
+        self.mean = np.array(meta.get("mean", IMAGENET_MEAN), dtype=np.float32).reshape(1, 1, 3)
+        self.std = np.array(meta.get("std", IMAGENET_STD), dtype=np.float32).reshape(1, 1, 3)
+        self.softmax = bool(meta.get("softmax", True))
+        # Models exported with a fixed batch of 1 are run image by image
+        self.batched = True
+        threads = threads or intra_op_threads()
+
+        if path.endswith(".onnx"):
+            import onnxruntime as ort
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+            session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+            model_input = session.get_inputs()[0]
+            self.batched = model_input.shape[0] != 1
+            self._run = lambda batch: session.run(None, {model_input.name: batch})[0]
+        else:
+            import torch
+            torch.set_num_threads(threads)
+            module = torch.jit.load(path, map_location="cpu").eval()
+
+            def run(batch):
+                with torch.inference_mode():
+                    return module(torch.from_numpy(batch)).numpy()
+            self._run = run
+
+    def preprocess(self, image):
+        # Whole frame stretched to the input size, like the Roboflow classifiers
+        image = image.convert("RGB").resize((self.input_size, self.input_size), Image.BILINEAR)
+        pixels = np.asarray(image, dtype=np.float32) / 255.0
+        return ((pixels - self.mean) / self.std).transpose(2, 0, 1)
+
+    def predict(self, batch):
+        # [N, 3, H, W] -> [(class, confidence)]
+        scores = np.asarray(self._run(np.ascontiguousarray(batch, dtype=np.float32)), dtype=np.float32)
+        if self.softmax:
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            scores /= scores.sum(axis=1, keepdims=True)
+        best = scores.argmax(axis=1)
+        return [(self.labels[i], round(float(row[i]), 4)) for i, row in zip(best, scores)]
+
+
+class LocalClassifier:
+    def __init__(self, model_dir=LOCAL_MODEL_DIR, batch_size=LOCAL_BATCH_SIZE,
+                 batch_wait_ms=LOCAL_BATCH_WAIT_MS, threads=LOCAL_THREADS, timeout=LOCAL_CLASSIFY_TIMEOUT):
+        self.model_dir = model_dir
+        self.timeout = timeout
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait_ms / 1000
+        self.threads = max(1, threads)
+        self._models = {}  # crop -> CropModel, or None when unavailable
+        self._load_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(self.threads)
+        self._pool = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.images = 0
+        self.timeouts = 0
+
+    def model_path(self, crop):
+        for ext in MODEL_EXTENSIONS:
+            path = os.path.join(self.model_dir, crop + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load(self, crop):
+        # Loads (once) and returns the crop's model, or None if there is none
+        with self._load_lock:
+            if crop not in self._models:
+                model = None
+                path = self.model_path(crop)
+                if path:
+                    try:
+                        with open(os.path.join(self.model_dir, crop + ".json"), encoding="utf-8") as f:
+                            meta = json.load(f)
+                        model = CropModel(path, meta, threads=intra_op_threads(self.threads))
+                        print(f"✅ Loaded local {crop} model: {os.path.basename(path)} ({len(model.labels)} classes)")
+                    except Exception as e:
+                        print(f"⚠️ Local {crop} model unavailable:", e)
+                self._models[crop] = model
+            return self._models[crop]
+
+    def warm(self, crops):
+        for crop in crops:
+            self.load(crop)
+
+    def submit(self, crop, image):
+        # Queues a PIL image; the Future resolves to (class, confidence)
+        model = self.load(crop)
+        if model is None:
+            raise LookupError(f"No local model for crop: {crop}")
+        self._start()
+        future = Future()
+        self._queue.put((crop, image, future))
+        return future
+
+    async def classify(self, crop, image):
+        # Raises LookupError when the crop has no local model, TimeoutError after self.timeout
+        if crop not in self._models:
+            await asyncio.to_thread(self.load, crop)
+        future = self.submit(crop, image)
+        try:
+            # Cancelling the wrapper cancels the queued Future, so its batch skips it
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise TimeoutError(f"Local {crop} model took over {self.timeout:g}s") from None
+
+    def _start(self):
+        with self._start_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="local-classifier")
+                threading.Thread(target=self._dispatch, name="local-classifier-dispatch", daemon=True).start()
+
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    pending.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._pool.submit(self._run_batch, pending)
+
+    def _run_batch(self, pending):
+        try:
+            by_crop = {}
+            for crop, image, future in pending:
+                # Skips requests whose caller went away while queued
+                if future.set_running_or_notify_cancel():
+                    by_crop.setdefault(crop, []).append((image, future))
+            for crop, items in by_crop.items():
+                model = self._models[crop]
+                step = len(items) if model.batched else 1
+                for i in range(0, len(items), step):
+                    chunk = items[i:i + step]
+                    try:
+                        results = model.predict(np.stack([model.preprocess(image) for image, _ in chunk]))
+                    except Exception as e:
+                        for _, future in chunk:
+                            future.set_exception(e)
+                        continue
+                    self.batches += 1
+                    self.images += len(chunk)
+                    for (_, future), result in zip(chunk, results):
+                        future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "model_dir": self.model_dir,
+            "models": {crop: os.path.basename(m.path) if m else None for crop, m in self._models.items()},
+            "batches": self.batches,
+            "images": self.images,
+            "timeouts": self.timeouts,
+            "avg_batch_size": round(self.images / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+
+local_classifier = LocalClassifier()
@@ -0,0 +1,512 @@
+# ✅ backend/mandi_analytics.py
+# Precomputed mandi analytics, kept up to date by the mandi store (it is one
+# of the store's listeners, like price alerts):
+#   - 7/30-day rolling mean/min/max of modal_price per (state, market, commodity)
+#   - the cross-market spread of each commodity within a district
+#   - daily top gainers / losers
+# Prices live in a (series x day) matrix of daily mean modal_price over the
+# last MANDI_ANALYTICS_DAYS days, plus the 29 days before them so every
+# rolling window is complete. An incremental ingest only adds rows on or
+# after the last day already seen, so a refresh re-aggregates just those rows
+# and recomputes what depends on them: rolling windows ending on changed
+# columns (for the series whose prices changed, or every series on a new
+# day), the spreads of the affected districts and the movers of the changed
+# days. A full reload rebuilds.
+# Updates run on the store's loader thread. Each one builds a new snapshot
+# (AnalyticsData) and publishes it in one assignment. Requests read whichever
+# snapshot is current, with dict lookups.
+import os
+import copy
+import time
+from datetime import datetime, date
+import numpy as np
+import pandas as pd
+
+MANDI_ANALYTICS_DAYS = int(os.getenv("MANDI_ANALYTICS_DAYS", "90"))
+MANDI_SPREAD_MAX_AGE = int(os.getenv("MANDI_SPREAD_MAX_AGE", "3"))
+MANDI_MOVERS_DAYS = int(os.getenv("MANDI_MOVERS_DAYS", "7"))
+MANDI_MOVERS_MAX_GAP = int(os.getenv("MANDI_MOVERS_MAX_GAP", "7"))
+ROLLING_WINDOWS = (7, 30)
+ROLLING_STATS = ("mean", "min", "max", "n")
+# Days kept before the first reported one, so its windows are full
+LOOKBACK = max(ROLLING_WINDOWS) - 1
+SERIES_KEYS = ["state", "district", "market", "commodity"]
+
+
+def _day_to_str(day):
+    return str(np.datetime64(int(day), "D"))
+
+
+def parse_day(value):
+    # "YYYY-MM-DD" -> days since the epoch; ValueError otherwise
+    return (datetime.strptime(value, "%Y-%m-%d").date() - date(1970, 1, 1)).days
+
+
+def _price(value):
+    return None if value != value else round(float(value), 2)
+
+
+def shift_columns(array, k, fill):
+    # A copy with the k oldest day columns dropped and k new ones appended
+    if k <= 0:
+        return array.copy()
+    out = np.full_like(array, fill)
+    if k < array.shape[1]:
+        out[:, :-k] = array[:, k:]
+    return out
+
+
+def window_extreme(price, window, ufunc):
+    # np.fmin / np.fmax over the `window` columns ending at each column (NaN
+    # skipped), by doubling the covered span: log2(window) passes
+    result = price
+    span = 1
+    while span < window:
+        step = min(span, window - span)
+        combined = result.copy()
+        ufunc(result[:, step:], result[:, :-step], out=combined[:, step:])
+        result = combined
+        span += step
+    return result
+
+
+def rolling_columns(price, windows, start):
+    # {window: (mean, min, max, days with a price)} for the windows ending at
+    # each column from `start` on (NaN where a window has no prices)
+    has = ~np.isnan(price)
+    zeros = np.zeros((price.shape[0], 1))
+    sums = np.concatenate([zeros, np.cumsum(np.where(has, price, 0.0), axis=1)], axis=1)
+    counts = np.concatenate([zeros, np.cumsum(has, axis=1)], axis=1)
+    cols = np.arange(start, price.shape[1])
+    result = {}
+    for window in windows:
+        lower = np.maximum(cols + 1 - window, 0)
+        n = counts[:, cols + 1] - counts[:, lower]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = (sums[:, cols + 1] - sums[:, lower]) / n
+        low = window_extreme(price, window, np.fmin)[:, start:]
+        high = window_extreme(price, window, np.fmax)[:, start:]
+        result[window] = (mean, low, high, n)
+    return result
+
+
+def last_price_columns(price):
+    # Column of each row's last price, -1 when it has none
+    has = ~np.isnan(price)
+    last = price.shape[1] - 1 - np.argmax(has[:, ::-1], axis=1)
+    return np.where(has.any(axis=1), last, -1)
+
+
+class AnalyticsData:
+    # One consistent snapshot. Once published it is only read: updates work on
+    # a shallow copy and replace (never modify) the arrays and containers.
+    # Internal columns are days start_day .. start_day + width - 1; the
+    # rolling arrays cover the last `days` of them.
+    def __init__(self, days):
+        self.days = days
+        self.width = days + LOOKBACK
+        self.start_day = None
+        self.last_day = None
+        self.keys = []
+        self.series = {}
+        self.by_pair = {}
+        self.price = np.full((0, self.width), np.nan)
+        self.last_col = np.zeros(0, dtype=np.int64)
+        self.day_rows = np.zeros(self.width, dtype=np.int64)
+        self.rolling = {w: {stat: np.full((0, days), np.nan, dtype=np.float32) for stat in ROLLING_STATS}
+                        for w in ROLLING_WINDOWS}
+        # Spread groups: (state, district, commodity) -> code, with their series
+        self.spread_codes = {}
+        self.spread_keys = []
+        self.spread_members = []
+        self.spread_group = np.zeros(0, dtype=np.int64)
+        self.district_groups = {}
+        self.spread_entries = {}
+        self.spreads = {}
+        # Mover groupings
+        self.states = {}
+        self.commodities = {}
+        self.state_code = np.zeros(0, dtype=np.int64)
+        self.commodity_code = np.zeros(0, dtype=np.int64)
+        self.movers = {}
+
+    @property
+    def first_visible(self):
+        return self.start_day + LOOKBACK
+
+
+class MandiAnalytics:
+    def __init__(self, days=MANDI_ANALYTICS_DAYS):
+        self.days = days
+        self.version = 0
+        self.rebuilds = 0
+        self.incremental_updates = 0
+        self.last_update_ms = None
+        self.last_changed_series = 0
+        self._data = AnalyticsData(days)
+
+    @property
+    def ready(self):
+        return self._data.last_day is not None
+
+    # --- maintenance -------------------------------------------------------
+
+    def on_mandi_update(self, df):
+        # df: the store frame with a datetime "_date" column
+        started = time.perf_counter()
+        frame = df.dropna(subset=["_date", "modal_price", "state", "market", "commodity"]) if df is not None else None
+        if frame is None or frame.empty:
+            self._data = AnalyticsData(self.days)
+            self.version += 1
+            return
+        days = frame["_date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        last_day = int(days.max())
+
+        old = self._data
+        if old.last_day is not None and self._only_recent_changed(old, days, last_day):
+            # An incremental ingest re-reads the last day seen and adds the days after it
+            data = self._advance(old, last_day)
+            from_day = max(old.last_day, data.start_day)
+            self.incremental_updates += 1
+        else:
+            old = None
+            data = AnalyticsData(self.days)
+            data.start_day = last_day - data.width + 1
+            from_day = data.start_day
+            self.rebuilds += 1
+        data.last_day = last_day
+
+        keep = days >= from_day
+        self._update(data, old, frame[keep], days[keep], from_day)
+        self._data = data
+        self.version += 1
+        self.last_update_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def _only_recent_changed(self, old, days, last_day):
+        # Rows per day before the last day seen must be exactly what was aggregated
+        if last_day < old.last_day:
+            return False
+        new_start = last_day - old.width + 1
+        lo, hi = new_start - old.start_day, old.last_day - old.start_day
+        if lo >= hi:
+            return True
+        older = days[(days >= new_start) & (days < old.last_day)]
+        return np.array_equal(np.bincount(older - new_start, minlength=hi - lo), old.day_rows[lo:hi])
+
+    def _advance(self, old, last_day):
+        # The next snapshot, its columns moved on to end at last_day
+        k = last_day - old.last_day
+        data = copy.copy(old)
+        data.start_day = old.start_day + k
+        data.price = shift_columns(old.price, k, np.nan)
+        data.day_rows = shift_columns(old.day_rows[None, :], k, 0)[0]
+        data.last_col = np.where(old.last_col >= k, old.last_col - k, -1)
+        data.rolling = {w: {stat: shift_columns(a, k, np.nan) for stat, a in stats.items()} for w, stats in old.rolling.items()}
+        first_mover_day = data.start_day + data.width - MANDI_MOVERS_DAYS
+        data.movers = {day: ranked for day, ranked in old.movers.items() if day >= first_mover_day}
+        return data
+
+    def _update(self, data, old, frame, days, from_day):
+        # Replace every column from `from_day` on with the rows given, then
+        # recompute what depends on the series and columns that changed
+        c0 = from_day - data.start_day
+        ids = self._series_ids(data, frame)
+        width = data.width - c0
+        flat = ids * width + (days - from_day)
+        size = len(data.keys) * width
+        sums = np.bincount(flat, frame["modal_price"].to_numpy(dtype=float), minlength=size).reshape(len(data.keys), width)
+        counts = np.bincount(flat, minlength=size).reshape(len(data.keys), width)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            price = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        before = data.price[:, c0:]
+        same = (before == price) | (np.isnan(before) & np.isnan(price))
+        changed = np.flatnonzero(~same.all(axis=1))
+        data.price[:, c0:] = price
+        data.day_rows[c0:] = np.bincount(days - from_day, minlength=width)
+        self.last_changed_series = len(changed)
+
+        # Columns this update added need every series (windows slide over
+        # older prices too); re-read columns only the series that changed
+        first_new = 0 if old is None else max(0, min(old.last_day - data.start_day + 1, data.width))
+        self._roll(data, slice(None), max(first_new, LOOKBACK), data.width)
+        self._roll(data, changed, max(c0, LOOKBACK), max(first_new, LOOKBACK))
+
+        recent_before = None
+        if old is not None:
+            threshold = data.width - 1 - MANDI_SPREAD_MAX_AGE
+            recent_before = old.last_col >= threshold
+        if len(changed):
+            data.last_col[changed] = last_price_columns(data.price[changed])
+        self._update_spreads(data, changed, recent_before)
+
+        if len(changed) or first_new < data.width:
+            start = c0 if len(changed) else first_new
+            cols = range(max(start, data.width - MANDI_MOVERS_DAYS, 1), data.width)
+            data.movers = {**data.movers, **self._movers(data, cols)}
+
+    def _roll(self, data, rows, start, end):
+        # Rolling stats for the windows ending on columns start..end-1
+        if start >= end or (isinstance(rows, np.ndarray) and not len(rows)):
+            return
+        block = data.price[rows, start - LOOKBACK:end]
+        for window, (mean, low, high, n) in rolling_columns(block, ROLLING_WINDOWS, LOOKBACK).items():
+            stats = data.rolling[window]
+            v0, v1 = start - LOOKBACK, end - LOOKBACK
+            stats["mean"][rows, v0:v1] = mean
+            stats["min"][rows, v0:v1] = low
+            stats["max"][rows, v0:v1] = high
+            stats["n"][rows, v0:v1] = n
+
+    def _series_ids(self, data, frame):
+        # Series id per row; series not seen before get new matrix rows
+        codes = np.zeros(len(frame), dtype=np.int64)
+        columns = []
+        for key in SERIES_KEYS:
+            key_codes, labels = pd.factorize(frame[key], use_na_sentinel=False)
+            codes = pd.factorize(codes * len(labels) + key_codes)[0]
+            columns.append((key_codes, labels))
+        if not len(codes):
+            return codes
+        # Any row of each series will do to read its key
+        rows = np.empty(codes.max() + 1, dtype=np.int64)
+        rows[codes] = np.arange(len(codes))
+        keys = list(zip(*(labels.take(key_codes[rows]).tolist() for key_codes, labels in columns)))
+        new_keys = [key for key in keys if key not in data.series]
+        if new_keys:
+            self._add_series(data, new_keys)
+        ids = np.fromiter((data.series[key] for key in keys), dtype=np.int64, count=len(keys))
+        return ids[codes]
+
+    def _add_series(self, data, new_keys):
+        # Copies every container it extends, so the published snapshot is untouched
+        first = len(data.keys)
+        data.keys = data.keys + new_keys
+        data.series = {**data.series, **{key: first + j for j, key in enumerate(new_keys)}}
+        data.by_pair = dict(data.by_pair)
+        data.spread_codes = dict(data.spread_codes)
+        data.spread_keys = list(data.spread_keys)
+        data.spread_members = list(data.spread_members)
+        data.district_groups = dict(data.district_groups)
+        data.states = dict(data.states)
+        data.commodities = dict(data.commodities)
+        spread_group, state_code, commodity_code = [], [], []
+        for i, (state, district, market, commodity) in enumerate(new_keys, first):
+            data.by_pair[(market, commodity)] = data.by_pair.get((market, commodity), []) + [i]
+            group = (state, district, commodity)
+            code = data.spread_codes.get(group)
+            if code is None:
+                code = data.spread_codes[group] = len(data.spread_keys)
+                data.spread_keys.append(group)
+                data.spread_members.append([])
+                data.district_groups[district] = data.district_groups.get(district, []) + [code]
+            data.spread_members[code] = data.spread_members[code] + [i]
+            spread_group.append(code)
+            state_code.append(data.states.setdefault(state, len(data.states)))
+            commodity_code.append(data.commodities.setdefault(commodity, len(data.commodities)))
+
+        added = len(new_keys)
+        data.spread_group = np.concatenate([data.spread_group, spread_group]).astype(np.int64)
+        data.state_code = np.concatenate([data.state_code, state_code]).astype(np.int64)
+        data.commodity_code = np.concatenate([data.commodity_code, commodity_code]).astype(np.int64)
+        data.price = np.vstack([data.price, np.full((added, data.width), np.nan)])
+        data.last_col = np.concatenate([data.last_col, np.full(added, -1, dtype=np.int64)])
+        data.rolling = {w: {stat: np.vstack([a, np.full((added, data.days), np.nan, dtype=np.float32)]) for stat, a in stats.items()}
+                        for w, stats in data.rolling.items()}
+
+    def _update_spreads(self, data, changed, recent_before):
+        # Groups with a changed series, or one whose latest price just went stale
+        threshold = data.width - 1 - MANDI_SPREAD_MAX_AGE
+        touched = set(data.spread_group[changed].tolist())
+        if recent_before is not None:
+            old = len(recent_before)
+            stale = np.flatnonzero(recent_before != (data.last_col[:old] >= threshold))
+            touched.update(data.spread_group[stale].tolist())
+        if not touched:
+            return
+
+        data.spread_entries = dict(data.spread_entries)
+        districts = set()
+        for code in touched:
+            entry = self._spread_entry(data, code, threshold)
+            if entry:
+                data.spread_entries[code] = entry
+            else:
+                data.spread_entries.pop(code, None)
+            districts.add(data.spread_keys[code][1])
+
+        data.spreads = dict(data.spreads)
+        for district in districts:
+            entries = [data.spread_entries[c] for c in data.district_groups[district] if c in data.spread_entries]
+            if entries:
+                data.spreads[district] = sorted(entries, key=lambda e: -(e["spread_pct"] or 0))
+            else:
+                data.spreads.pop(district, None)
+
+    def _spread_entry(self, data, code, threshold):
+        # Latest price of every market in the group, if recent
+        state, district, commodity = data.spread_keys[code]
+        markets = sorted(
+            (float(data.price[i, data.last_col[i]]), data.keys[i][2], i)
+            for i in data.spread_members[code] if data.last_col[i] >= threshold
+        )
+        if len(markets) < 2:
+            return None
+        low, high = markets[0][0], markets[-1][0]
+        return {
+            "state": state,
+            "district": district,
+            "commodity": commodity,
+            "markets": len(markets),
+            "min_price": _price(low),
+            "max_price": _price(high),
+            "mean_price": _price(sum(p for p, _, _ in markets) / len(markets)),
+            "spread": _price(high - low),
+            "spread_pct": _price((high - low) / low * 100) if low > 0 else None,
+            "cheapest_market": markets[0][1],
+            "dearest_market": markets[-1][1],
+            "prices": [
+                {"market": market, "modal_price": _price(p), "date": _day_to_str(data.start_day + data.last_col[i])}
+                for p, market, i in markets
+            ],
+        }
+
+    def _movers(self, data, cols):
+        # Per day: change of each series against its previous price (at most
+        # MANDI_MOVERS_MAX_GAP days older), ranked within each grouping
+        if not len(cols):
+            return {}
+        lo = max(0, cols[0] - MANDI_MOVERS_MAX_GAP)
+        has = ~np.isnan(data.price[:, lo:])
+        # Column of each series' latest price on or before each day (-1: none in range)
+        seen = np.maximum.accumulate(np.where(has, np.arange(lo, data.width), -1), axis=1)
+        states = list(data.states)
+        commodities = list(data.commodities)
+        n_commodities = len(commodities)
+        group_codes = {
+            ("state",): (data.state_code, lambda c: (states[c],)),
+            ("commodity",): (data.commodity_code, lambda c: (commodities[c],)),
+            ("state", "commodity"): (data.state_code * n_commodities + data.commodity_code,
+                                     lambda c: (states[c // n_commodities], commodities[c % n_commodities])),
+        }
+        movers = {}
+        for col in cols:
+            prev = seen[:, col - 1 - lo]
+            valid = has[:, col - lo] & (prev >= 0) & (col - prev <= MANDI_MOVERS_MAX_GAP)
+            ids = np.flatnonzero(valid)
+            if not len(ids):
+                continue
+            before = data.price[ids, prev[ids]]
+            change = data.price[ids, col] - before
+            with np.errstate(invalid="ignore", divide="ignore"):
+                pct = np.where(before > 0, change / before * 100, 0.0)
+            order = np.argsort(-pct, kind="stable")
+            ranked = {"ids": ids[order], "pct": pct[order], "change": change[order], "before": before[order],
+                      "prev_day": data.start_day + prev[ids][order]}
+
+            # Positions into the ranking, split by group; a stable sort keeps each group ranked
+            groups = {(): np.arange(len(order))}
+            for group, (codes, label) in group_codes.items():
+                codes = codes[ranked["ids"]]
+                by_group = np.argsort(codes, kind="stable")
+                for chunk in np.split(by_group, np.flatnonzero(np.diff(codes[by_group])) + 1):
+                    groups[(group, label(codes[chunk[0]]))] = chunk
+            movers[data.start_day + col] = (ranked, groups)
+        return movers
+
+    # --- queries -----------------------------------------------------------
+
+    def rolling_stats(self, market, commodity, state=None, history=0):
+        data = self._data
+        rows = []
+        for i in data.by_pair.get((market, commodity), ()):
+            series_state, district, _, _ = data.keys[i]
+            if state and series_state != state:
+                continue
+            col = int(data.last_col[i])
+            if col < LOOKBACK:
+                continue  # no price within the last `days`
+            v = col - LOOKBACK
+            item = {
+                "state": series_state,
+                "district": district,
+                "market": market,
+                "commodity": commodity,
+                "last_date": _day_to_str(data.start_day + col),
+                "last_price": _price(data.price[i, col]),
+                "rolling": {
+                    f"{w}d": {
+                        "mean": _price(stats["mean"][i, v]),
+                        "min": _price(stats["min"][i, v]),
+                        "max": _price(stats["max"][i, v]),
+                        "days": int(stats["n"][i, v]),
+                    }
+                    for w, stats in data.rolling.items()
+                },
+            }
+            if history:
+                item["history"] = [
+                    {
+                        "date": _day_to_str(data.start_day + c),
+                        "modal_price": _price(data.price[i, c]),
+                        **{f"mean_{w}d": _price(stats["mean"][i, c - LOOKBACK]) for w, stats in data.rolling.items()},
+                    }
+                    for c in range(max(LOOKBACK, col - history + 1), col + 1)
+                ]
+            rows.append(item)
+        return rows
+
+    def spread(self, district, state=None, commodity=None):
+        return [
+            entry for entry in self._data.spreads.get(district, ())
+            if (not state or entry["state"] == state) and (not commodity or entry["commodity"] == commodity)
+        ]
+
+    def top_movers(self, day=None, state=None, commodity=None, limit=10):
+        data = self._data
+        day = data.last_day if day is None else day
+        if day not in data.movers:
+            return {"date": _day_to_str(day) if day is not None else None, "gainers": [], "losers": []}
+        ranked, groups = data.movers[day]
+        group = tuple(k for k, v in (("state", state), ("commodity", commodity)) if v)
+        label = tuple(v for v in (state, commodity) if v)
+        positions = groups.get((group, label) if group else (), np.empty(0, dtype=np.int64))
+
+        def rows(picked):
+            out = []
+            for p in picked:
+                i = ranked["ids"][p]
+                state_, district, market, commodity_ = data.keys[i]
+                out.append({
+                    "state": state_,
+                    "district": district,
+                    "market": market,
+                    "commodity": commodity_,
+                    "modal_price": _price(ranked["before"][p] + ranked["change"][p]),
+                    "previous_price": _price(ranked["before"][p]),
+                    "previous_date": _day_to_str(ranked["prev_day"][p]),
+                    "change": _price(ranked["change"][p]),
+                    "change_pct": _price(ranked["pct"][p]),
+                })
+            return out
+
+        gainers = [p for p in positions[:limit] if ranked["change"][p] > 0]
+        losers = [p for p in positions[::-1][:limit] if ranked["change"][p] < 0]
+        return {"date": _day_to_str(day), "gainers": rows(gainers), "losers": rows(losers)}
+
+    def status(self):
+        data = self._data
+        ready = data.last_day is not None
+        return {
+            "ready": ready,
+            "series": len(data.keys),
+            "first_date": _day_to_str(data.first_visible) if ready else None,
+            "last_date": _day_to_str(data.last_day) if ready else None,
+            "version": self.version,
+            "rebuilds": self.rebuilds,
+            "incremental_updates": self.incremental_updates,
+            "last_update_ms": self.last_update_ms,
+            "last_changed_series": self.last_changed_series,
+        }
+
+
+mandi_analytics = MandiAnalytics()
@@ -0,0 +1,287 @@
+# ✅ backend/mandi_ingest.py
+# Bulk ingest of the data.gov.in mandi resource into a Parquet snapshot.
+#
+# Pages are fetched concurrently (bounded) and each page is appended to a
+# ParquetWriter as soon as it arrives, so the full dump is never held in
+# memory. Converting and writing pages, and compaction, run in worker threads
+# so an ingest inside the server leaves the event loop free. The snapshot is a directory of part files plus a small meta.json;
+# incremental runs only ask for arrival dates on/after the last one seen and
+# add a new part. Rows older than MANDI_RETENTION_DAYS before the newest
+# arrival date are dropped on load and on compaction.
+#
+#   python mandi_ingest.py            # incremental (full on first run)
+#   python mandi_ingest.py --full     # rebuild from scratch
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from datetime import datetime, timedelta, date
+
+import httpx
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import mandi_rates
+from mandi_rates import PAGE_SIZE, build_params
+from metrics import track_upstream
+
+MANDI_SNAPSHOT_DIR = os.getenv("MANDI_SNAPSHOT_DIR", os.path.join(os.path.dirname(__file__), "data", "mandi_snapshot"))
+MANDI_INGEST_CONCURRENCY = int(os.getenv("MANDI_INGEST_CONCURRENCY", "8"))
+MANDI_MAX_PARTS = int(os.getenv("MANDI_MAX_PARTS", "24"))
+MANDI_MAX_BACKFILL_DAYS = int(os.getenv("MANDI_MAX_BACKFILL_DAYS", "30"))
+# Never shorter than the analytics window (mandi_analytics.py) plus its 30-day rolling lookback
+MANDI_RETENTION_DAYS = max(
+    int(os.getenv("MANDI_RETENTION_DAYS", "180")),
+    int(os.getenv("MANDI_ANALYTICS_DAYS", "90")) + 30,
+)
+
+STRING_FIELDS = ["state", "district", "market", "commodity", "variety", "grade", "arrival_date"]
+PRICE_FIELDS = ["min_price", "max_price", "modal_price"]
+KEY_FIELDS = ["state", "district", "market", "commodity", "variety", "grade", "arrival_date"]
+
+SCHEMA = pa.schema(
+    [(name, pa.string()) for name in STRING_FIELDS]
+    + [(name, pa.float64()) for name in PRICE_FIELDS]
+    + [("arrival_day", pa.date32())]
+)
+
+META_FILE = "meta.json"
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_day(value):
+    try:
+        return datetime.strptime(value, "%d/%m/%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def records_to_batch(records):
+    columns = {name: [r.get(name) for r in records] for name in STRING_FIELDS}
+    for name in PRICE_FIELDS:
+        columns[name] = [_to_float(r.get(name)) for r in records]
+    columns["arrival_day"] = [_to_day(r.get("arrival_date")) for r in records]
+    return pa.RecordBatch.from_pydict(columns, schema=SCHEMA)
+
+
+def read_meta(snapshot_dir=MANDI_SNAPSHOT_DIR):
+    path = os.path.join(snapshot_dir, META_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_meta(meta, snapshot_dir=MANDI_SNAPSHOT_DIR):
+    tmp = os.path.join(snapshot_dir, f".{META_FILE}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(snapshot_dir, META_FILE))
+
+
+def part_files(snapshot_dir=MANDI_SNAPSHOT_DIR):
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(
+        os.path.join(snapshot_dir, name)
+        for name in os.listdir(snapshot_dir)
+        if name.startswith("part-") and name.endswith(".parquet")
+    )
+
+
+def apply_retention(table, days=MANDI_RETENTION_DAYS):
+    # Keeps `days` arrival days up to the newest one (and rows without a date)
+    newest = pc.max(table.column("arrival_day")).as_py()
+    if newest is None or not days:
+        return table
+    cutoff = pa.scalar(newest - timedelta(days=days - 1), pa.date32())
+    day = table.column("arrival_day")
+    return table.filter(pc.or_kleene(pc.greater_equal(day, cutoff), pc.is_null(day)))
+
+
+def read_snapshot(snapshot_dir=MANDI_SNAPSHOT_DIR, retention_days=MANDI_RETENTION_DAYS):
+    # Returns a deduplicated pyarrow Table (latest part wins), or None.
+    parts = part_files(snapshot_dir)
+    if not parts:
+        return None
+    table = apply_retention(ds.dataset(parts, schema=SCHEMA, format="parquet").to_table(), retention_days)
+    if len(parts) > 1:
+        df = table.to_pandas()
+        df = df.drop_duplicates(subset=KEY_FIELDS, keep="last")
+        table = pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+    return table
+
+
+class PartWriter:
+    # Streams record batches into one new part file; committed by rename.
+    def __init__(self, snapshot_dir):
+        os.makedirs(snapshot_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        self.final_path = os.path.join(snapshot_dir, f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet")
+        self.tmp_path = self.final_path + ".tmp"
+        self.writer = None
+        self.rows = 0
+        self.max_day = None
+        self._lock = asyncio.Lock()
+
+    def write(self, records):
+        if records:
+            self.write_batch(records_to_batch(records))
+
+    async def write_async(self, records):
+        # Pages convert in parallel threads; writes go to the file one at a time
+        if not records:
+            return
+        batch = await asyncio.to_thread(records_to_batch, records)
+        async with self._lock:
+            await asyncio.to_thread(self.write_batch, batch)
+
+    def write_batch(self, batch):
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.tmp_path, SCHEMA, compression="zstd")
+        self.writer.write_batch(batch)
+        self.rows += batch.num_rows
+        days = [d for d in batch.column("arrival_day").to_pylist() if d]
+        if days:
+            self.max_day = max([self.max_day, *days]) if self.max_day else max(days)
+
+    def commit(self):
+        if self.writer is None:
+            return None
+        self.writer.close()
+        os.replace(self.tmp_path, self.final_path)
+        return self.final_path
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+async def fetch_page(client, semaphore, params, retries=3):
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                with track_upstream("data.gov.in", "ingest") as call:
+                    res = await client.get(mandi_rates.BASE_URL, params=params)
+                    call["outcome"] = str(res.status_code)
+                res.raise_for_status()
+                # A 200 with an HTML or truncated body is retried like a failed request
+                return res.json()
+        except (httpx.TransportError, httpx.HTTPStatusError, ValueError):
+            if attempt >= retries:
+                raise
+        # Back off without holding a slot the other pages could use
+        await asyncio.sleep(0.5 * 2 ** attempt)
+
+
+async def ingest_query(client, semaphore, writer, page_size, extra_filters=None):
+    # First page tells us the total; the rest are fetched concurrently.
+    def params_for(offset):
+        params = build_params(limit=page_size, offset=offset)
+        params.update(extra_filters or {})
+        return params
+
+    first = await fetch_page(client, semaphore, params_for(0))
+    await writer.write_async(first.get("records", []))
+    total = int(first.get("total") or 0)
+
+    async def one(offset):
+        page = await fetch_page(client, semaphore, params_for(offset))
+        await writer.write_async(page.get("records", []))
+
+    await asyncio.gather(*(one(offset) for offset in range(page_size, total, page_size)))
+    return total
+
+
+async def ingest(full=False, snapshot_dir=MANDI_SNAPSHOT_DIR, concurrency=MANDI_INGEST_CONCURRENCY, page_size=PAGE_SIZE):
+    meta = read_meta(snapshot_dir)
+    last_day = meta.get("last_arrival_date")
+    incremental = bool(last_day and part_files(snapshot_dir)) and not full
+    if incremental and datetime.strptime(last_day, "%Y-%m-%d").date() < date.today() - timedelta(days=MANDI_MAX_BACKFILL_DAYS):
+        # Syncing only the last MANDI_MAX_BACKFILL_DAYS would leave a hole in the history
+        print(f"⚠️ Last mandi sync ({last_day}) is older than {MANDI_MAX_BACKFILL_DAYS} days, running a full ingest")
+        incremental = False
+
+    started = time.perf_counter()
+    writer = PartWriter(snapshot_dir)
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    try:
+        async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(60, connect=10)) as client:
+            if incremental:
+                # Re-read the last day too: it may have been only partly published.
+                first_day = datetime.strptime(last_day, "%Y-%m-%d").date()
+                days = [first_day + timedelta(days=i) for i in range((date.today() - first_day).days + 1)]
+                await asyncio.gather(*(
+                    ingest_query(client, semaphore, writer, page_size, {"filters[arrival_date]": d.strftime("%d/%m/%Y")})
+                    for d in days
+                ))
+            else:
+                await ingest_query(client, semaphore, writer, page_size)
+    except Exception:
+        async with writer._lock:
+            await asyncio.to_thread(writer.abort)
+        raise
+
+    old_parts = part_files(snapshot_dir)
+    new_part = await asyncio.to_thread(writer.commit)
+    if new_part and not incremental:
+        for path in old_parts:
+            os.remove(path)
+
+    max_day = writer.max_day.isoformat() if writer.max_day else None
+    meta = {
+        "last_arrival_date": max(filter(None, [max_day, last_day if incremental else None]), default=None),
+        "last_sync": datetime.now().isoformat(timespec="seconds"),
+        "last_sync_mode": "incremental" if incremental else "full",
+        "last_sync_rows": writer.rows,
+    }
+    os.makedirs(snapshot_dir, exist_ok=True)
+    write_meta(meta, snapshot_dir)
+
+    if len(part_files(snapshot_dir)) > MANDI_MAX_PARTS:
+        await asyncio.to_thread(compact, snapshot_dir)
+
+    elapsed = time.perf_counter() - started
+    return {**meta, "seconds": round(elapsed, 3), "rows_per_sec": round(writer.rows / elapsed, 1) if elapsed else None}
+
+
+def compact(snapshot_dir=MANDI_SNAPSHOT_DIR):
+    old_parts = part_files(snapshot_dir)
+    table = read_snapshot(snapshot_dir)
+    if table is None:
+        return
+    writer = PartWriter(snapshot_dir)
+    pq.write_table(table, writer.tmp_path, compression="zstd")
+    os.replace(writer.tmp_path, writer.final_path)
+    for path in old_parts:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest data.gov.in mandi prices into a Parquet snapshot.")
+    parser.add_argument("--full", action="store_true", help="rebuild the snapshot instead of syncing new days")
+    parser.add_argument("--out", default=MANDI_SNAPSHOT_DIR, help="snapshot directory")
+    parser.add_argument("--concurrency", type=int, default=MANDI_INGEST_CONCURRENCY)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    result = asyncio.run(ingest(full=args.full, snapshot_dir=args.out, concurrency=args.concurrency, page_size=args.page_size))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
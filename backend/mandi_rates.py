@@ -1,18 +1,29 @@
 # ✅ backend/mandi_rates.py
 import os
+import asyncio
 import requests
 from dotenv import load_dotenv
 
+from singleflight import flight_group
+from metrics import track_upstream
+from admission import upstream_guard
+
 load_dotenv()
 
 DATA_GOV_API_KEY = os.getenv("DATA_GOV_API_KEY")
-BASE_URL = "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070"
+BASE_URL = os.getenv("DATA_GOV_BASE_URL", "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070")
+PAGE_SIZE = int(os.getenv("MANDI_PAGE_SIZE", "1000"))
+DATAGOV_MAX_CONCURRENCY = int(os.getenv("DATAGOV_MAX_CONCURRENCY", "4"))
 
-def fetch_mandi_data(state=None, district=None, commodity=None):
+# Live lookups only; the background ingest keeps its own concurrency and retries
+datagov = upstream_guard("data.gov.in", DATAGOV_MAX_CONCURRENCY)
+
+def build_params(state=None, district=None, commodity=None, limit=100, offset=0):
     params = {
         "api-key": DATA_GOV_API_KEY,
         "format": "json",
-        "limit": 100,
+        "limit": limit,
+        "offset": offset,
     }
     if state:
         params["filters[state]"] = state
@@ -20,9 +31,25 @@ def fetch_mandi_data(state=None, district=None, commodity=None):
         params["filters[district]"] = district
     if commodity:
         params["filters[commodity]"] = commodity
+    return params
 
-    response = requests.get(BASE_URL, params=params)
+def fetch_mandi_data(state=None, district=None, commodity=None):
+    params = build_params(state=state, district=district, commodity=commodity)
+
+    with track_upstream("data.gov.in", "live") as call:
+        response = requests.get(BASE_URL, params=params, timeout=30)
+        call["outcome"] = str(response.status_code)
     response.raise_for_status()
     data = response.json()
 
     return data.get("records", [])
+
+async def fetch_mandi_data_guarded(state=None, district=None, commodity=None):
+    async with datagov.guard():
+        return await asyncio.to_thread(fetch_mandi_data, state, district, commodity)
+
+async def fetch_mandi_data_shared(state=None, district=None, commodity=None):
+    # Identical concurrent lookups share one data.gov.in call
+    return await flight_group("data.gov.in").do(
+        (state, district, commodity), fetch_mandi_data_guarded, state, district, commodity
+    )
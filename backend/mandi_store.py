@@ -0,0 +1,174 @@
+# ✅ backend/mandi_store.py
+# In-memory mandi price store. A background task syncs the Parquet snapshot
+# (see mandi_ingest.py) on a schedule and reloads it; requests are answered
+# from columnar data with per-column position indexes, already sorted
+# newest-first. With several workers only the one holding the refresh lock
+# ingests; the others reload the snapshot when its meta.json changes.
+import os
+import time
+import asyncio
+import numpy as np
+import pandas as pd
+
+from mandi_ingest import ingest, read_meta, read_snapshot, MANDI_SNAPSHOT_DIR
+from shared_state import shared_state
+
+MANDI_REFRESH_INTERVAL = float(os.getenv("MANDI_REFRESH_INTERVAL", str(30 * 60)))
+MANDI_RELOAD_POLL = float(os.getenv("MANDI_RELOAD_POLL", "60"))
+INDEX_COLUMNS = ["state", "district", "market", "commodity"]
+PRICE_COLUMNS = ["min_price", "max_price", "modal_price"]
+
+
+def format_price(value):
+    if value is None or value != value:
+        return None
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+class MandiStore:
+    def __init__(self):
+        self.df = None
+        self.records = []
+        self.indexes = {}
+        self.loaded_at = None
+        self.version = 0
+        self.last_error = None
+        self.last_sync = None
+        self.snapshot_sync = None
+        # Called with the new frame on every load, before it is served (e.g.
+        # price alerts); they run on a worker thread during load_snapshot
+        self.listeners = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self):
+        return self.df is not None
+
+    def load_records(self, records):
+        self.load_frame(pd.DataFrame(records))
+
+    def load_frame(self, df):
+        self._publish(self._prepare(df))
+
+    def _prepare(self, df):
+        # Everything but the swap; load_snapshot runs this off the event loop
+        if df.empty:
+            df = pd.DataFrame(columns=INDEX_COLUMNS + ["arrival_date"] + PRICE_COLUMNS)
+
+        df = df.copy()
+        df["_date"] = pd.to_datetime(df["arrival_date"], format="%d/%m/%Y", errors="coerce")
+        df = df.drop(columns=["arrival_day"], errors="ignore")
+        for col in PRICE_COLUMNS:
+            if col in df:
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+        # Newest first, so any subset of positions is already in response order
+        df = df.sort_values("_date", ascending=False, kind="stable", na_position="last").reset_index(drop=True)
+
+        indexes = {}
+        for col in INDEX_COLUMNS:
+            if col in df:
+                indexes[col] = {key: np.asarray(pos, dtype=np.int64) for key, pos in df.groupby(col, sort=False).indices.items()}
+
+        # API responses keep data.gov.in's string fields ("1786", not 1786.0)
+        out = df.drop(columns=["_date"])
+        for col in PRICE_COLUMNS:
+            if col in out:
+                out[col] = [format_price(v) for v in out[col]]
+        records = out.astype(object).where(out.notna(), None).to_dict(orient="records")
+
+        for listener in self.listeners:
+            try:
+                listener(df)
+            except Exception as e:
+                print("⚠️ Mandi store listener failed:", e)
+        return df, records, indexes
+
+    def _publish(self, loaded):
+        # One assignment, so a request never sees a frame with another load's indexes
+        df, records, indexes = loaded
+        self.df, self.records, self.indexes, self.loaded_at, self.version = df, records, indexes, time.time(), self.version + 1
+
+    def _load_table(self, snapshot_dir):
+        table = read_snapshot(snapshot_dir)
+        return None if table is None else self._prepare(table.to_pandas())
+
+    def positions(self, **filters):
+        result = None
+        for col, value in filters.items():
+            if not value:
+                continue
+            pos = self.indexes.get(col, {}).get(value)
+            if pos is None:
+                return np.empty(0, dtype=np.int64)
+            result = pos if result is None else np.intersect1d(result, pos, assume_unique=True)
+        if result is None:
+            return np.arange(len(self.records))
+        return result
+
+    def query(self, state=None, district=None, market=None, commodity=None, limit=None):
+        pos = self.positions(state=state, district=district, market=market, commodity=commodity)
+        if limit:
+            pos = pos[:limit]
+        return [self.records[i] for i in pos]
+
+    def query_frame(self, state=None, district=None, market=None, commodity=None):
+        pos = self.positions(state=state, district=district, market=market, commodity=commodity)
+        frame = self.df.iloc[pos].copy()
+        frame["arrival_date"] = frame.pop("_date")
+        return frame
+
+    async def load_snapshot(self, snapshot_dir=MANDI_SNAPSHOT_DIR):
+        self.snapshot_sync = read_meta(snapshot_dir).get("last_sync")
+        # Parsing, indexing and the listeners take seconds on a large snapshot
+        loaded = await asyncio.to_thread(self._load_table, snapshot_dir)
+        if loaded is not None:
+            self._publish(loaded)
+        return loaded is not None
+
+    async def refresh(self, snapshot_dir=MANDI_SNAPSHOT_DIR):
+        async with self._lock:
+            try:
+                self.last_sync = await ingest(snapshot_dir=snapshot_dir)
+                await self.load_snapshot(snapshot_dir)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print("⚠️ Mandi store refresh failed:", e)
+
+    async def reload_if_changed(self, snapshot_dir=MANDI_SNAPSHOT_DIR):
+        # Another worker synced the snapshot since we last loaded it
+        if read_meta(snapshot_dir).get("last_sync") != self.snapshot_sync:
+            await self.load_snapshot(snapshot_dir)
+
+    async def run_refresh_loop(self, interval=MANDI_REFRESH_INTERVAL, poll=MANDI_RELOAD_POLL):
+        # Serve yesterday's snapshot straight away, then sync in the background
+        try:
+            await self.load_snapshot()
+        except Exception as e:
+            print("⚠️ Mandi snapshot load failed:", e)
+        next_refresh = 0
+        while True:
+            if time.time() >= next_refresh:
+                # The lock outlives one interval so the holder keeps renewing it;
+                # if that worker dies another one takes over on its next turn
+                if shared_state.acquire("lock:mandi-refresh", ttl=interval + poll):
+                    await self.refresh()
+                next_refresh = time.time() + interval
+            try:
+                await self.reload_if_changed()
+            except Exception as e:
+                print("⚠️ Mandi snapshot reload failed:", e)
+            await asyncio.sleep(min(poll, interval))
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "rows": len(self.records),
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error,
+            "last_sync": self.last_sync,
+        }
+
+
+mandi_store = MandiStore()
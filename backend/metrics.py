@@ -0,0 +1,187 @@
+# ✅ backend/metrics.py
+# In-process metrics in Prometheus text format: latency histograms per route
+# and per upstream call, LLM token counters, and cache/coalescing gauges
+# collected at scrape time. Upstream timings made during a request are also
+# gathered so the opt-in Server-Timing header can break a request down.
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Requests sending this header (any value) get a Server-Timing response header
+METRICS_TIMING_HEADER = os.getenv("METRICS_TIMING_HEADER", "X-Debug-Timing")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Upstream calls made while serving the current request: [(upstream, seconds)]
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+# Other per-request tallies for Server-Timing: {name: {field: amount}}
+_request_counts = contextvars.ContextVar("request_counts", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [bucket counts..., count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *label_values, value):
+        with self._lock:
+            row = self._values.get(label_values)
+            if row is None:
+                row = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += 1
+            row[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, row in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, row):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, [('le', '+Inf')])} {row[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {row[-2]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {round(row[-1], 6)}")
+        return lines
+
+
+request_latency = Histogram(
+    "agrisaarthi_request_duration_seconds", "HTTP request latency by route.", ["method", "route", "status"]
+)
+upstream_latency = Histogram(
+    "agrisaarthi_upstream_duration_seconds", "Upstream call latency.", ["upstream", "target", "outcome"]
+)
+llm_tokens = Counter("agrisaarthi_llm_tokens_total", "LLM tokens reported by OpenRouter.", ["model", "kind"])
+translation_segments = Counter(
+    "agrisaarthi_translation_segments_total", "Distinct segments translated, by translation memory outcome.", ["language", "outcome"]
+)
+translation_saved_tokens = Histogram(
+    "agrisaarthi_translation_saved_tokens", "LLM tokens the translation memory saved per translated document.", ["language"],
+    buckets=(0, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+
+_metrics = [request_latency, upstream_latency, llm_tokens, translation_segments, translation_saved_tokens]
+# Callables returning {metric name: (help, {((label, value), ...): sample})}, read at
+# scrape time; names ending in _total are exposed as counters
+_collectors = []
+
+
+def register_collector(fn):
+    _collectors.append(fn)
+    return fn
+
+
+@contextmanager
+def track_upstream(upstream, target=""):
+    # with track_upstream("openrouter", model) as call: ... call["outcome"] = "429"
+    started = time.perf_counter()
+    call = {"outcome": None}
+    failed = True
+    try:
+        yield call
+        failed = False
+    finally:
+        elapsed = time.perf_counter() - started
+        outcome = call["outcome"] or ("error" if failed else "ok")
+        upstream_latency.observe(upstream, target, outcome, value=elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((upstream, elapsed))
+
+
+def record_tokens(model, usage):
+    if not usage:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind):
+            llm_tokens.inc(model, kind.split("_")[0], amount=usage[kind])
+
+
+def count_for_request(name, **amounts):
+    counts = _request_counts.get()
+    if counts is None:
+        return
+    fields = counts.setdefault(name, {})
+    for field, amount in amounts.items():
+        fields[field] = fields.get(field, 0) + amount
+
+
+def start_request_timing():
+    timings = []
+    _request_timings.set(timings)
+    _request_counts.set({})
+    return timings
+
+
+def server_timing(total, timings):
+    # Server-Timing: total;dur=812.3, openrouter;dur=640.1;desc="2 calls", ...,
+    # translation;desc="segments=12 cached=9 saved_tokens=840"
+    summed = {}
+    for upstream, elapsed in timings:
+        count, seconds = summed.get(upstream, (0, 0.0))
+        summed[upstream] = (count + 1, seconds + elapsed)
+    parts = [f"total;dur={total * 1000:.1f}"]
+    for upstream, (count, seconds) in summed.items():
+        name = "".join(c if c.isalnum() or c in "-_" else "-" for c in upstream)
+        parts.append(f'{name};dur={seconds * 1000:.1f};desc="{count} call{"s" if count > 1 else ""}"')
+    for name, fields in (_request_counts.get() or {}).items():
+        parts.append(f'{name};desc="{" ".join(f"{k}={v}" for k, v in fields.items())}"')
+    return ", ".join(parts)
+
+
+def render_metrics():
+    lines = []
+    for metric in _metrics:
+        lines += metric.render()
+    for collect in _collectors:
+        try:
+            gauges = collect()
+        except Exception as e:
+            print("⚠️ Metrics collector failed:", e)
+            continue
+        for name, (help, samples) in gauges.items():
+            kind = "counter" if name.endswith("_total") else "gauge"
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for labels, value in samples.items():
+                if value is None:
+                    continue
+                names = [k for k, _ in labels]
+                values = [v for _, v in labels]
+                lines.append(f"{name}{_format_labels(names, values)} {float(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,183 @@
+# ✅ backend/news_feed.py
+# Agriculture news for /news. Feeds are fetched concurrently with
+# ETag/Last-Modified revalidation, and every article is summarised once:
+# summaries are memoised by entry GUID/link, the district blurb per district
+# per day.
+import os
+import re
+import time
+import asyncio
+import httpx
+from datetime import datetime, timedelta, date
+from urllib.parse import urlparse
+
+from llm_client import chat_completion
+from llm_cache import CompletionCache, LRUCache, shared_tier
+from singleflight import flight_group
+from metrics import track_upstream
+
+AGRI_RSS_FEEDS = [
+    url.strip() for url in os.getenv(
+        "AGRI_RSS_FEEDS", "https://agrifarming.in/feed,https://justagriculture.in/feed"
+    ).split(",") if url.strip()
+]
+NEWS_FEED_TTL = float(os.getenv("NEWS_FEED_TTL", "600"))
+NEWS_MAX_PER_FEED = int(os.getenv("NEWS_MAX_PER_FEED", "8"))
+NEWS_MAX_AGE_DAYS = int(os.getenv("NEWS_MAX_AGE_DAYS", "90"))
+NEWS_SUMMARY_CONCURRENCY = int(os.getenv("NEWS_SUMMARY_CONCURRENCY", "4"))
+NEWS_SUMMARY_TTL = 365 * 24 * 3600
+NEWS_CACHE_PATH = os.getenv("NEWS_CACHE_PATH", os.path.join(os.path.dirname(__file__), "cache", "news_summaries.sqlite3"))
+
+SUMMARY_UNAVAILABLE = "⚠️ AI summary unavailable."
+
+summary_cache = CompletionCache(
+    LRUCache(maxsize=4096, ttl=NEWS_SUMMARY_TTL),
+    shared_tier(NEWS_CACHE_PATH, "news:", ttl=NEWS_SUMMARY_TTL),
+)
+
+# url -> {"etag", "modified", "entries", "checked_at"}
+_feeds = {}
+_client = None
+_client_loop = None
+
+
+def get_client():
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(timeout=httpx.Timeout(15, connect=5), follow_redirects=True)
+        _client_loop = loop
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def parse_feed(content):
+    # feedparser is slow to import; only pay for it once a feed is fetched
+    import feedparser
+    return feedparser.parse(content)
+
+
+async def fetch_feed(url):
+    state = _feeds.get(url)
+    if state and time.time() - state["checked_at"] < NEWS_FEED_TTL:
+        return state["entries"]
+    return await flight_group("feedparser").do(url, _fetch_feed, url)
+
+
+async def _fetch_feed(url):
+    state = _feeds.get(url)
+    headers = {}
+    if state and state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state and state.get("modified"):
+        headers["If-Modified-Since"] = state["modified"]
+
+    try:
+        with track_upstream("feedparser", urlparse(url).netloc) as call:
+            res = await get_client().get(url, headers=headers)
+            call["outcome"] = str(res.status_code)
+        if res.status_code == 304 and state:
+            state["checked_at"] = time.time()
+            return state["entries"]
+        res.raise_for_status()
+        feed = await asyncio.to_thread(parse_feed, res.content)
+    except Exception as e:
+        print("⚠️ Feed fetch failed:", url, e)
+        # Serve the last good copy if we have one
+        return state["entries"] if state else []
+
+    _feeds[url] = {
+        "etag": res.headers.get("ETag"),
+        "modified": res.headers.get("Last-Modified"),
+        "entries": feed.entries,
+        "checked_at": time.time(),
+    }
+    return feed.entries
+
+
+def recent_entries(entries, cutoff):
+    picked = []
+    for entry in entries:
+        if len(picked) >= NEWS_MAX_PER_FEED:
+            break
+        if not getattr(entry, "published_parsed", None):
+            continue
+        pub = datetime(*entry.published_parsed[:6])
+        if pub < cutoff:
+            continue
+        picked.append((entry, pub))
+    return picked
+
+
+async def get_ai_summary(prompt: str):
+    try:
+        return await chat_completion(prompt, model="anthropic/claude-3-haiku", temperature=0.6)
+    except Exception as e:
+        print("AI summarization failed:", e)
+        return SUMMARY_UNAVAILABLE
+
+
+async def memoised_summary(key, prompt, ttl=NEWS_SUMMARY_TTL):
+    cached = summary_cache.get(key)
+    if cached is not None:
+        return cached
+    return await flight_group("news-summary").do(key, _summarise, key, prompt, ttl)
+
+
+async def _summarise(key, prompt, ttl):
+    summary = (await get_ai_summary(prompt)).strip()
+    if summary != SUMMARY_UNAVAILABLE:
+        summary_cache.set(key, summary, ttl)
+    return summary
+
+
+async def summarise_entry(entry, pub, semaphore):
+    key = "entry:" + (entry.get("id") or entry.get("guid") or entry.link)
+    clean_summary = re.sub(r'<[^>]+>', '', entry.get("summary", ""))
+    async with semaphore:
+        summary = await memoised_summary(key, f"Summarize this agriculture article for Indian farmers:\n\n{clean_summary}")
+    return {
+        "title": entry.title,
+        "summary": summary,
+        "url": entry.link,
+        "published": pub.isoformat()
+    }
+
+
+async def district_update(district):
+    key = f"district:{district.strip().lower()}:{date.today().isoformat()}"
+    summary = await memoised_summary(
+        key,
+        f"Write a short 1-paragraph agriculture update or news for {district}, India. It could include weather, crop alerts, farmer schemes, etc.",
+        ttl=24 * 3600,
+    )
+    return {
+        "title": f"📍 Trending in {district}",
+        "summary": summary,
+        "url": "",
+        "published": datetime.now().isoformat()
+    }
+
+
+async def get_news(district=None):
+    cutoff = datetime.now() - timedelta(days=NEWS_MAX_AGE_DAYS)
+    semaphore = asyncio.Semaphore(NEWS_SUMMARY_CONCURRENCY)
+
+    local_task = asyncio.create_task(district_update(district)) if district else None
+    feeds = await asyncio.gather(*(fetch_feed(url) for url in AGRI_RSS_FEEDS))
+
+    picked = [item for entries in feeds for item in recent_entries(entries, cutoff)]
+    articles = await asyncio.gather(*(summarise_entry(entry, pub, semaphore) for entry, pub in picked))
+    articles = list(articles)
+
+    # Add local news if district provided
+    if local_task:
+        articles.insert(0, await local_task)
+
+    return {"articles": articles}
@@ -0,0 +1,243 @@
+# ✅ backend/price_alerts.py
+# Server-side price alerts. Alerts live in SQLite and in an in-memory index
+# keyed by (commodity, market) with thresholds kept sorted per direction, so
+# a mandi refresh only looks at the (commodity, market) pairs whose latest
+# price changed and bisects straight to the alerts that fire. Triggered
+# alerts are pushed to the owner's SSE stream. With several workers each one
+# keeps its own index, reconciles it with the table before evaluating (alerts
+# added, deleted or triggered elsewhere), and only the worker whose UPDATE
+# marks an alert triggered pushes it.
+import os
+import time
+import uuid
+import bisect
+import sqlite3
+import asyncio
+import threading
+
+PRICE_ALERTS_PATH = os.getenv("PRICE_ALERTS_PATH", os.path.join(os.path.dirname(__file__), "data", "price_alerts.sqlite3"))
+DIRECTIONS = ("above", "below")
+ANY_MARKET = "*"
+
+
+def norm(value):
+    return (value or "").strip().lower()
+
+
+class PriceAlertEngine:
+    def __init__(self, path=PRICE_ALERTS_PATH):
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS price_alerts ("
+            "id TEXT PRIMARY KEY, client_id TEXT NOT NULL, commodity TEXT NOT NULL, market TEXT, "
+            "threshold REAL NOT NULL, direction TEXT NOT NULL, created_at REAL NOT NULL, "
+            "triggered_at REAL, triggered_price REAL, triggered_market TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_price_alerts_client ON price_alerts (client_id)")
+        self._conn.commit()
+
+        self.alerts = {}
+        # (commodity, market) -> {"above": [(threshold, id)], "below": [(threshold, id)]}
+        self.index = {}
+        self.latest = {}
+        self.subscribers = {}
+        self._loop = None
+        self.evaluations = 0
+        self.triggered = 0
+        self.sync()
+
+    @staticmethod
+    def _row_to_alert(row):
+        keys = ["id", "client_id", "commodity", "market", "threshold", "direction", "created_at",
+                "triggered_at", "triggered_price", "triggered_market"]
+        return dict(zip(keys, row))
+
+    def sync(self):
+        # Reconcile the index with the untriggered alerts in the table, which
+        # other workers may have added to, deleted from or triggered
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM price_alerts WHERE triggered_at IS NULL").fetchall()
+            active = {row[0]: row for row in rows}
+            stale = [alert for alert_id, alert in self.alerts.items() if alert_id not in active]
+            for alert in stale:
+                self._index_remove(alert)
+            added = [row for alert_id, row in active.items() if alert_id not in self.alerts]
+            for row in added:
+                self._index_add(self._row_to_alert(row))
+        return len(added) + len(stale)
+
+    def _index_key(self, alert):
+        return norm(alert["commodity"]), norm(alert["market"]) or ANY_MARKET
+
+    def _index_add(self, alert):
+        self.alerts[alert["id"]] = alert
+        bucket = self.index.setdefault(self._index_key(alert), {"above": [], "below": []})
+        bisect.insort(bucket[alert["direction"]], (alert["threshold"], alert["id"]))
+
+    def _index_remove(self, alert):
+        bucket = self.index.get(self._index_key(alert))
+        if bucket:
+            entries = bucket[alert["direction"]]
+            i = bisect.bisect_left(entries, (alert["threshold"], alert["id"]))
+            if i < len(entries) and entries[i][1] == alert["id"]:
+                entries.pop(i)
+            if not bucket["above"] and not bucket["below"]:
+                del self.index[self._index_key(alert)]
+        self.alerts.pop(alert["id"], None)
+
+    def add(self, client_id, commodity, threshold, direction="above", market=None):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}")
+        alert = {
+            "id": uuid.uuid4().hex,
+            "client_id": client_id,
+            "commodity": commodity.strip(),
+            "market": market.strip() if market else None,
+            "threshold": float(threshold),
+            "direction": direction,
+            "created_at": time.time(),
+            "triggered_at": None,
+            "triggered_price": None,
+            "triggered_market": None,
+        }
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO price_alerts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                tuple(alert.values()),
+            )
+            self._conn.commit()
+            self._index_add(alert)
+
+        # The price may already be past the threshold
+        for (commodity_key, market_key), (price, _) in self._latest_for(alert):
+            self.evaluate_pair(commodity_key, market_key, price)
+        return self.alerts.get(alert["id"]) or self.get(alert["id"])
+
+    def _latest_for(self, alert):
+        commodity_key, market_key = self._index_key(alert)
+        if market_key != ANY_MARKET:
+            pair = (commodity_key, market_key)
+            return [(pair, self.latest[pair])] if pair in self.latest else []
+        return [(pair, value) for pair, value in list(self.latest.items()) if pair[0] == commodity_key]
+
+    def get(self, alert_id):
+        row = self._conn.execute("SELECT * FROM price_alerts WHERE id = ?", (alert_id,)).fetchone()
+        return self._row_to_alert(row) if row else None
+
+    def triggered_since(self, client_id, since):
+        rows = self._conn.execute(
+            "SELECT * FROM price_alerts WHERE client_id = ? AND triggered_at > ? ORDER BY triggered_at",
+            (client_id, since),
+        ).fetchall()
+        return [self._row_to_alert(row) for row in rows]
+
+    def list(self, client_id, include_triggered=True):
+        query = "SELECT * FROM price_alerts WHERE client_id = ?"
+        if not include_triggered:
+            query += " AND triggered_at IS NULL"
+        rows = self._conn.execute(query + " ORDER BY created_at DESC", (client_id,)).fetchall()
+        return [self._row_to_alert(row) for row in rows]
+
+    def delete(self, alert_id, client_id):
+        # Only the owner can delete; anyone else gets the same answer as for a missing id
+        with self._lock:
+            alert = self.alerts.get(alert_id) or self.get(alert_id)
+            if not alert or alert["client_id"] != client_id:
+                return False
+            self._index_remove(alert)
+            self._conn.execute("DELETE FROM price_alerts WHERE id = ?", (alert_id,))
+            self._conn.commit()
+            return True
+
+    def evaluate_pair(self, commodity_key, market_key, price, market_name=None):
+        fired = []
+        for key in ((commodity_key, market_key), (commodity_key, ANY_MARKET)):
+            bucket = self.index.get(key)
+            if not bucket:
+                continue
+            # "above" fires for thresholds <= price, "below" for thresholds >= price
+            above = bucket["above"]
+            fired += [alert_id for _, alert_id in above[:bisect.bisect_right(above, (price, chr(0x10FFFF)))]]
+            below = bucket["below"]
+            fired += [alert_id for _, alert_id in below[bisect.bisect_left(below, (price, "")):]]
+        for alert_id in fired:
+            alert = self.alerts.get(alert_id)
+            if alert:
+                self._trigger(alert, price, market_name or market_key)
+        return len(fired)
+
+    def _trigger(self, alert, price, market):
+        now = time.time()
+        with self._lock:
+            self._index_remove(alert)
+            cur = self._conn.execute(
+                "UPDATE price_alerts SET triggered_at = ?, triggered_price = ?, triggered_market = ? "
+                "WHERE id = ? AND triggered_at IS NULL",
+                (now, price, market, alert["id"]),
+            )
+            self._conn.commit()
+        if cur.rowcount != 1:
+            return  # deleted, or another worker got there first
+        alert = {**alert, "triggered_at": now, "triggered_price": price, "triggered_market": market}
+        self.triggered += 1
+        for queue in tuple(self.subscribers.get(alert["client_id"], ())):
+            self._push(queue, alert)
+
+    def _push(self, queue, alert):
+        # Refreshes are evaluated on the mandi store's loader thread
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self._loop is None or running is self._loop:
+            queue.put_nowait(alert)
+        else:
+            self._loop.call_soon_threadsafe(queue.put_nowait, alert)
+
+    def on_mandi_update(self, df):
+        # df: the store frame, newest rows first. Only pairs whose latest
+        # price or date changed since the last refresh are evaluated.
+        if df is None or df.empty:
+            return 0
+        self.sync()
+        latest = df.dropna(subset=["modal_price"]).drop_duplicates(subset=["commodity", "market"], keep="first")
+        fired = 0
+        for commodity, market, price, day in zip(latest["commodity"], latest["market"], latest["modal_price"], latest["_date"]):
+            pair = (norm(commodity), norm(market))
+            value = (float(price), day)
+            if self.latest.get(pair) == value:
+                continue
+            self.latest[pair] = value
+            self.evaluations += 1
+            if pair in self.index or (pair[0], ANY_MARKET) in self.index:
+                fired += self.evaluate_pair(pair[0], pair[1], float(price), market)
+        return fired
+
+    def subscribe(self, client_id):
+        queue = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+        self.subscribers.setdefault(client_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, client_id, queue):
+        queues = self.subscribers.get(client_id)
+        if queues:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[client_id]
+
+    def stats(self):
+        return {
+            "active_alerts": len(self.alerts),
+            "indexed_pairs": len(self.index),
+            "tracked_prices": len(self.latest),
+            "pair_evaluations": self.evaluations,
+            "triggered": self.triggered,
+            "subscribers": sum(len(q) for q in self.subscribers.values()),
+        }
+
+
+price_alerts = PriceAlertEngine()
@@ -0,0 +1,146 @@
+# ✅ backend/price_forecast.py
+# Vectorized price-trend engine. Every (state, market, commodity) series in
+# the mandi table is fitted in one NumPy pass with closed-form least squares
+# (modal_price ~ days since the series' first arrival). The full-history fit
+# is refreshed by a mandi store listener on the loader thread; windowed fits
+# run in a worker thread on first use. Either way the cached fits are swapped
+# in with one assignment and never built on the event loop.
+import asyncio
+import numpy as np
+import pandas as pd
+
+GROUP_KEYS = ["state", "market", "commodity"]
+FORECAST_DAYS = 3
+
+
+def fit_trends(df, window=None, keys=GROUP_KEYS):
+    # df needs the group keys, a datetime "_date" column and numeric "modal_price".
+    # window: only fit each series on its last `window` days (rolling model).
+    columns = ["n", "slope", "intercept", "first_day", "last_day", "last_price", "district"]
+    df = df.dropna(subset=["_date", "modal_price", *keys])
+    if df.empty:
+        return pd.DataFrame(columns=columns, index=pd.MultiIndex.from_tuples([], names=keys))
+
+    codes, groups = pd.MultiIndex.from_frame(df[keys]).factorize()
+    groups = groups.set_names(keys)
+    days = df["_date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    prices = df["modal_price"].to_numpy(dtype=float)
+    size = len(groups)
+
+    first_rows = np.unique(codes, return_index=True)[1]
+    district = df["district"].to_numpy()[first_rows] if "district" in df else None
+
+    last_day = np.full(size, np.iinfo(np.int64).min)
+    np.maximum.at(last_day, codes, days)
+
+    if window:
+        keep = days > last_day[codes] - window
+        codes, days, prices = codes[keep], days[keep], prices[keep]
+
+    first_day = np.full(size, np.iinfo(np.int64).max)
+    np.minimum.at(first_day, codes, days)
+
+    x = (days - first_day[codes]).astype(float)
+    n = np.bincount(codes, minlength=size).astype(float)
+    sx = np.bincount(codes, x, minlength=size)
+    sy = np.bincount(codes, prices, minlength=size)
+    sxx = np.bincount(codes, x * x, minlength=size)
+    sxy = np.bincount(codes, x * prices, minlength=size)
+
+    denom = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(denom > 0, (n * sxy - sx * sy) / np.where(denom > 0, denom, 1), 0.0)
+        intercept = (sy - slope * sx) / n
+
+    # Mean price on each series' latest day
+    on_last = days == last_day[codes]
+    last_n = np.bincount(codes[on_last], minlength=size)
+    last_sum = np.bincount(codes[on_last], prices[on_last], minlength=size)
+    last_price = last_sum / np.maximum(last_n, 1)
+
+    return pd.DataFrame(
+        {
+            "n": n.astype(int),
+            "slope": slope,
+            "intercept": intercept,
+            "first_day": first_day,
+            "last_day": last_day,
+            "last_price": last_price,
+            "district": district,
+        },
+        index=groups,
+    )
+
+
+def project(coefs, days=FORECAST_DAYS):
+    # One matrix op: (series, 1) x (1, days) -> (series, days)
+    steps = np.arange(1, days + 1)
+    x_last = (coefs["last_day"] - coefs["first_day"]).to_numpy(dtype=float)
+    return coefs["intercept"].to_numpy()[:, None] + coefs["slope"].to_numpy()[:, None] * (x_last[:, None] + steps)
+
+
+def _day_to_str(day):
+    return str(np.datetime64(int(day), "D"))
+
+
+def forecast_rows(coefs, days=FORECAST_DAYS):
+    if coefs.empty:
+        return []
+    predicted = np.round(project(coefs, days), 2)
+    rows = []
+    for i, (key, row) in enumerate(coefs.iterrows()):
+        item = dict(zip(coefs.index.names, key))
+        item.update({
+            "district": row["district"],
+            "points": int(row["n"]),
+            "slope_per_day": round(float(row["slope"]), 4),
+            "last_date": _day_to_str(row["last_day"]),
+            "last_price": round(float(row["last_price"]), 2),
+            "prediction": [
+                {"arrival_date": _day_to_str(row["last_day"] + h + 1), "modal_price": float(predicted[i, h])}
+                for h in range(days)
+            ],
+        })
+        rows.append(item)
+    return rows
+
+
+class PriceForecaster:
+    def __init__(self, store):
+        self.store = store
+        # (frame they were fitted on, {window: coefficients})
+        self._fits = (None, {})
+
+    def on_mandi_update(self, df):
+        # Store listener: runs before the frame is published, off the event loop
+        self._fits = (df, {None: fit_trends(df)})
+
+    def fit(self, window=None):
+        # Blocking; requests go through coefficients()
+        df = self.store.df
+        fitted, fits = self._fits
+        if fitted is not df:
+            fits = {}
+        if window not in fits:
+            fits = {**fits, window: fit_trends(df, window=window)}
+            self._fits = (df, fits)
+        return fits[window]
+
+    async def coefficients(self, window=None):
+        fitted, fits = self._fits
+        if fitted is self.store.df and window in fits:
+            return fits[window]
+        return await asyncio.to_thread(self.fit, window)
+
+    def select(self, coefs, state=None, district=None, market=None, commodity=None):
+        mask = np.ones(len(coefs), dtype=bool)
+        for name, value in (("state", state), ("market", market), ("commodity", commodity)):
+            if value:
+                mask &= coefs.index.get_level_values(name) == value
+        if district:
+            mask &= coefs["district"].to_numpy() == district
+        return coefs[mask]
+
+    async def forecast(self, state=None, district=None, market=None, commodity=None, days=FORECAST_DAYS, window=None):
+        coefs = self.select(await self.coefficients(window), state, district, market, commodity)
+        return forecast_rows(coefs, days)
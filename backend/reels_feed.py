@@ -0,0 +1,214 @@
+# ✅ backend/reels_feed.py
+# Reels come from a local cache of YouTube search pages. A background job
+# pre-fetches the first pages for every supported language, /reels pages
+# through them with a cursor (YouTube's nextPageToken), and when the API
+# quota runs out we keep serving whatever we have. The quota block and the
+# refresh lock live in shared state, so only one worker spends quota.
+import os
+import json
+import time
+import asyncio
+import httpx
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from dotenv import load_dotenv
+
+from singleflight import flight_group
+from shared_state import shared_state
+from metrics import track_upstream
+
+load_dotenv()
+
+YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+YOUTUBE_SEARCH_URL = os.getenv("YOUTUBE_SEARCH_URL", "https://www.googleapis.com/youtube/v3/search")
+REELS_PAGE_SIZE = int(os.getenv("REELS_PAGE_SIZE", "10"))
+REELS_PREFETCH_PAGES = int(os.getenv("REELS_PREFETCH_PAGES", "2"))
+REELS_REFRESH_INTERVAL = float(os.getenv("REELS_REFRESH_INTERVAL", str(6 * 3600)))
+REELS_RELOAD_POLL = float(os.getenv("REELS_RELOAD_POLL", "300"))
+REELS_CACHE_PATH = os.getenv("REELS_CACHE_PATH", os.path.join(os.path.dirname(__file__), "cache", "reels.json"))
+
+REELS_QUERIES = {
+    "en": {"q": "agriculture farming", "relevanceLanguage": "en"},
+    "hi": {"q": "खेती किसान", "relevanceLanguage": "hi"},
+    "mr": {"q": "शेती शेतकरी", "relevanceLanguage": "mr"},
+}
+
+
+def next_quota_reset():
+    # YouTube Data API quotas reset at midnight Pacific time
+    now = datetime.now(ZoneInfo("America/Los_Angeles"))
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.timestamp()
+
+
+def parse_items(data):
+    reels = []
+    for item in data.get("items", []):
+        snippet = item.get("snippet", {})
+        video_id = item.get("id", {}).get("videoId")
+        if not video_id:
+            continue
+        reels.append({
+            "title": snippet.get("title"),
+            "description": snippet.get("description"),
+            "thumbnail": snippet.get("thumbnails", {}).get("high", {}).get("url"),
+            "videoId": video_id
+        })
+    return reels
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+class ReelsCache:
+    def __init__(self, path=REELS_CACHE_PATH):
+        self.path = path
+        # "<language>|<page token>" -> {"reels", "next_cursor", "fetched_at"}
+        self.pages = {}
+        self.loaded_mtime = None
+        self.api_calls = 0
+        self.last_error = None
+        self.load()
+
+    @staticmethod
+    def page_key(language, cursor):
+        return f"{language}|{cursor or ''}"
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime == self.loaded_mtime:
+                return
+            with open(self.path, encoding="utf-8") as f:
+                self.pages = json.load(f)
+            self.loaded_mtime = mtime
+        except (OSError, ValueError) as e:
+            print("⚠️ Reels cache load failed:", e)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.pages, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self.loaded_mtime = os.path.getmtime(self.path)
+
+    @property
+    def quota_blocked_until(self):
+        return float(shared_state.get("reels:quota_blocked_until") or 0)
+
+    @quota_blocked_until.setter
+    def quota_blocked_until(self, value):
+        shared_state.set("reels:quota_blocked_until", value, ttl=max(value - time.time(), 1))
+
+    @property
+    def quota_blocked(self):
+        return time.time() < self.quota_blocked_until
+
+    async def search(self, language, cursor=None):
+        if self.quota_blocked:
+            raise QuotaExceeded()
+        params = {
+            "part": "snippet",
+            "type": "video",
+            "videoDuration": "short",
+            "regionCode": "IN",
+            "maxResults": REELS_PAGE_SIZE,
+            "key": YOUTUBE_API_KEY,
+            **REELS_QUERIES[language],
+        }
+        if cursor:
+            params["pageToken"] = cursor
+
+        self.api_calls += 1
+        async with httpx.AsyncClient(timeout=httpx.Timeout(15, connect=5)) as client:
+            with track_upstream("youtube", language) as call:
+                res = await client.get(YOUTUBE_SEARCH_URL, params=params)
+                call["outcome"] = str(res.status_code)
+        if res.status_code == 403 and "quota" in res.text.lower():
+            self.quota_blocked_until = next_quota_reset()
+            raise QuotaExceeded()
+        res.raise_for_status()
+        data = res.json()
+
+        page = {"reels": parse_items(data), "next_cursor": data.get("nextPageToken"), "fetched_at": time.time()}
+        self.pages[self.page_key(language, cursor)] = page
+        return page
+
+    async def fetch_page(self, language, cursor=None):
+        return await flight_group("youtube").do(self.page_key(language, cursor), self.search, language, cursor)
+
+    async def get_page(self, language="en", cursor=None):
+        if language not in REELS_QUERIES:
+            language = "en"
+        page = self.pages.get(self.page_key(language, cursor))
+        if page:
+            stale = time.time() - page["fetched_at"] > REELS_REFRESH_INTERVAL * 2
+            return {**page, "language": language, "stale": stale}
+
+        # Deeper than the prefetched pages: fetch on demand if quota allows
+        try:
+            page = await self.fetch_page(language, cursor)
+            self.save()
+            return {**page, "language": language, "stale": False}
+        except Exception as e:
+            if not isinstance(e, QuotaExceeded):
+                print("⚠️ Reels fetch failed:", language, e)
+            return {"reels": [], "next_cursor": None, "fetched_at": None, "language": language, "stale": True}
+
+    def prune(self, language, older_than):
+        # Page tokens rotate between refreshes; drop pages nobody can reach any more
+        for key in [k for k, p in self.pages.items() if k.startswith(f"{language}|") and p["fetched_at"] < older_than]:
+            del self.pages[key]
+
+    async def refresh(self):
+        for language in REELS_QUERIES:
+            cursor = None
+            started = time.time()
+            try:
+                for _ in range(REELS_PREFETCH_PAGES):
+                    page = await self.fetch_page(language, cursor)
+                    cursor = page["next_cursor"]
+                    if not cursor:
+                        break
+                self.prune(language, started - REELS_REFRESH_INTERVAL)
+                self.last_error = None
+            except QuotaExceeded:
+                self.last_error = "quota exceeded"
+                break
+            except Exception as e:
+                self.last_error = str(e)
+                print("⚠️ Reels refresh failed:", language, e)
+        self.save()
+
+    async def run_refresh_loop(self, interval=REELS_REFRESH_INTERVAL, poll=REELS_RELOAD_POLL):
+        while True:
+            # Pick up pages another worker saved
+            self.load()
+            # After a restart, don't spend quota on pages that are still fresh
+            age = time.time() - min((p["fetched_at"] for p in self.pages.values()), default=0)
+            if age < interval:
+                # Wake when the oldest page goes stale
+                await asyncio.sleep(max(min(interval - age, poll), 1))
+                continue
+            # Stale pages: refresh them if no other worker is, then check back after a poll
+            # either way (another worker's refresh, or the quota block, will take a while)
+            if shared_state.acquire("lock:reels-refresh", ttl=interval):
+                await self.refresh()
+            await asyncio.sleep(max(poll, 1))
+
+    def status(self):
+        return {
+            "pages": len(self.pages),
+            "api_calls": self.api_calls,
+            "quota_blocked": self.quota_blocked,
+            "last_error": self.last_error,
+        }
+
+
+reels_cache = ReelsCache()
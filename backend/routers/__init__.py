@@ -0,0 +1,4 @@
+# ✅ backend/routers/
+# One APIRouter per feature. Routers import only light modules at load time;
+# heavy dependencies (pandas, pyarrow, inference_sdk, feedparser) are imported
+# inside the handlers, and main.py warms them in the background after startup.
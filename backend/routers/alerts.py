@@ -0,0 +1,102 @@
+# ✅ backend/routers/alerts.py
+# Price alerts: evaluated server-side on every mandi refresh, pushed over SSE.
+import os
+import math
+import time
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import JSONResponse
+
+from price_alerts import price_alerts, DIRECTIONS
+from sse import format_sse, sse_response
+
+router = APIRouter()
+
+PRICE_ALERT_KEEPALIVE = float(os.getenv("PRICE_ALERT_KEEPALIVE", "25"))
+
+def parse_target(value):
+    # A positive, finite price (number or numeric string); None otherwise
+    if isinstance(value, bool):
+        return None
+    try:
+        target = float(value)
+    except (TypeError, ValueError):
+        return None
+    return target if math.isfinite(target) and target > 0 else None
+
+
+@router.post("/price-alerts")
+async def create_price_alert(request: Request):
+    try:
+        body = await request.json()
+        client_id = body.get("client_id")
+        commodity = body.get("commodity")
+        target = body.get("target", body.get("threshold"))
+        direction = body.get("direction", "above")
+        market = body.get("market")
+
+        if not client_id or not commodity or target is None:
+            return JSONResponse(status_code=400, content={"error": "client_id, commodity and target are required"})
+        if not isinstance(commodity, str) or (market is not None and not isinstance(market, str)):
+            return JSONResponse(status_code=400, content={"error": "commodity and market must be strings"})
+        if direction not in DIRECTIONS:
+            return JSONResponse(status_code=400, content={"error": f"direction must be one of {list(DIRECTIONS)}"})
+        target = parse_target(target)
+        if target is None:
+            return JSONResponse(status_code=400, content={"error": "target must be a price greater than 0"})
+
+        alert = price_alerts.add(client_id, commodity, target, direction, market)
+        return {"alert": alert}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@router.get("/price-alerts")
+async def list_price_alerts(client_id: str, include_triggered: bool = True):
+    return {"alerts": price_alerts.list(client_id, include_triggered)}
+
+@router.delete("/price-alerts/{alert_id}")
+async def delete_price_alert(alert_id: str, client_id: str):
+    if not price_alerts.delete(alert_id, client_id):
+        return JSONResponse(status_code=404, content={"error": "Alert not found"})
+    return {"deleted": alert_id}
+
+def resume_point(last_event_id):
+    # Event ids are the alerts' triggered_at; a fresh stream replays every
+    # triggered alert the client hasn't deleted (acknowledged) yet
+    try:
+        return float(last_event_id) if last_event_id else 0.0
+    except ValueError:
+        return 0.0
+
+@router.get("/price-alerts/stream")
+async def price_alert_stream(client_id: str, last_event_id: Optional[str] = Header(None)):
+    queue = price_alerts.subscribe(client_id)
+
+    async def events():
+        sent = set()
+        since = resume_point(last_event_id)
+        try:
+            while True:
+                # Alerts that fired while the client was away, or on another worker
+                checked = time.time()
+                for alert in price_alerts.triggered_since(client_id, since):
+                    if alert["id"] not in sent:
+                        sent.add(alert["id"])
+                        yield format_sse(alert, event="alert", event_id=repr(alert["triggered_at"]))
+                since = max(since, checked - 1)
+                try:
+                    alert = await asyncio.wait_for(queue.get(), timeout=PRICE_ALERT_KEEPALIVE)
+                    if alert["id"] not in sent:
+                        sent.add(alert["id"])
+                        yield format_sse(alert, event="alert", event_id=repr(alert["triggered_at"]))
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            price_alerts.unsubscribe(client_id, queue)
+
+    return sse_response(events())
+
+@router.get("/price-alerts/status")
+async def price_alert_status():
+    return price_alerts.stats()
@@ -0,0 +1,185 @@
+# ✅ backend/routers/diagnose.py
+import os
+import asyncio
+import hashlib
+import traceback
+from typing import List, Optional
+from fastapi import APIRouter, File, UploadFile, Form
+from fastapi.responses import JSONResponse
+
+from llm_client import chat_completion
+from translation import translate
+from admission import UpstreamUnavailable, unavailable_response
+
+router = APIRouter()
+
+DIAGNOSE_BATCH_MAX_IMAGES = int(os.getenv("DIAGNOSE_BATCH_MAX_IMAGES", "50"))
+DIAGNOSE_BATCH_CONCURRENCY = int(os.getenv("DIAGNOSE_BATCH_CONCURRENCY", "4"))
+REMEDY_UNAVAILABLE = "Remedy advice is unavailable right now. Please try again in a few minutes."
+
+
+def remedy_prompt(crop_disease):
+    # ✅ Prompt with table format
+    return (
+       f"You are an expert crop advisor. A farmer's crop has this disease: {crop_disease}.\n\n"
+       "- Give a detailed remedy including:\n"
+       "  1. Specific chemical/pesticide names (e.g., Mancozeb, Copper Oxychloride)\n"
+       "  2. Quantity to use and frequency (e.g., weekly for 2 weeks)\n"
+       "  3. Brand name examples (e.g., Indofil M-45)\n"
+       "  4. Estimated cost range in INR (per acre)\n"
+       "- Also include: Watering advice, recovery time, and prevention tips\n\n"
+       "Use simple farmer-friendly language. Present data in bullet points or tables if useful."
+    )
+
+
+async def generate_remedy(crop_disease):
+    return await chat_completion(
+        remedy_prompt(crop_disease),
+        model="anthropic/claude-3-haiku",
+        temperature=0.7,
+        max_tokens=1200,
+        title="AgriSaarthi-Diagnosis",
+        cache=True
+    )
+
+
+async def diagnosis_text(crop_disease, language):
+    # (text, degraded): while OpenRouter is unavailable the diagnosis still goes out, without remedy or translation
+    try:
+        remedy = await generate_remedy(crop_disease)
+    except UpstreamUnavailable as e:
+        print("⚠️ Remedy skipped:", e)
+        return f"Diagnosis: {crop_disease}\n\nRemedy:\n{REMEDY_UNAVAILABLE}", True
+    text = f"Diagnosis: {crop_disease}\n\nRemedy:\n{remedy}"
+    # ✅ Translate diagnosis + remedy if needed; paragraphs seen before come from the translation memory
+    if language in ["hi", "mr"]:
+        try:
+            return await translate(text, language), False
+        except UpstreamUnavailable as e:
+            print("⚠️ Translation skipped:", e)
+            return text, True
+    return text, False
+
+
+@router.post("/diagnose")
+async def diagnose_crop(
+    image: UploadFile = File(...),
+    symptoms: Optional[str] = Form(None),
+    language: Optional[str] = Form("en"),
+    crop: Optional[str] = Form("tomato")
+):
+    # numpy/PIL/inference_sdk are only loaded once a photo actually arrives
+    from diagnosis import classify_image, project_versions
+
+    try:
+        if crop.lower() not in project_versions:
+            return JSONResponse(status_code=400, content={"error": f"No model available for crop: {crop}"})
+
+        # ✅ Image stays in memory; near-duplicate photos are answered from cache
+        data = await image.read()
+        prediction = await classify_image(crop, data)
+
+        crop_disease = prediction["class"]
+        confidence = prediction["confidence"]
+
+        if not crop_disease:
+            return {
+                "diagnosis": "Diagnosis: Could not detect disease.",
+                "confidence": None,
+                "language": language,
+                "symptoms": symptoms
+            }
+
+        text, degraded = await diagnosis_text(crop_disease, language)
+
+        return {
+            "diagnosis": text,
+            "confidence": confidence,
+            "language": language,
+            "symptoms": symptoms,
+            "degraded": degraded
+        }
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(status_code=500, content={"error": f"Diagnosis failed: {str(e)}"})
+
+
+@router.post("/diagnose/batch")
+async def diagnose_batch(
+    images: List[UploadFile] = File(...),
+    language: Optional[str] = Form("en"),
+    crop: Optional[str] = Form("tomato")
+):
+    # Field survey: classify every photo, then one remedy per distinct disease
+    from diagnosis import classify_image, project_versions
+
+    try:
+        if crop.lower() not in project_versions:
+            return JSONResponse(status_code=400, content={"error": f"No model available for crop: {crop}"})
+        if len(images) > DIAGNOSE_BATCH_MAX_IMAGES:
+            return JSONResponse(status_code=400, content={"error": f"At most {DIAGNOSE_BATCH_MAX_IMAGES} images per batch"})
+
+        # ✅ Identical uploads are classified once
+        uploads = [await image.read() for image in images]
+        digests = [hashlib.sha1(data).hexdigest() for data in uploads]
+        unique = dict(zip(digests, uploads))
+        semaphore = asyncio.Semaphore(DIAGNOSE_BATCH_CONCURRENCY)
+
+        async def classify(data):
+            async with semaphore:
+                try:
+                    return await classify_image(crop, data)
+                except Exception as e:
+                    print("⚠️ Batch diagnosis image failed:", e)
+                    return {"error": str(e)}
+
+        predictions = dict(zip(unique, await asyncio.gather(*(classify(data) for data in unique.values()))))
+
+        results = []
+        diseases = {}
+        for index, (image, digest) in enumerate(zip(images, digests)):
+            prediction = predictions[digest]
+            results.append({"index": index, "filename": image.filename, **prediction})
+            if prediction.get("class"):
+                diseases.setdefault(prediction["class"], []).append(prediction["confidence"] or 0.0)
+
+        # ✅ One remedy (and translation) per disease, not per image
+        texts = await asyncio.gather(*(diagnosis_text(d, language) for d in diseases))
+        remedies = {d: text for d, (text, _) in zip(diseases, texts)}
+
+        diagnosed = sum(len(confidences) for confidences in diseases.values())
+        failed = sum(1 for r in results if "error" in r)
+        summary = {
+            "images": len(results),
+            "diagnosed": diagnosed,
+            "undetected": len(results) - diagnosed - failed,
+            "failed": failed,
+            "diseases": sorted(
+                (
+                    {
+                        "class": crop_disease,
+                        "count": len(confidences),
+                        "share": round(len(confidences) / len(results), 4),
+                        "mean_confidence": round(sum(confidences) / len(confidences), 4),
+                    }
+                    for crop_disease, confidences in diseases.items()
+                ),
+                key=lambda d: -d["count"],
+            ),
+        }
+
+        return {
+            "crop": crop.lower(),
+            "language": language,
+            "images": results,
+            "summary": summary,
+            "remedies": remedies,
+            "degraded": any(degraded for _, degraded in texts),
+        }
+
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(status_code=500, content={"error": f"Batch diagnosis failed: {str(e)}"})
@@ -0,0 +1,171 @@
+# ✅ backend/routers/farm_calendar.py
+# Crop calendars from the local template engine (crop_calendar.py); the LLM is
+# only asked for unknown crops' durations, translations and the streamed plan.
+import re
+import traceback
+from datetime import date
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from llm_client import chat_completion, chat_completion_stream
+from sse import format_sse, json_body, sse_response
+from admission import UpstreamUnavailable
+from crop_calendar import find_template, parse_sowing_date, parse_farm_size, parse_duration, season_days, generate_schedule, calendar_text, localise_schedule, enrichment_tips
+
+router = APIRouter()
+
+
+def calendar_language(language):
+    return 'Marathi' if language == 'mr' else 'Hindi' if language == 'hi' else 'English'
+
+async def predict_total_days(crop, sowingDate, soilType, farmSize, location):
+    # Step 1: Predict total duration
+    duration_prompt = (
+        f"You are an agricultural AI expert. The crop is '{crop}', grown on {farmSize} acre(s) of {soilType} soil in {location}, "
+        f"sowing date is {sowingDate}. Predict total days from sowing to harvest for this crop. Reply only with a number like '95'."
+    )
+
+    try:
+        duration_text = (await chat_completion(
+            duration_prompt,
+            model="anthropic/claude-3-haiku",
+            temperature=0.4,
+            cache=True
+        )).strip()
+        return season_days(parse_duration(duration_text) or 100)
+    except Exception as e:
+        print("⚠️ Claude Duration Error:", e)
+        traceback.print_exc()
+        return 100  # fallback
+
+def calendar_schedule_prompt(crop, sowingDate, soilType, farmSize, location, language, total_days):
+    return (
+        f"You are an agricultural assistant helping a farmer generate a detailed {total_days}-day calendar for crop '{crop}'. "
+        f"The sowing date is {sowingDate}, soil type is {soilType}, farm size is {farmSize} acres, and location is {location}. "
+        f"Create a day-wise farming activity schedule (watering, fertilizing, pesticide, growth stages, harvesting, etc). "
+        f"Start from {sowingDate} for about {total_days} days. Use simple language in {calendar_language(language)}. "
+        f"Start each line with a date like 'July 21, 2025: [activity]', no bullets."
+    )
+
+CALENDAR_LINE = re.compile(r"^\s*(\w+\s\d{1,2},\s\d{4}):\s*(.+)$")
+
+def calendar_inputs(body):
+    return (
+        body.get("crop"),
+        body.get("sowingDate"),
+        body.get("soilType"),
+        body.get("farmSize"),
+        body.get("location"),
+        body.get("language", "en"),
+    )
+
+def invalid_calendar_input(sowingDate, farmSize):
+    # Returns an error message, or None when the date and farm size parse
+    try:
+        parse_sowing_date(sowingDate)
+        parse_farm_size(farmSize)
+    except ValueError as e:
+        return str(e)
+    return None
+
+async def calendar_total_days(crop, sowingDate, soilType, farmSize, location):
+    # Known crops use the local template; only unknown ones ask the LLM
+    _, template = find_template(crop)
+    if template:
+        return template["duration"]
+    return await predict_total_days(crop, sowingDate, soilType, farmSize, location)
+
+@router.post("/generate-calendar")
+async def generate_calendar(request: Request):
+    try:
+        body = await json_body(request)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "Invalid JSON body."})
+    try:
+        crop, sowingDate, soilType, farmSize, location, language = calendar_inputs(body)
+
+        if not all([crop, sowingDate, soilType, farmSize, location]):
+            return JSONResponse(status_code=400, content={"error": "Missing inputs."})
+
+        error = invalid_calendar_input(sowingDate, farmSize)
+        if error:
+            return JSONResponse(status_code=400, content={"error": error})
+
+        # ✅ Structured schedule from the local template engine (no network for known crops)
+        total_days = await calendar_total_days(crop, sowingDate, soilType, farmSize, location)
+        schedule = generate_schedule(crop, sowingDate, soilType, farmSize, total_days=total_days)
+
+        # Optional LLM work, cached per (crop, soil, language)
+        if language in ["hi", "mr"]:
+            schedule = await localise_schedule(schedule, language)
+        if body.get("enrich"):
+            schedule["tips"] = await enrichment_tips(crop, soilType, language)
+
+        return {"calendar": calendar_text(schedule), "schedule": schedule}
+
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(status_code=500, content={"error": f"Calendar generation failed: {str(e)}"})
+
+# ✅ Calendar streaming (SSE): one "entry" event per parsed 'date: activity' line
+@router.post("/generate-calendar/stream")
+async def generate_calendar_stream(request: Request):
+    try:
+        body = await json_body(request)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "Invalid JSON body."})
+    crop, sowingDate, soilType, farmSize, location, language = calendar_inputs(body)
+    # Checked before the stream starts, so the template fallback can't fail on them
+    error = invalid_calendar_input(sowingDate, farmSize) if sowingDate and farmSize else None
+    if error:
+        return JSONResponse(status_code=400, content={"error": error})
+
+    async def events():
+        if not all([crop, sowingDate, soilType, farmSize, location]):
+            yield format_sse({"error": "Missing inputs."}, event="error")
+            return
+        count = 0
+        total_days = None
+        try:
+            # Flush headers straight away; unknown crops need an LLM round trip for the duration
+            yield format_sse({"status": "started"}, event="meta")
+            total_days = await calendar_total_days(crop, sowingDate, soilType, farmSize, location)
+            yield format_sse({"total_days": total_days}, event="meta")
+
+            prompt = calendar_schedule_prompt(crop, sowingDate, soilType, farmSize, location, language, total_days)
+            buffer = ""
+            count = 0
+            async for token in chat_completion_stream(prompt, model="anthropic/claude-3-haiku", temperature=0.7):
+                buffer += token
+                *lines, buffer = buffer.split("\n")
+                for line in lines:
+                    match = CALENDAR_LINE.match(line)
+                    if match:
+                        count += 1
+                        yield format_sse({"date": match.group(1), "activity": match.group(2).strip()}, event="entry")
+            match = CALENDAR_LINE.match(buffer)
+            if match:
+                count += 1
+                yield format_sse({"date": match.group(1), "activity": match.group(2).strip()}, event="entry")
+            yield format_sse({"entries": count}, event="done")
+        except UpstreamUnavailable as e:
+            if count:
+                yield format_sse({"error": f"Calendar generation failed: {str(e)}"}, event="error")
+                return
+            # The LLM is unavailable: stream the local template schedule instead
+            print("⚠️ Streaming the template calendar:", e)
+            try:
+                schedule = generate_schedule(crop, sowingDate, soilType, farmSize, total_days=total_days)
+            except Exception as e:
+                traceback.print_exc()
+                yield format_sse({"error": f"Calendar generation failed: {str(e)}"}, event="error")
+                return
+            for event in schedule["events"]:
+                day = date.fromisoformat(event["date"])
+                yield format_sse({"date": f"{day:%B} {day.day}, {day.year}", "activity": event["activity"]}, event="entry")
+            yield format_sse({"entries": len(schedule["events"]), "degraded": True}, event="done")
+        except Exception as e:
+            traceback.print_exc()
+            yield format_sse({"error": f"Calendar generation failed: {str(e)}"}, event="error")
+
+    return sse_response(events())
@@ -0,0 +1,60 @@
+# ✅ backend/routers/fertilizer.py
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from llm_client import chat_completion
+from translation import translate
+from admission import UpstreamUnavailable, unavailable_response
+
+router = APIRouter()
+
+
+@router.post("/fertilizer-advice")
+async def fertilizer_advice(request: Request):
+    try:
+        body = await request.json()
+        crop = body.get("crop")
+        soil_ph = body.get("soil_ph")
+        crop_age = body.get("crop_age")
+        weather = body.get("weather")
+        language = body.get("language", "en")
+
+        if not crop or not soil_ph or not weather:
+            return {"error": "Missing inputs."}
+
+        # Prompt for English
+        prompt = (
+            f"Suggest best fertilizer for a {crop} crop with soil pH {soil_ph} "
+            f"and current weather condition '{weather}'. Crop age: {crop_age} months. "
+            "List fertilizer name, quantity recommendation per acre, brand options and tips."
+        )
+
+        # 🔥 First get response in English
+        english_output = await chat_completion(
+            prompt,
+            model="meta-llama/llama-3-8b-instruct",
+            temperature=0.7,
+            cache=True
+        )
+
+        # 🔥 If selected language is not English, translate (segment by segment, see translation.py)
+        translated_output = english_output
+        degraded = False
+        if language in ["hi", "mr"]:
+            try:
+                translated_output = await translate(english_output, language)
+            except UpstreamUnavailable as e:
+                print("⚠️ Translation skipped:", e)
+                degraded = True
+
+        # ✅ Now return both translated output + english backup
+        return {
+            "ai_advice": translated_output,  # Hindi/Marathi if needed
+            "english_version": english_output,  # Always English
+            "degraded": degraded
+        }
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
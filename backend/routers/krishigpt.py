@@ -0,0 +1,168 @@
+# ✅ backend/routers/krishigpt.py
+# Stand-alone questions are first looked up in the semantic answer cache
+# (knowledge_index.py); otherwise the closest knowledge base passages are
+# added to the prompt. Follow-ups may send the recent conversation as
+# "history": [{"role": "user" | "assistant", "content": ...}], bounded by
+# llm_client.bounded_history; they are never answered from the cache.
+# While OpenRouter is unavailable (admission.py) the closest passages are
+# returned as they are, marked "degraded".
+import os
+import asyncio
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from llm_client import bounded_history, chat_completion, chat_completion_stream
+from sse import format_sse, json_body, sse_response
+from admission import UpstreamUnavailable, unavailable_response
+
+router = APIRouter()
+
+KRISHIGPT_PASSAGES = int(os.getenv("KRISHIGPT_PASSAGES", "3"))
+FALLBACK_NOTE = "KrishiGPT cannot answer right now. Related advice from the AgriSaarthi knowledge base:"
+
+
+def krishigpt_prompt(query, language, passages=()):
+    notes = ""
+    if passages:
+        notes = (
+            "Reference notes (use them only where they are relevant, and do not mention them):\n"
+            + "\n".join(f"- {p['title']}: {p['text']}" for p in passages)
+            + "\n\n"
+        )
+    return (
+        f"You are a helpful agricultural expert. Answer the following question for a farmer "
+        f"in { 'Marathi' if language == 'mr' else 'Hindi' if language == 'hi' else 'English' }:\n\n"
+        f"{notes}"
+        f"{query.strip()}\n\n"
+        f"Answer only in { 'Marathi' if language == 'mr' else 'Hindi' if language == 'hi' else 'English' }."
+    )
+
+
+def retrieval_query(query, turns):
+    # A follow-up like "how much should I spray?" needs the previous question to retrieve anything
+    last_question = next((t["content"] for t in reversed(turns) if t["role"] == "user"), "")
+    return f"{last_question} {query}"
+
+
+async def prepare_messages(query, language, history):
+    # Returns (cached answer, None) or (None, messages for the LLM)
+    turns = bounded_history(history)
+    passages = []
+    try:
+        # numpy and the index load on the first question
+        from knowledge_index import knowledge_index
+        if not turns:
+            hit = await asyncio.to_thread(knowledge_index.lookup, query, language)
+            if hit:
+                return hit["answer"], None
+        passages = await asyncio.to_thread(knowledge_index.retrieve, retrieval_query(query, turns), language, KRISHIGPT_PASSAGES)
+        passages = [p for p in passages if p["text"] not in {t["content"] for t in turns}]
+    except Exception as e:
+        print("⚠️ KrishiGPT index unavailable:", e)
+    return None, turns + [{"role": "user", "content": krishigpt_prompt(query, language, passages)}]
+
+
+async def remember_answer(query, language, history, answer):
+    if bounded_history(history) or not answer.strip():
+        return
+    try:
+        from knowledge_index import knowledge_index
+        await asyncio.to_thread(knowledge_index.remember, query, language, answer.strip())
+    except Exception as e:
+        print("⚠️ KrishiGPT answer not stored:", e)
+
+
+async def fallback_answer(query, language, history):
+    # The closest knowledge base passages (in English), or None
+    try:
+        from knowledge_index import knowledge_index
+        query = retrieval_query(query, bounded_history(history))
+        passages = await asyncio.to_thread(knowledge_index.retrieve, query, language, KRISHIGPT_PASSAGES)
+    except Exception as e:
+        print("⚠️ KrishiGPT fallback unavailable:", e)
+        return None
+    if not passages:
+        return None
+    return FALLBACK_NOTE + "\n\n" + "\n\n".join(f"**{p['title']}**\n{p['text']}" for p in passages)
+
+
+@router.post("/krishigpt")
+async def krishigpt_chat(request: Request):
+    try:
+        body = await json_body(request)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"response": "Invalid JSON body."})
+    try:
+        query = body.get("query")
+        language = body.get("language", "en")
+        history = body.get("history")
+
+        if not query:
+            return {"response": "No query provided."}
+
+        cached, messages = await prepare_messages(query, language, history)
+        if cached is not None:
+            return {"response": cached, "cached": True}
+
+        reply = await chat_completion(
+            messages=messages,
+            model="anthropic/claude-3-haiku",
+            temperature=0.7,
+            title="AgriSaarthi-KrishiGPT"
+        )
+        await remember_answer(query, language, history, reply)
+
+        return {"response": reply.strip(), "cached": False}
+
+    except UpstreamUnavailable as e:
+        fallback = await fallback_answer(query, language, history)
+        if fallback:
+            return {"response": fallback, "cached": False, "degraded": True}
+        return unavailable_response(e, response=f"KrishiGPT failed: {str(e)}")
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"response": f"KrishiGPT failed: {str(e)}"})
+
+# ✅ KRISHIGPT streaming (SSE): "token" events as they arrive, then "done"
+@router.post("/krishigpt/stream")
+async def krishigpt_chat_stream(request: Request):
+    try:
+        body = await json_body(request)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"response": "Invalid JSON body."})
+    query = body.get("query")
+    language = body.get("language", "en")
+    history = body.get("history")
+
+    async def events():
+        if not query:
+            yield format_sse({"response": "No query provided."}, event="done")
+            return
+        try:
+            cached, messages = await prepare_messages(query, language, history)
+            if cached is not None:
+                yield format_sse({"token": cached}, event="token")
+                yield format_sse({"cached": True}, event="done")
+                return
+            tokens = []
+            async for token in chat_completion_stream(
+                messages=messages,
+                model="anthropic/claude-3-haiku",
+                temperature=0.7,
+                title="AgriSaarthi-KrishiGPT"
+            ):
+                tokens.append(token)
+                yield format_sse({"token": token}, event="token")
+            yield format_sse({"cached": False}, event="done")
+            await remember_answer(query, language, history, "".join(tokens))
+        except UpstreamUnavailable as e:
+            # Raised before the first token, so the fallback is the whole answer
+            fallback = await fallback_answer(query, language, history)
+            if fallback:
+                yield format_sse({"token": fallback}, event="token")
+                yield format_sse({"cached": False, "degraded": True}, event="done")
+            else:
+                yield format_sse({"response": f"KrishiGPT failed: {str(e)}", "retry_after": e.retry_after}, event="error")
+        except Exception as e:
+            yield format_sse({"response": f"KrishiGPT failed: {str(e)}"}, event="error")
+
+    return sse_response(events())
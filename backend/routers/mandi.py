@@ -0,0 +1,198 @@
+# ✅ backend/routers/mandi.py
+# Mandi rates, price trends and precomputed analytics. pandas/pyarrow come in
+# with mandi_store and price_forecast, which are imported on first use (or by
+# the startup warm-up).
+import os
+import sys
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+
+from admission import UpstreamUnavailable, unavailable_response
+
+router = APIRouter()
+
+MANDI_MAX_ROWS = int(os.getenv("MANDI_MAX_ROWS", "1000"))
+
+_forecaster = None
+
+
+def get_forecaster():
+    global _forecaster
+    if _forecaster is None:
+        from mandi_store import mandi_store
+        from price_forecast import PriceForecaster
+        _forecaster = PriceForecaster(mandi_store)
+    return _forecaster
+
+
+def get_analytics():
+    # Built off the loop by the store's listener (main.run_mandi_store), never
+    # in a request; None (-> 503) until it has run
+    module = sys.modules.get("mandi_analytics")
+    if module is None or not module.mandi_analytics.ready:
+        return None
+    return module.mandi_analytics
+
+
+# ✅ MANDI RATES endpoint
+@router.get("/mandi-rates")
+async def mandi_rates(
+    state: Optional[str] = None,
+    district: Optional[str] = None,
+    commodity: Optional[str] = None,
+    market: Optional[str] = None,
+    limit: int = Query(MANDI_MAX_ROWS, ge=1, le=10000)
+):
+    from mandi_store import mandi_store
+
+    try:
+        # ✅ Served from the background-refreshed store once it has loaded
+        if mandi_store.ready:
+            return {"records": mandi_store.query(state=state, district=district, market=market, commodity=commodity, limit=limit)}
+
+        from mandi_rates import fetch_mandi_data_shared
+        data = await fetch_mandi_data_shared(state=state, district=district, commodity=commodity)
+        if market:
+            data = [row for row in data if row.get("market") == market]
+        sorted_data = sorted(
+            data,
+            key=lambda x: datetime.strptime(x.get("arrival_date") or "01/01/1900", "%d/%m/%Y"),
+            reverse=True
+        )
+        return {"records": sorted_data[:limit]}
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@router.get("/mandi-rates/status")
+async def mandi_store_status():
+    from mandi_store import mandi_store
+    module = sys.modules.get("mandi_analytics")
+    analytics = module.mandi_analytics.status() if module else {"ready": False}
+    return {**mandi_store.status(), "analytics": analytics}
+
+# ✅ PRICE TREND PREDICTION endpoint
+@router.get("/predict-price-trend")
+async def predict_price_trend(state: str, market: str, commodity: str):
+    import pandas as pd
+    from mandi_store import mandi_store
+    from price_forecast import fit_trends, forecast_rows
+
+    try:
+        if mandi_store.ready:
+            df = mandi_store.query_frame(state=state, market=market, commodity=commodity)
+        else:
+            # Fetch mandi data
+            from mandi_rates import fetch_mandi_data_shared
+            data = await fetch_mandi_data_shared(state=state, commodity=commodity)
+            df = pd.DataFrame(data)
+
+            # Filter only for that mandi
+            df = df[df["market"] == market] if not df.empty else df
+
+        if df.empty:
+            return JSONResponse(status_code=400, content={"error": "No data available."})
+
+        if not pd.api.types.is_datetime64_any_dtype(df["arrival_date"]):
+            df["arrival_date"] = pd.to_datetime(df["arrival_date"], format="%d/%m/%Y", errors="coerce")
+        df["modal_price"] = pd.to_numeric(df["modal_price"], errors="coerce")
+        df = df.dropna(subset=["arrival_date", "modal_price"])
+
+        if df.empty:
+            return JSONResponse(status_code=400, content={"error": "Invalid data."})
+
+        # ✅ Coefficients come from the cached all-series fit when the store is loaded
+        if mandi_store.ready:
+            price_forecaster = get_forecaster()
+            coefs = price_forecaster.select(await price_forecaster.coefficients(), state=state, market=market, commodity=commodity)
+        else:
+            coefs = fit_trends(df.rename(columns={"arrival_date": "_date"}))
+        forecast = forecast_rows(coefs)
+
+        df = df.sort_values("arrival_date")
+        history = df[["arrival_date", "modal_price"]].tail(15)
+
+        return {
+            "history": history.to_dict(orient="records"),
+            "prediction": forecast[0]["prediction"] if forecast else []
+        }
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+# ✅ BATCH PRICE TREND endpoint (whole district / state dashboards)
+@router.get("/predict-price-trend/batch")
+async def predict_price_trend_batch(
+    state: Optional[str] = None,
+    district: Optional[str] = None,
+    market: Optional[str] = None,
+    commodity: Optional[str] = None,
+    days: int = Query(3, ge=1, le=30),
+    window: Optional[int] = Query(None, ge=2, le=365)
+):
+    from mandi_store import mandi_store
+
+    try:
+        if not mandi_store.ready:
+            return JSONResponse(status_code=503, content={"error": "Mandi data is still loading."})
+
+        forecasts = await get_forecaster().forecast(
+            state=state, district=district, market=market, commodity=commodity, days=days, window=window
+        )
+        return {"forecasts": forecasts, "count": len(forecasts)}
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+# ✅ MANDI ANALYTICS endpoints (precomputed when the store loads new rows, see mandi_analytics.py)
+@router.get("/mandi-analytics/rolling")
+async def mandi_rolling_stats(
+    market: str,
+    commodity: str,
+    state: Optional[str] = None,
+    history: int = Query(0, ge=0, le=365)
+):
+    try:
+        analytics = get_analytics()
+        if analytics is None:
+            return JSONResponse(status_code=503, content={"error": "Mandi data is still loading."})
+        series = analytics.rolling_stats(market, commodity, state=state, history=history)
+        return {"series": series, "count": len(series)}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@router.get("/mandi-analytics/spread")
+async def mandi_price_spread(district: str, state: Optional[str] = None, commodity: Optional[str] = None):
+    try:
+        analytics = get_analytics()
+        if analytics is None:
+            return JSONResponse(status_code=503, content={"error": "Mandi data is still loading."})
+        spreads = analytics.spread(district, state=state, commodity=commodity)
+        return {"spreads": spreads, "count": len(spreads)}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@router.get("/mandi-analytics/movers")
+async def mandi_top_movers(
+    state: Optional[str] = None,
+    commodity: Optional[str] = None,
+    date: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100)
+):
+    try:
+        analytics = get_analytics()
+        if analytics is None:
+            return JSONResponse(status_code=503, content={"error": "Mandi data is still loading."})
+        from mandi_analytics import parse_day
+        try:
+            day = parse_day(date) if date else None
+        except ValueError:
+            return JSONResponse(status_code=400, content={"error": "date must be YYYY-MM-DD"})
+        return analytics.top_movers(day=day, state=state, commodity=commodity, limit=limit)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
@@ -0,0 +1,12 @@
+# ✅ backend/routers/news.py
+from typing import Optional
+from fastapi import APIRouter
+
+from news_feed import get_news
+
+router = APIRouter()
+
+
+@router.get("/news")
+async def get_agriculture_news(district: Optional[str] = None):
+    return await get_news(district)
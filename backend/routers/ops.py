@@ -0,0 +1,43 @@
+# ✅ backend/routers/ops.py
+# Operational endpoints: Prometheus metrics, cache / coalescing stats and
+# admission control (rate limits, upstream circuit breakers).
+import sys
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from admission import admission_stats
+from llm_cache import completion_cache
+from metrics import render_metrics
+from singleflight import singleflight_stats
+from translation import translation_stats
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/llm-cache/stats")
+async def llm_cache_stats():
+    stats = completion_cache.stats()
+    stats["translation"] = translation_stats()
+    # Only report the diagnosis / answer caches once those modules have been loaded
+    diagnosis = sys.modules.get("diagnosis")
+    if diagnosis is not None:
+        stats["diagnosis"] = diagnosis.diagnosis_cache.stats()
+    knowledge_index = sys.modules.get("knowledge_index")
+    if knowledge_index is not None:
+        stats["krishigpt_answers"] = knowledge_index.knowledge_index.stats()
+    return stats
+
+
+@router.get("/singleflight/stats")
+async def get_singleflight_stats():
+    return singleflight_stats()
+
+
+@router.get("/admission/stats")
+async def get_admission_stats():
+    return admission_stats()
@@ -0,0 +1,23 @@
+# ✅ backend/routers/reels.py
+from typing import Optional
+from fastapi import APIRouter
+
+from reels_feed import reels_cache
+
+router = APIRouter()
+
+
+@router.get("/reels")
+async def get_reels(language: str = "en", cursor: Optional[str] = None):
+    # ✅ Served from the prefetched cache; only unseen pages hit YouTube
+    page = await reels_cache.get_page(language, cursor)
+    return {
+        "reels": page["reels"],
+        "next_cursor": page["next_cursor"],
+        "language": page["language"],
+        "stale": page["stale"]
+    }
+
+@router.get("/reels/status")
+async def get_reels_status():
+    return reels_cache.status()
@@ -0,0 +1,46 @@
+# ✅ backend/serve.py
+# Multi-process launcher: one uvicorn worker per CPU core by default.
+#   python serve.py                  # WEB_CONCURRENCY or every core
+#   python serve.py --workers 4 --port 8000
+# Workers share caches, locks and counters through shared_state.py
+# (SQLite WAL file by default, STATE_BACKEND=redis for Redis).
+# Behind a reverse proxy set FORWARDED_ALLOW_IPS to the proxy's addresses or
+# network (e.g. 10.0.0.0/8 on Render): X-Forwarded-For is only honoured from
+# those, and the per-client rate limits key on the address it resolves to.
+import os
+import argparse
+import uvicorn
+
+from shared_state import STATE_BACKEND, build_state
+
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1,::1")
+
+
+def default_workers():
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.getenv("WEB_CONCURRENCY"))
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the AgriSaarthi API with several worker processes.")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--forwarded-allow-ips", default=FORWARDED_ALLOW_IPS,
+                        help="comma-separated proxy IPs/networks trusted for X-Forwarded-For ('*' trusts any)")
+    args = parser.parse_args()
+
+    # Create the shared state store once, before the workers race to do it
+    build_state(STATE_BACKEND)
+    print(f"✅ Starting {args.workers} workers on {args.host}:{args.port} (state backend: {STATE_BACKEND})")
+
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers, proxy_headers=True,
+                forwarded_allow_ips=args.forwarded_allow_ips)
+
+
+if __name__ == "__main__":
+    main()
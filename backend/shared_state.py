@@ -0,0 +1,159 @@
+# ✅ backend/shared_state.py
+# State shared by every worker process: cache tiers, leader locks for the
+# background refresh jobs and counters (rate limits). SQLite in WAL mode is
+# the default and needs nothing but a local file; STATE_BACKEND=redis speaks
+# the Redis protocol instead, so a real Redis or any redis-py compatible
+# stand-in can be plugged in.
+import os
+import time
+import socket
+import sqlite3
+import threading
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite")
+STATE_PATH = os.getenv("STATE_PATH", os.path.join(os.path.dirname(__file__), "cache", "shared_state.sqlite3"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+STATE_PREFIX = os.getenv("STATE_PREFIX", "agrisaarthi:")
+# How often SQLite counters sweep out expired keys (each rate limit window is a new key)
+STATE_PURGE_INTERVAL = float(os.getenv("STATE_PURGE_INTERVAL", "60"))
+
+# Identifies this process when it holds a lock
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SQLiteState:
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Several processes write here; wait for the WAL writer lock instead of failing
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS state_expires_at ON state (expires_at)")
+        self._next_purge = 0.0
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)", (key, str(value), expires_at))
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def incr(self, key, amount=1, ttl=None):
+        # Fixed-window counter: the ttl is set when the key is (re)created.
+        # Windows past their ttl are deleted here, at most every STATE_PURGE_INTERVAL
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            if now >= self._next_purge:
+                self._next_purge = now + STATE_PURGE_INTERVAL
+                self._conn.execute("DELETE FROM state WHERE expires_at < ?", (now,))
+            row = self._conn.execute(
+                "INSERT INTO state (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "value = CASE WHEN state.expires_at < ? THEN excluded.value ELSE CAST(state.value AS INTEGER) + excluded.value END, "
+                "expires_at = CASE WHEN state.expires_at < ? THEN excluded.expires_at ELSE state.expires_at END "
+                "RETURNING value",
+                (key, amount, expires_at, now, now),
+            ).fetchone()
+        return int(row[0])
+
+    def acquire(self, key, owner=WORKER_ID, ttl=60):
+        # Takes the lock if it is free, expired or already ours (which renews it)
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO state (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE state.value = excluded.value OR state.expires_at < ?",
+                (key, owner, now + ttl, now),
+            )
+        return cur.rowcount == 1
+
+    def release(self, key, owner=WORKER_ID):
+        with self._lock:
+            self._conn.execute("DELETE FROM state WHERE key = ? AND value = ?", (key, owner))
+
+    def clear(self, prefix=""):
+        with self._lock:
+            self._conn.execute("DELETE FROM state WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM state WHERE expires_at < ?", (time.time(),))
+
+
+class RedisState:
+    # Needs only GET/SET/DEL/INCRBY/PEXPIRE/SCAN, so fakeredis or a tiny
+    # RESP server works in place of Redis for local runs.
+    def __init__(self, client=None, url=REDIS_URL, prefix=STATE_PREFIX):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("STATE_BACKEND=redis needs the redis package (pip install -r requirements-optional.txt)") from e
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key):
+        return self.prefix + key
+
+    @staticmethod
+    def _decode(value):
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def get(self, key):
+        return self._decode(self.client.get(self._key(key)))
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self._key(key), str(value), px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def incr(self, key, amount=1, ttl=None):
+        value = self.client.incrby(self._key(key), amount)
+        if ttl and value == amount:
+            self.client.pexpire(self._key(key), int(ttl * 1000))
+        return int(value)
+
+    def acquire(self, key, owner=WORKER_ID, ttl=60):
+        ms = int(ttl * 1000)
+        if self.client.set(self._key(key), owner, nx=True, px=ms):
+            return True
+        if self._decode(self.client.get(self._key(key))) == owner:
+            self.client.pexpire(self._key(key), ms)
+            return True
+        return False
+
+    def release(self, key, owner=WORKER_ID):
+        if self._decode(self.client.get(self._key(key))) == owner:
+            self.client.delete(self._key(key))
+
+    def clear(self, prefix=""):
+        for key in self.client.scan_iter(match=self._key(prefix) + "*"):
+            self.client.delete(key)
+
+    def purge_expired(self):
+        pass  # Redis expires keys itself
+
+
+def build_state(backend=STATE_BACKEND):
+    if backend == "redis":
+        return RedisState()
+    return SQLiteState()
+
+
+shared_state = build_state()
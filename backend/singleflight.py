@@ -0,0 +1,49 @@
+# ✅ backend/singleflight.py
+# Request coalescing: concurrent calls with the same key share one in-flight
+# upstream call instead of each making their own.
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+        self.calls = 0
+        self.executions = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller going away must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def in_flight(self):
+        return len(self._inflight)
+
+    def stats(self):
+        coalesced = self.calls - self.executions
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": coalesced,
+            "coalescing_ratio": round(coalesced / self.calls, 4) if self.calls else 0.0,
+            "in_flight": self.in_flight(),
+        }
+
+
+_groups = {}
+
+
+def flight_group(name):
+    if name not in _groups:
+        _groups[name] = SingleFlight(name)
+    return _groups[name]
+
+
+def singleflight_stats():
+    return {name: group.stats() for name, group in _groups.items()}
@@ -0,0 +1,32 @@
+# ✅ backend/sse.py
+# Helpers for server-sent-events responses.
+import json
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # stop nginx/render proxies buffering the stream
+}
+
+
+def format_sse(data, event=None, event_id=None):
+    # event_id comes back as Last-Event-ID when the browser reconnects
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+    lines = [f"event: {event}"] if event else []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines += [f"data: {line}" for line in payload.split("\n")]
+    return "\n".join(lines) + "\n\n"
+
+
+async def json_body(request):
+    # The POST body as a dict; ValueError for empty, malformed or non-object
+    # bodies, so a stream route can answer 400 before opening the stream
+    body = await request.json()
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object.")
+    return body
+
+
+def sse_response(events):
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
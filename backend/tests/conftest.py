@@ -0,0 +1,7 @@
+# ✅ backend/tests/conftest.py
+# Tests import the backend modules the way main.py does (flat, from backend/)
+#   cd backend && python -m pytest -q
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,220 @@
+# ✅ backend/tests/test_admission.py
+import time
+import types
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+import admission
+from admission import RateLimiter, UpstreamGuard, UpstreamUnavailable, admission_middleware, client_key
+from shared_state import SQLiteState
+
+
+# Token bucket
+
+def test_bucket_allows_the_burst_then_refills():
+    limiter = RateLimiter(rate=10, burst=3, max_clients=100)
+    assert [limiter.take("a") for _ in range(3)] == [0, 0, 0]
+    wait = limiter.take("a")
+    assert 0.05 < wait <= 0.1
+    # Other clients have their own bucket
+    assert limiter.take("b") == 0
+    time.sleep(0.12)
+    assert limiter.take("a") == 0
+    assert (limiter.allowed, limiter.limited) == (5, 1)
+
+
+def test_bucket_cost_and_cap():
+    limiter = RateLimiter(rate=1, burst=5, max_clients=100)
+    assert limiter.take("a", 5) == 0
+    assert limiter.take("a", 2) == pytest.approx(2, abs=0.05)
+    # A request dearer than the burst can never pass
+    assert RateLimiter(rate=0, burst=1).take("a", 2) == 60.0
+
+
+def test_bucket_forgets_the_least_recent_clients():
+    limiter = RateLimiter(rate=0.001, burst=1, max_clients=2)
+    limiter.take("a")
+    limiter.take("b")
+    limiter.take("a")
+    limiter.take("c")
+    assert list(limiter._buckets) == ["a", "c"]
+    # "b" starts over with a full bucket
+    assert limiter.take("b") == 0
+
+
+# Shared per-minute quota
+
+@pytest.fixture
+def quota(tmp_path, monkeypatch):
+    clock = {"now": 1_000_000 * 60 + 5.0}
+    monkeypatch.setattr(admission, "shared_state", SQLiteState(str(tmp_path / "state.sqlite3")))
+    monkeypatch.setattr(admission, "time", types.SimpleNamespace(time=lambda: clock["now"], monotonic=time.monotonic))
+    monkeypatch.setattr(admission, "RATE_LIMIT_PER_MINUTE", 10)
+    return clock
+
+
+def test_quota_window(quota):
+    exceeded = [asyncio.run(admission.shared_quota_exceeded("a", 2)) for _ in range(6)]
+    assert exceeded == [False] * 5 + [True]
+    assert not asyncio.run(admission.shared_quota_exceeded("b", 2))
+    # The next minute is a new window
+    quota["now"] += 60
+    assert not asyncio.run(admission.shared_quota_exceeded("a", 10))
+    assert asyncio.run(admission.shared_quota_exceeded("a", 1))
+
+
+# Circuit breaker
+
+def guard(**kwargs):
+    options = {"queue_timeout": 0.05, "failures": 2, "cooldown": 0.2, "slow_call": 5}
+    options.update(kwargs)
+    return UpstreamGuard("test", 2, **options)
+
+
+async def call(g, ok=True, seconds=0.0, raises=None, **kwargs):
+    async with g.guard(**kwargs) as outcome:
+        await asyncio.sleep(seconds)
+        if raises:
+            raise raises
+        outcome["ok"] = ok
+
+
+def test_breaker_opens_after_consecutive_failures():
+    g = guard()
+
+    async def main():
+        await call(g, ok=False)
+        await call(g)  # a success resets the count
+        await call(g, ok=False)
+        assert g.state == "closed"
+        with pytest.raises(RuntimeError):
+            await call(g, raises=RuntimeError("boom"))
+        assert g.state == "open"
+        with pytest.raises(UpstreamUnavailable) as e:
+            await call(g)
+        assert e.value.reason == "unavailable" and e.value.retry_after == 1
+
+    asyncio.run(main())
+    assert g.stats() | {"limit": 2} == {
+        "state": "open", "limit": 2, "in_flight": 0, "calls": 4, "failures": 3, "opens": 1,
+        "rejected_open": 1, "rejected_busy": 0,
+    }
+
+
+def test_half_open_admits_one_probe():
+    g = guard()
+
+    async def main():
+        for _ in range(2):
+            await call(g, ok=False)
+        await asyncio.sleep(0.25)
+        probe = asyncio.create_task(call(g, seconds=0.1))
+        await asyncio.sleep(0.02)
+        assert g.state == "half-open"
+        with pytest.raises(UpstreamUnavailable) as e:
+            await call(g)
+        assert e.value.reason == "recovering"
+        await probe
+        assert g.state == "closed"
+        await call(g)
+
+    asyncio.run(main())
+
+
+def test_failed_probe_reopens():
+    g = guard()
+
+    async def main():
+        for _ in range(2):
+            await call(g, ok=False)
+        await asyncio.sleep(0.25)
+        await call(g, ok=False)
+        assert g.state == "open"
+        with pytest.raises(UpstreamUnavailable):
+            await call(g)
+
+    asyncio.run(main())
+    assert g.opens == 2
+
+
+def test_slow_calls_count_as_failures():
+    g = guard(slow_call=0.05)
+
+    async def main():
+        await call(g, seconds=0.06)
+        await call(g, seconds=0.06, slow_call=None)  # streams opt out
+        assert g.consecutive_failures == 0
+        await call(g, seconds=0.06)
+        await call(g, seconds=0.06)
+        assert g.state == "open"
+
+    asyncio.run(main())
+
+
+def test_cancelled_call_is_neutral():
+    g = guard(failures=1)
+
+    async def main():
+        task = asyncio.create_task(call(g, seconds=1))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert g.state == "closed" and g.failures == 0 and g.in_flight == 0
+
+
+def test_full_guard_rejects_as_busy():
+    g = guard()
+
+    async def main():
+        holders = [asyncio.create_task(call(g, seconds=0.2)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(UpstreamUnavailable) as e:
+            await call(g)
+        assert e.value.reason == "busy"
+        await asyncio.gather(*holders)
+
+    asyncio.run(main())
+    assert g.rejected_busy == 1 and g.state == "closed"
+
+
+# Client address behind a proxy
+
+def proxied_app(trusted):
+    app = FastAPI()
+    app.middleware("http")(admission_middleware)
+
+    @app.get("/whoami")
+    async def whoami(request: Request):
+        return {"client": client_key(request)}
+
+    return ProxyHeadersMiddleware(app, trusted_hosts=trusted)
+
+
+async def whoami(app, forwarded_for, peer="10.1.2.3"):
+    transport = httpx.ASGITransport(app=app, client=(peer, 40000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        res = await client.get("/whoami", headers={"X-Forwarded-For": forwarded_for})
+        return res.status_code, res.json()
+
+
+def test_client_key_uses_the_trusted_hop(monkeypatch):
+    monkeypatch.setattr(admission, "rate_limiter", RateLimiter(rate=0.001, burst=admission.DEFAULT_COST))
+    app = proxied_app("10.0.0.0/8")
+    # The proxy appends the real peer; whatever the client wrote before it is ignored
+    assert asyncio.run(whoami(app, "6.6.6.6, 203.0.113.7")) == (200, {"client": "203.0.113.7"})
+    # Separate clients get separate buckets
+    assert asyncio.run(whoami(app, "198.51.100.9"))[0] == 200
+    assert asyncio.run(whoami(app, "198.51.100.9"))[0] == 429
+
+
+def test_untrusted_proxy_is_the_client(monkeypatch):
+    monkeypatch.setattr(admission, "rate_limiter", RateLimiter(rate=0.001, burst=5))
+    app = proxied_app("127.0.0.1")
+    assert asyncio.run(whoami(app, "203.0.113.7")) == (200, {"client": "10.1.2.3"})
@@ -0,0 +1,54 @@
+# ✅ backend/tests/test_cache_purge.py
+import asyncio
+import time
+
+import pytest
+
+import main
+from llm_cache import CompletionCache, LRUCache, SQLiteCache
+from shared_state import SQLiteState
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    state = SQLiteState(str(tmp_path / "state.sqlite3"))
+    tiers = {}
+    for name in ("completion_cache", "summary_cache", "translation_memory"):
+        tiers[name] = SQLiteCache(str(tmp_path / f"{name}.sqlite3"))
+        monkeypatch.setattr(main, name, CompletionCache(LRUCache(), tiers[name]))
+    monkeypatch.setattr(main, "shared_state", state)
+    for tier in tiers.values():
+        tier.set("old", "value", ttl=-1)
+        tier.set("fresh", "value")
+    state.set("old", "value", ttl=0.01)
+    state.set("fresh", "value")
+    time.sleep(0.05)
+    return state, tiers
+
+
+def stored(state, tiers):
+    keys = {name: sorted(row[0] for row in tier._conn.execute("SELECT key FROM completions")) for name, tier in tiers.items()}
+    keys["state"] = sorted(row[0] for row in state._conn.execute("SELECT key FROM state WHERE key NOT LIKE 'lock:%'"))
+    return keys
+
+
+def run_once(interval=60):
+    async def run():
+        task = asyncio.create_task(main.run_cache_purge(interval))
+        await asyncio.sleep(0.2)
+        task.cancel()
+    asyncio.run(run())
+
+
+def test_purge_loop_removes_expired_entries(caches):
+    state, tiers = caches
+    assert stored(state, tiers)["completion_cache"] == ["fresh", "old"]
+    run_once()
+    assert all(keys == ["fresh"] for keys in stored(state, tiers).values())
+
+
+def test_only_the_lock_holder_purges(caches):
+    state, tiers = caches
+    assert state.acquire("lock:cache-purge", owner="other-worker", ttl=60)
+    run_once()
+    assert all(keys == ["fresh", "old"] for keys in stored(state, tiers).values())
@@ -0,0 +1,105 @@
+# ✅ backend/tests/test_crop_calendar.py
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from admission import UpstreamUnavailable
+from crop_calendar import generate_schedule, parse_farm_size, parse_duration, MAX_SEASON_DAYS, MAX_IRRIGATION_EVENTS, MAX_SCOUTING_EVENTS
+from routers import farm_calendar
+
+BODY = {"crop": "Tomato", "sowingDate": "2026-06-01", "soilType": "Black", "farmSize": "2 acres", "location": "Pune"}
+
+
+@pytest.mark.parametrize("value, acres", [
+    (2, 2.0), ("2", 2.0), ("2.5 acres", 2.5), (" 3 Acre ", 3.0), ("1,200 acres", 1200.0),
+    ("1 hectare", 2.47105), ("2 ha", 4.9421), ("20 guntha", 0.5),
+])
+def test_parse_farm_size(value, acres):
+    assert parse_farm_size(value) == pytest.approx(acres)
+
+
+@pytest.mark.parametrize("value", ["", "a few acres", "0", "-", None])
+def test_parse_farm_size_rejects(value):
+    with pytest.raises(ValueError):
+        parse_farm_size(value)
+
+
+def test_schedule_scales_fertilizer_by_parsed_acres():
+    schedule = generate_schedule("Tomato", "2026-06-01", "Black", "2 acres")
+    dap = next(e for e in schedule["events"] if e["type"] == "fertilizer")
+    assert dap["quantity_kg"] == 100.0
+
+
+@pytest.mark.parametrize("text, days", [
+    ("95", 95), ("About 90-120 days", 120), ("90 to 120", 120), ("around 100 days (3-4 months)", 100), ("unknown", None),
+])
+def test_parse_duration(text, days):
+    assert parse_duration(text) == days
+
+
+def test_schedule_is_bounded():
+    schedule = generate_schedule("Dragonfruit", "2026-06-01", "Sandy", "2", total_days=90120)
+    assert schedule["total_days"] == MAX_SEASON_DAYS
+    kinds = [e["type"] for e in schedule["events"]]
+    assert kinds.count("irrigation") <= MAX_IRRIGATION_EVENTS
+    assert kinds.count("scouting") <= MAX_SCOUTING_EVENTS
+    assert generate_schedule("Dragonfruit", "2026-06-01", "Sandy", "2", total_days=3)["total_days"] == 30
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(farm_calendar.router)
+    return TestClient(app)
+
+
+def sse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if ": " in line)
+        if "data" in fields:
+            events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+@pytest.mark.parametrize("path", ["/generate-calendar", "/generate-calendar/stream"])
+@pytest.mark.parametrize("field, value", [("sowingDate", "next monday"), ("farmSize", "big")])
+def test_bad_inputs_are_400(client, path, field, value):
+    res = client.post(path, json={**BODY, field: value})
+    assert res.status_code == 400
+    assert "Unrecognised" in res.json()["error"]
+
+
+@pytest.mark.parametrize("path", ["/generate-calendar", "/generate-calendar/stream"])
+@pytest.mark.parametrize("body", [b"", b"{not json", b"[]"])
+def test_malformed_body_is_400(client, path, body):
+    res = client.post(path, content=body, headers={"Content-Type": "application/json"})
+    assert res.status_code == 400
+    assert res.json() == {"error": "Invalid JSON body."}
+
+
+def test_stream_falls_back_to_the_template(client, monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise UpstreamUnavailable("openrouter", "unavailable", 30)
+        yield
+
+    monkeypatch.setattr(farm_calendar, "chat_completion_stream", unavailable)
+    res = client.post("/generate-calendar/stream", json={**BODY, "sowingDate": "01/06/2026"})
+    events = sse_events(res.text)
+    entries = [data for event, data in events if event == "entry"]
+    assert entries[0]["date"] == "June 1, 2026"
+    assert events[-1] == ("done", {"entries": len(entries), "degraded": True})
+
+
+def test_unknown_crop_uses_the_upper_bound_of_a_range(client, monkeypatch):
+    async def reply(*args, **kwargs):
+        return "About 90-120 days"
+
+    monkeypatch.setattr(farm_calendar, "chat_completion", reply)
+    res = client.post("/generate-calendar", json={**BODY, "crop": "Dragonfruit"})
+    assert res.status_code == 200
+    schedule = res.json()["schedule"]
+    assert schedule["total_days"] == 120
+    assert schedule["harvest_date"] == "2026-09-29"
@@ -0,0 +1,57 @@
+# ✅ backend/tests/test_diagnose_batch.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import diagnosis
+from routers import diagnose
+
+
+@pytest.fixture
+def client(monkeypatch):
+    classified, remedies = [], []
+
+    async def classify_image(crop, data):
+        classified.append(data)
+        if data == b"broken":
+            raise ValueError("cannot identify image file")
+        disease = {b"blight": "Early Blight", b"mosaic": "Mosaic Virus", b"leaf": None}[data]
+        return {"class": disease, "confidence": 0.9 if disease else None, "source": "local", "cached": False}
+
+    async def diagnosis_text(crop_disease, language):
+        remedies.append(crop_disease)
+        return f"Remedy for {crop_disease}", False
+
+    monkeypatch.setattr(diagnosis, "classify_image", classify_image)
+    monkeypatch.setattr(diagnose, "diagnosis_text", diagnosis_text)
+    app = FastAPI()
+    app.include_router(diagnose.router)
+    return TestClient(app), classified, remedies
+
+
+def upload(*contents):
+    return [("images", (f"{i}.jpg", data, "image/jpeg")) for i, data in enumerate(contents)]
+
+
+def test_batch_classifies_each_upload_once_and_one_remedy_per_disease(client):
+    client, classified, remedies = client
+    res = client.post("/diagnose/batch", files=upload(b"blight", b"mosaic", b"blight", b"leaf", b"broken", b"blight"),
+                      data={"crop": "tomato"})
+    assert res.status_code == 200
+    body = res.json()
+    assert sorted(classified) == [b"blight", b"broken", b"leaf", b"mosaic"]
+    assert sorted(remedies) == ["Early Blight", "Mosaic Virus"]
+    assert [image["index"] for image in body["images"]] == list(range(6))
+    assert body["images"][4] == {"index": 4, "filename": "4.jpg", "error": "cannot identify image file"}
+    summary = body["summary"]
+    assert (summary["images"], summary["diagnosed"], summary["undetected"], summary["failed"]) == (6, 4, 1, 1)
+    assert summary["diseases"][0] == {"class": "Early Blight", "count": 3, "share": 0.5, "mean_confidence": 0.9}
+    assert body["remedies"] == {"Early Blight": "Remedy for Early Blight", "Mosaic Virus": "Remedy for Mosaic Virus"}
+
+
+def test_batch_limits(client, monkeypatch):
+    client, classified, _ = client
+    monkeypatch.setattr(diagnose, "DIAGNOSE_BATCH_MAX_IMAGES", 2)
+    assert client.post("/diagnose/batch", files=upload(b"leaf", b"leaf", b"leaf"), data={"crop": "tomato"}).status_code == 400
+    assert client.post("/diagnose/batch", files=upload(b"leaf"), data={"crop": "mango"}).status_code == 400
+    assert classified == []
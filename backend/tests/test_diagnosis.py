@@ -0,0 +1,51 @@
+# ✅ backend/tests/test_diagnosis.py
+import io
+import time
+
+from PIL import Image
+
+from diagnosis import PerceptualHashCache, dhash, load_image
+
+
+def test_exact_hash_hit():
+    cache = PerceptualHashCache(ttl=60, max_distance=4)
+    cache.set("tomato", 0b1010, {"class": "Tomato___healthy"})
+    assert cache.get("tomato", 0b1010) == {"class": "Tomato___healthy"}
+    assert cache.get("potato", 0b1010) is None
+
+
+def test_near_match_picks_the_nearest_entry():
+    cache = PerceptualHashCache(ttl=60, max_distance=4)
+    query = 0
+    cache.set("tomato", 0b1111, {"class": "four bits away"})
+    cache.set("tomato", 0b1, {"class": "one bit away"})
+    cache.set("tomato", 0b11, {"class": "two bits away"})
+    assert cache.get("tomato", query) == {"class": "one bit away"}
+    assert cache.get("tomato", 0b11111 << 10) is None
+
+
+def test_expired_near_match_does_not_hide_a_live_one():
+    cache = PerceptualHashCache(ttl=60, max_distance=4)
+    cache.set("tomato", 0b1, {"class": "expired"})
+    cache.set("tomato", 0b111, {"class": "live"})
+    cache._data["tomato"][0b1] = ({"class": "expired"}, time.time() - 1)
+    assert cache.get("tomato", 0) == {"class": "live"}
+    # The expired entry is dropped on the way
+    assert 0b1 not in cache._data["tomato"]
+
+
+def test_expired_exact_entry_falls_back_to_a_near_one():
+    cache = PerceptualHashCache(ttl=60, max_distance=4)
+    cache.set("tomato", 0, {"class": "expired"})
+    cache.set("tomato", 0b11, {"class": "live"})
+    cache._data["tomato"][0] = ({"class": "expired"}, time.time() - 1)
+    assert cache.get("tomato", 0) == {"class": "live"}
+    assert cache.stats()["hits"] == 1
+
+
+def test_load_image_hashes_the_prepared_image():
+    buffer = io.BytesIO()
+    Image.linear_gradient("L").convert("RGB").resize((1200, 900)).save(buffer, format="JPEG")
+    image, phash = load_image(buffer.getvalue())
+    assert max(image.size) == 640
+    assert phash == dhash(image)
@@ -0,0 +1,35 @@
+# ✅ backend/tests/test_knowledge_index.py
+import pytest
+
+from knowledge_index import KnowledgeIndex, entities
+
+
+@pytest.fixture
+def index(tmp_path):
+    # The shipped knowledge base, the default hashing embedder and a fresh answer table
+    return KnowledgeIndex(path=str(tmp_path / "answers.sqlite3"))
+
+
+def test_retrieve_finds_the_matching_passage(index):
+    passages = index.retrieve("early blight on my tomato plants", "en")
+    assert passages[0]["title"] == "Tomato early blight"
+    # The Hindi keywords of the same passage
+    assert index.retrieve("टमाटर झुलसा", "hi")[0]["title"] == "Tomato early blight"
+
+
+def test_lookup_needs_the_same_language_and_entities(index):
+    index.remember("How much urea for wheat per acre?", "en", "About 45 kg at 21 days.")
+    hit = index.lookup("how much urea for wheat per acre", "en")
+    assert hit["answer"] == "About 45 kg at 21 days."
+    # Same words, another crop: never served the wheat answer
+    assert entities("How much urea for rice per acre?") != entities("How much urea for wheat per acre?")
+    assert index.lookup("How much urea for rice per acre?", "en") is None
+    assert index.lookup("How much urea for wheat per acre?", "hi") is None
+    assert index.stats()["hits"] == 1
+
+
+def test_answers_stored_by_another_worker_are_picked_up(index, tmp_path):
+    other = KnowledgeIndex(path=index.path)
+    index.load()
+    other.remember("When to irrigate cotton?", "en", "Every 10-12 days on black soil.")
+    assert index.lookup("When to irrigate cotton?", "en")["answer"] == "Every 10-12 days on black soil."
@@ -0,0 +1,76 @@
+# ✅ backend/tests/test_krishigpt.py
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from admission import UpstreamUnavailable
+from routers import krishigpt
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No knowledge index: every question goes to the (stubbed) LLM
+    async def prepare(query, language, history):
+        return None, [{"role": "user", "content": query}]
+
+    async def remember(*args):
+        pass
+
+    monkeypatch.setattr(krishigpt, "prepare_messages", prepare)
+    monkeypatch.setattr(krishigpt, "remember_answer", remember)
+    app = FastAPI()
+    app.include_router(krishigpt.router)
+    return TestClient(app)
+
+
+def sse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if ": " in line)
+        if "data" in fields:
+            events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+@pytest.mark.parametrize("path", ["/krishigpt", "/krishigpt/stream"])
+@pytest.mark.parametrize("body", [b"", b"{not json", b"[1, 2]", b'"query"'])
+def test_malformed_body_is_400(client, path, body):
+    res = client.post(path, content=body, headers={"Content-Type": "application/json"})
+    assert res.status_code == 400
+    assert res.headers["content-type"].startswith("application/json")
+    assert res.json() == {"response": "Invalid JSON body."}
+
+
+def test_stream_sends_tokens_then_done(client, monkeypatch):
+    async def tokens(*args, **kwargs):
+        for token in ["Water ", "twice ", "a week."]:
+            yield token
+
+    monkeypatch.setattr(krishigpt, "chat_completion_stream", tokens)
+    res = client.post("/krishigpt/stream", json={"query": "How often to water tomato?"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    assert sse_events(res.text) == [
+        ("token", {"token": "Water "}), ("token", {"token": "twice "}), ("token", {"token": "a week."}),
+        ("done", {"cached": False}),
+    ]
+
+
+def test_stream_without_a_query(client):
+    assert sse_events(client.post("/krishigpt/stream", json={}).text) == [("done", {"response": "No query provided."})]
+
+
+def test_stream_reports_an_unavailable_upstream(client, monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise UpstreamUnavailable("openrouter", "unavailable", 30)
+        yield
+
+    async def no_fallback(*args):
+        return None
+
+    monkeypatch.setattr(krishigpt, "chat_completion_stream", unavailable)
+    monkeypatch.setattr(krishigpt, "fallback_answer", no_fallback)
+    events = sse_events(client.post("/krishigpt/stream", json={"query": "Blight?"}).text)
+    assert events == [("error", {"response": "KrishiGPT failed: openrouter is unavailable, try again shortly", "retry_after": 30})]
@@ -0,0 +1,183 @@
+# ✅ backend/tests/test_llm_client.py
+# llm_client against the local OpenRouter stub, with failures and latency
+# injected through openrouter_app.state.
+import asyncio
+
+import httpx
+import pytest
+
+import llm_client
+from admission import UpstreamGuard, UpstreamUnavailable
+from benchmarks.stubs import StubServer, openrouter_app
+
+PAYLOAD = llm_client.build_payload([{"role": "user", "content": "How do I water tomatoes?"}])
+
+
+@pytest.fixture(scope="module")
+def stub():
+    with StubServer(openrouter_app) as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub, monkeypatch):
+    openrouter_app.state.latency = 0.01
+    openrouter_app.state.calls = 0
+    openrouter_app.state.fail_next = []
+    guard = UpstreamGuard("openrouter-test", 4, queue_timeout=1, failures=5, cooldown=30, slow_call=5)
+    # Backoff delays are recorded with the guard occupancy at the time of the sleep
+    sleeps = []
+
+    def backoff(attempt, retry_after=None):
+        sleeps.append((attempt, retry_after, guard.in_flight))
+        return 0.01
+
+    monkeypatch.setattr(llm_client, "OPENROUTER_URL", f"{stub.url}/api/v1/chat/completions")
+    monkeypatch.setattr(llm_client, "openrouter", guard)
+    monkeypatch.setattr(llm_client, "_backoff_delay", backoff)
+    monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 2)
+    return guard, sleeps
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await llm_client.close_client()
+    return asyncio.run(main())
+
+
+async def collect(stream):
+    return [delta async for delta in stream]
+
+
+def test_completion(client):
+    data = run(llm_client.post_completion(PAYLOAD))
+    assert data["choices"][0]["message"]["content"].startswith("Stub answer for:")
+    assert openrouter_app.state.calls == 1
+
+
+def test_retries_retryable_status_then_succeeds(client):
+    guard, sleeps = client
+    openrouter_app.state.fail_next = [503, 429]
+    data = run(llm_client.post_completion(PAYLOAD))
+    assert data["choices"][0]["message"]["content"]
+    assert openrouter_app.state.calls == 3
+    assert [attempt for attempt, _, _ in sleeps] == [0, 1]
+    # One guarded call per attempt; the two 5xx/429 replies count as failures
+    assert guard.calls == 3
+    assert guard.failures == 2
+    assert guard.state == "closed"
+
+
+def test_gives_up_after_max_retries(client):
+    openrouter_app.state.fail_next = [503, 503, 503, 503]
+    with pytest.raises(httpx.HTTPStatusError):
+        run(llm_client.post_completion(PAYLOAD))
+    assert openrouter_app.state.calls == llm_client.LLM_MAX_RETRIES + 1
+
+
+def test_non_retryable_status_is_not_retried(client):
+    _, sleeps = client
+    openrouter_app.state.fail_next = [400]
+    with pytest.raises(httpx.HTTPStatusError):
+        run(llm_client.post_completion(PAYLOAD))
+    assert openrouter_app.state.calls == 1
+    assert sleeps == []
+
+
+def test_backoff_runs_outside_the_guard(client):
+    guard, sleeps = client
+    openrouter_app.state.fail_next = [503]
+    run(llm_client.post_completion(PAYLOAD))
+    openrouter_app.state.fail_next = [502]
+    run(collect(llm_client.chat_completion_stream("Hello")))
+    assert [in_flight for _, _, in_flight in sleeps] == [0, 0]
+    assert guard.in_flight == 0
+
+
+def test_timeout_is_retried(client, monkeypatch):
+    # The client is built per loop with the timeout in effect at that time
+    monkeypatch.setattr(llm_client, "LLM_TIMEOUT", 0.1)
+    openrouter_app.state.latency = 0.5
+    with pytest.raises(httpx.TimeoutException):
+        run(llm_client.post_completion(PAYLOAD))
+    assert openrouter_app.state.calls == llm_client.LLM_MAX_RETRIES + 1
+
+
+def test_slow_calls_open_the_breaker(client, monkeypatch):
+    guard, _ = client
+    guard.slow_call = 0.05
+    guard.failure_threshold = 2
+    openrouter_app.state.latency = 0.1
+    run(llm_client.post_completion(PAYLOAD))
+    run(llm_client.post_completion(PAYLOAD))
+    assert guard.state == "open"
+    # Open: fails fast without reaching the upstream
+    with pytest.raises(UpstreamUnavailable):
+        run(llm_client.post_completion(PAYLOAD))
+    assert openrouter_app.state.calls == 2
+
+    # After the cooldown a single probe closes it again
+    guard.opened_at -= guard.cooldown
+    openrouter_app.state.latency = 0.01
+    run(llm_client.post_completion(PAYLOAD))
+    assert guard.state == "closed"
+
+
+def test_stream(client):
+    deltas = run(collect(llm_client.chat_completion_stream("How do I water tomatoes?")))
+    assert "".join(deltas).startswith("Stub answer for:")
+    assert len(deltas) > 1
+
+
+def test_stream_retries_status_before_first_token(client):
+    _, sleeps = client
+    openrouter_app.state.fail_next = [503]
+    deltas = run(collect(llm_client.chat_completion_stream("Hello")))
+    assert "".join(deltas).startswith("Stub answer for:")
+    assert openrouter_app.state.calls == 2
+    assert len(sleeps) == 1
+
+
+def test_stream_retries_drop_before_first_token(client):
+    openrouter_app.state.fail_next = ["drop"]
+    deltas = run(collect(llm_client.chat_completion_stream("Hello")))
+    assert "".join(deltas).startswith("Stub answer for:")
+    assert openrouter_app.state.calls == 2
+
+
+def test_stream_does_not_retry_after_first_token(client):
+    openrouter_app.state.fail_next = ["drop-late"]
+    received = []
+
+    async def consume():
+        async for delta in llm_client.chat_completion_stream("Hello"):
+            received.append(delta)
+
+    with pytest.raises(httpx.TransportError):
+        run(consume())
+    # A retry would repeat text the caller has already sent on
+    assert received == ["Stub"]
+    assert openrouter_app.state.calls == 1
+
+
+def test_one_client_per_loop(client):
+    async def twice():
+        first = llm_client.get_client()
+        second = llm_client.get_client()
+        return first, second
+
+    first, second = asyncio.run(twice())
+    assert first is second
+    other, _ = run(twice())
+    assert other is not first
+    # A closed client is replaced on the same loop
+    async def after_close():
+        first = llm_client.get_client()
+        await llm_client.close_client()
+        return first, llm_client.get_client()
+
+    closed, fresh = run(after_close())
+    assert closed.is_closed and fresh is not closed
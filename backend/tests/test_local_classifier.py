@@ -0,0 +1,97 @@
+# ✅ backend/tests/test_local_classifier.py
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from local_classifier import LocalClassifier
+
+
+class FakeModel:
+    # Stands in for CropModel: "images" are ints, labelled by value
+    path = "fake.onnx"
+
+    def __init__(self, batched=True, gate=None, fail=False):
+        self.batched = batched
+        self.gate = gate
+        self.fail = fail
+        self.batches = []
+
+    def preprocess(self, image):
+        return np.full((1, 1, 1), image, dtype=np.float32)
+
+    def predict(self, batch):
+        if self.gate is not None:
+            self.gate.wait(5)
+        values = [int(v) for v in batch[:, 0, 0, 0]]
+        self.batches.append(values)
+        if self.fail:
+            raise RuntimeError("model failed")
+        return [(f"class-{v}", 0.9) for v in values]
+
+
+def classifier_with(model, tmp_path, **kwargs):
+    classifier = LocalClassifier(model_dir=str(tmp_path), **kwargs)
+    classifier._models["tomato"] = model
+    return classifier
+
+
+def classify_all(classifier, images, crop="tomato"):
+    async def run():
+        return await asyncio.gather(*(classifier.classify(crop, image) for image in images), return_exceptions=True)
+    return asyncio.run(run())
+
+
+def test_concurrent_images_share_batches(tmp_path):
+    model = FakeModel()
+    classifier = classifier_with(model, tmp_path, batch_size=4, batch_wait_ms=100, threads=1)
+    results = classify_all(classifier, range(8))
+    # Each caller gets its own image's answer
+    assert results == [(f"class-{i}", 0.9) for i in range(8)]
+    assert all(len(batch) <= 4 for batch in model.batches)
+    assert sorted(v for batch in model.batches for v in batch) == list(range(8))
+    assert len(model.batches) == 2
+    assert classifier.stats()["avg_batch_size"] == 4.0
+
+
+def test_fixed_batch_models_run_image_by_image(tmp_path):
+    model = FakeModel(batched=False)
+    classifier = classifier_with(model, tmp_path, batch_size=4, batch_wait_ms=100, threads=1)
+    assert classify_all(classifier, range(3)) == [(f"class-{i}", 0.9) for i in range(3)]
+    assert sorted(model.batches) == [[0], [1], [2]]
+
+
+def test_a_failed_batch_fails_each_caller(tmp_path):
+    classifier = classifier_with(FakeModel(fail=True), tmp_path, batch_size=4, batch_wait_ms=50, threads=1)
+    results = classify_all(classifier, range(3))
+    assert all(isinstance(r, RuntimeError) for r in results)
+    # The pool slot is released: the next image still runs
+    classifier._models["tomato"] = FakeModel()
+    assert classify_all(classifier, [7]) == [("class-7", 0.9)]
+
+
+def test_missing_model_is_a_lookup_error(tmp_path):
+    classifier = LocalClassifier(model_dir=str(tmp_path))
+    with pytest.raises(LookupError):
+        asyncio.run(classifier.classify("potato", 1))
+
+
+def test_timed_out_images_are_dropped_from_the_queue(tmp_path):
+    gate = threading.Event()
+    model = FakeModel(gate=gate)
+    classifier = classifier_with(model, tmp_path, batch_size=1, batch_wait_ms=0, threads=1, timeout=0.2)
+
+    async def run():
+        # The only pool thread is stuck on image 1, so image 2 waits in the queue
+        first = classifier.submit("tomato", 1)
+        with pytest.raises(TimeoutError):
+            await classifier.classify("tomato", 2)
+        gate.set()
+        return await asyncio.wrap_future(first)
+
+    assert asyncio.run(run()) == ("class-1", 0.9)
+    assert classifier.stats()["timeouts"] == 1
+    # Image 2 was cancelled before its batch ran, so the model never saw it
+    assert classify_all(classifier, [3]) == [("class-3", 0.9)]
+    assert model.batches == [[1], [3]]
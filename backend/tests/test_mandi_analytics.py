@@ -0,0 +1,121 @@
+# ✅ backend/tests/test_mandi_analytics.py
+import sys
+import types
+import asyncio
+
+import numpy as np
+import pytest
+
+from mandi_analytics import MandiAnalytics, LOOKBACK
+from benchmarks.bench_mandi_analytics import make_frame
+
+DAYS = 20
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return make_frame(markets=40, commodities=5, days=DAYS + LOOKBACK + 15, coverage=0.5)
+
+
+def feed_incrementally(frame, steps=15):
+    # What the store hands over after each incremental ingest: every row up to
+    # a day, with that day first seen half-reported, then complete
+    analytics = MandiAnalytics(days=DAYS)
+    days = np.sort(frame["_date"].unique())
+    for day in days[-steps - 1:]:
+        rows = frame[frame["_date"] <= day]
+        last = np.flatnonzero(rows["_date"].to_numpy() == day)
+        analytics.on_mandi_update(rows.drop(rows.index[last[::2]]))
+        analytics.on_mandi_update(rows)
+    return analytics
+
+
+def by_key(analytics):
+    data = analytics._data
+    return {key: i for i, key in enumerate(data.keys)}
+
+
+def movers_set(result):
+    return {side: sorted((r["market"], r["commodity"], r["change_pct"], r["previous_date"]) for r in result[side])
+            for side in ("gainers", "losers")}
+
+
+def test_incremental_updates_match_a_rebuild(frame):
+    incremental = feed_incrementally(frame)
+    rebuilt = MandiAnalytics(days=DAYS)
+    rebuilt.on_mandi_update(frame)
+    assert incremental.status()["rebuilds"] == 1
+    assert incremental.status()["incremental_updates"] == 31
+    a, b = incremental._data, rebuilt._data
+    assert (a.start_day, a.last_day) == (b.start_day, b.last_day)
+
+    keys_a, keys_b = by_key(incremental), by_key(rebuilt)
+    assert set(keys_a) == set(keys_b)
+    order_a = np.array([keys_a[key] for key in b.keys])
+    np.testing.assert_array_equal(a.price[order_a], b.price)
+    np.testing.assert_array_equal(a.last_col[order_a], b.last_col)
+    for window in b.rolling:
+        for stat in b.rolling[window]:
+            # Every column, including the first 6 / 29 of the 7- / 30-day windows
+            np.testing.assert_allclose(a.rolling[window][stat][order_a], b.rolling[window][stat], rtol=1e-6,
+                                       err_msg=f"{window}d {stat}")
+
+    for state, district, market, commodity in b.keys[:50]:
+        assert incremental.rolling_stats(market, commodity, history=DAYS) == rebuilt.rolling_stats(market, commodity, history=DAYS)
+    for district in {key[1] for key in b.keys}:
+        assert incremental.spread(district) == rebuilt.spread(district)
+    for day in range(b.last_day - 10, b.last_day + 1):
+        for state in (None, "State-3"):
+            assert (movers_set(incremental.top_movers(day=day, state=state, limit=1000))
+                    == movers_set(rebuilt.top_movers(day=day, state=state, limit=1000)))
+
+
+def test_rebuild_fills_the_first_rolling_columns(frame):
+    analytics = MandiAnalytics(days=DAYS)
+    analytics.on_mandi_update(frame)
+    data = analytics._data
+    # The first reported day's windows reach back into the lookback columns
+    for window, stats in data.rolling.items():
+        window_prices = data.price[:, LOOKBACK + 1 - window:LOOKBACK + 1]
+        np.testing.assert_array_equal(stats["n"][:, 0], (~np.isnan(window_prices)).sum(axis=1))
+        np.testing.assert_allclose(stats["max"][:, 0], np.nanmax(window_prices, axis=1))
+    assert (data.rolling[30]["n"][:, 0] > data.rolling[7]["n"][:, 0]).all()
+
+
+def test_an_unchanged_update_recomputes_nothing(frame):
+    analytics = MandiAnalytics(days=DAYS)
+    analytics.on_mandi_update(frame)
+    before = analytics._data
+    analytics.on_mandi_update(frame.copy())
+    status = analytics.status()
+    assert status["incremental_updates"] == 1
+    assert status["last_changed_series"] == 0
+    after = analytics._data
+    assert after.spreads is before.spreads
+    assert after.movers == before.movers
+    np.testing.assert_array_equal(after.rolling[7]["mean"], before.rolling[7]["mean"])
+
+
+def test_updates_publish_a_new_snapshot(frame):
+    last = frame["_date"].max()
+    analytics = MandiAnalytics(days=DAYS)
+    analytics.on_mandi_update(frame[frame["_date"] < last])
+    before = analytics._data
+    price, spreads = before.price.copy(), dict(before.spreads)
+    analytics.on_mandi_update(frame)
+    assert analytics._data is not before
+    np.testing.assert_array_equal(before.price, price)
+    assert before.spreads == spreads
+
+
+def test_routes_return_503_until_the_listener_has_run(monkeypatch, frame):
+    from routers import mandi
+
+    not_built = MandiAnalytics(days=DAYS)
+    monkeypatch.setitem(sys.modules, "mandi_analytics", types.SimpleNamespace(mandi_analytics=not_built))
+    response = asyncio.run(mandi.mandi_rolling_stats("Market-1", "Commodity-1", history=0))
+    assert response.status_code == 503
+    assert not not_built.ready  # the handler did not build it
+
+    not_built.on_mandi_update(frame)
+    assert asyncio.run(mandi.mandi_rolling_stats("Market-1", "Commodity-1", history=0))["count"] == 1
@@ -0,0 +1,161 @@
+# ✅ backend/tests/test_mandi_ingest.py
+import asyncio
+import threading
+from datetime import date, timedelta
+
+import httpx
+import pytest
+
+import mandi_ingest
+import mandi_rates
+from mandi_analytics import MANDI_ANALYTICS_DAYS
+from mandi_ingest import PartWriter, compact, fetch_page, ingest, part_files, read_snapshot, write_meta
+from benchmarks.stubs import StubServer, datagov_app, make_mandi_records
+
+
+def record(day, market="Pune", price=1500):
+    return {
+        "state": "Maharashtra", "district": "Pune", "market": market, "commodity": "Tomato",
+        "variety": "Local", "grade": "FAQ", "arrival_date": day.strftime("%d/%m/%Y"),
+        "min_price": str(price - 100), "max_price": str(price + 100), "modal_price": str(price),
+    }
+
+
+def write_part(snapshot_dir, records):
+    writer = PartWriter(str(snapshot_dir))
+    writer.write(records)
+    return writer.commit()
+
+
+def test_retention_on_load_and_compaction(tmp_path):
+    newest = date(2026, 3, 1)
+    write_part(tmp_path, [record(newest - timedelta(days=d)) for d in range(0, 300, 10)])
+    write_part(tmp_path, [record(newest, market="Junnar")])
+
+    days = read_snapshot(str(tmp_path), retention_days=120).column("arrival_day").to_pylist()
+    assert min(days) == newest - timedelta(days=110)
+    assert len(days) == 13
+
+    # Compaction rewrites only what is retained
+    compact(str(tmp_path))
+    assert len(part_files(str(tmp_path))) == 1
+    assert len(read_snapshot(str(tmp_path), retention_days=0)) == len(read_snapshot(str(tmp_path))) == 19
+
+
+def test_retention_covers_the_analytics_window():
+    assert mandi_ingest.MANDI_RETENTION_DAYS >= MANDI_ANALYTICS_DAYS + 30
+
+
+def test_fetch_page_backs_off_without_holding_the_semaphore(monkeypatch):
+    calls = []
+    held_while_sleeping = []
+
+    class FlakyClient:
+        async def get(self, url, params=None):
+            calls.append(params)
+            if len(calls) < 3:
+                raise httpx.ConnectError("refused")
+            return httpx.Response(200, json={"records": []}, request=httpx.Request("GET", url))
+
+    real_sleep = asyncio.sleep
+
+    async def main():
+        semaphore = asyncio.Semaphore(1)
+
+        async def sleep(delay):
+            held_while_sleeping.append(semaphore.locked())
+            await real_sleep(0)
+
+        monkeypatch.setattr(asyncio, "sleep", sleep)
+        return await fetch_page(FlakyClient(), semaphore, {"offset": 0})
+
+    assert asyncio.run(main()) == {"records": []}
+    assert len(calls) == 3
+    assert held_while_sleeping == [False, False]
+
+
+@pytest.fixture
+def datagov(monkeypatch):
+    datagov_app.state.latency = 0
+    with StubServer(datagov_app) as server:
+        monkeypatch.setattr(mandi_rates, "BASE_URL", f"{server.url}/resource/test")
+        yield
+
+
+def test_gap_over_the_backfill_cap_runs_a_full_ingest(tmp_path, datagov, monkeypatch):
+    datagov_app.state.records = make_mandi_records(n=500, days=60)
+    stale = date.today() - timedelta(days=mandi_ingest.MANDI_MAX_BACKFILL_DAYS + 10)
+    write_part(tmp_path, [record(stale)])
+    write_meta({"last_arrival_date": stale.isoformat()}, str(tmp_path))
+
+    result = asyncio.run(ingest(snapshot_dir=str(tmp_path), page_size=100))
+    assert result["last_sync_mode"] == "full"
+    assert result["last_sync_rows"] == 500
+    # The full ingest replaces the stale part, so every day in between is present
+    assert len(part_files(str(tmp_path))) == 1
+
+
+def test_recent_sync_stays_incremental(tmp_path, datagov):
+    datagov_app.state.records = [record(date.today()), record(date.today() - timedelta(days=1))]
+    recent = date.today() - timedelta(days=1)
+    write_part(tmp_path, [record(recent - timedelta(days=3))])
+    write_meta({"last_arrival_date": recent.isoformat()}, str(tmp_path))
+
+    result = asyncio.run(ingest(snapshot_dir=str(tmp_path), page_size=100))
+    assert result["last_sync_mode"] == "incremental"
+    assert result["last_sync_rows"] == 2
+    assert len(read_snapshot(str(tmp_path))) == 3
+
+
+def test_fetch_page_retries_a_body_that_is_not_json(monkeypatch):
+    calls = []
+
+    class HtmlThenJson:
+        async def get(self, url, params=None):
+            calls.append(params)
+            request = httpx.Request("GET", url)
+            if len(calls) == 1:
+                return httpx.Response(200, text="<html>Service Unavailable</html>", request=request)
+            return httpx.Response(200, json={"records": [1]}, request=request)
+
+    async def no_sleep(delay):
+        pass
+
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+    assert asyncio.run(fetch_page(HtmlThenJson(), asyncio.Semaphore(1), {"offset": 0})) == {"records": [1]}
+    assert len(calls) == 2
+
+
+def test_ingest_writes_and_compacts_off_the_loop(tmp_path, datagov, monkeypatch):
+    datagov_app.state.records = [record(date.today(), market=f"Market-{i}") for i in range(250)]
+    threads = {"convert": set(), "compact": set()}
+    to_batch, compact_parts = mandi_ingest.records_to_batch, mandi_ingest.compact
+
+    def recording_batch(records):
+        threads["convert"].add(threading.get_ident())
+        return to_batch(records)
+
+    def recording_compact(snapshot_dir):
+        threads["compact"].add(threading.get_ident())
+        return compact_parts(snapshot_dir)
+
+    monkeypatch.setattr(mandi_ingest, "records_to_batch", recording_batch)
+    monkeypatch.setattr(mandi_ingest, "compact", recording_compact)
+    monkeypatch.setattr(mandi_ingest, "MANDI_MAX_PARTS", 1)
+    write_part(tmp_path, [record(date.today() - timedelta(days=40))])
+    write_part(tmp_path, [record(date.today() - timedelta(days=1))])
+    write_meta({"last_arrival_date": (date.today() - timedelta(days=1)).isoformat()}, str(tmp_path))
+
+    threads["convert"].clear()
+
+    async def run():
+        return threading.get_ident(), await ingest(snapshot_dir=str(tmp_path), page_size=100)
+
+    loop_thread, result = asyncio.run(run())
+    assert result["last_sync_mode"] == "incremental"
+    assert result["last_sync_rows"] == 250
+    # Three parts over MANDI_MAX_PARTS: compacted into one
+    assert len(part_files(str(tmp_path))) == 1
+    assert len(read_snapshot(str(tmp_path))) == 252
+    assert threads["convert"] and threads["compact"]
+    assert loop_thread not in threads["convert"] | threads["compact"]
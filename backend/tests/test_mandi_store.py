@@ -0,0 +1,57 @@
+# ✅ backend/tests/test_mandi_store.py
+import asyncio
+import threading
+
+from mandi_ingest import PartWriter, write_meta
+from mandi_store import MandiStore
+from benchmarks.stubs import make_mandi_records
+
+
+def write_snapshot(snapshot_dir, records):
+    writer = PartWriter(str(snapshot_dir))
+    writer.write(records)
+    writer.commit()
+    write_meta({"last_sync": "2026-01-01T00:00:00"}, str(snapshot_dir))
+
+
+def test_load_snapshot_runs_off_the_loop(tmp_path):
+    records = make_mandi_records(n=2000)
+    write_snapshot(tmp_path, records)
+    store = MandiStore()
+    seen = []
+    store.listeners.append(lambda df: seen.append((threading.get_ident(), len(df), store.version)))
+
+    async def load():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        loaded = await store.load_snapshot(str(tmp_path))
+        task.cancel()
+        return loaded, threading.get_ident(), ticks
+
+    loaded, loop_thread, ticks = asyncio.run(load())
+    assert loaded
+    assert ticks > 1
+    # The listener saw the new frame on a worker thread, before it was published
+    assert seen == [(seen[0][0], len(records), 0)]
+    assert seen[0][0] != loop_thread
+    assert store.version == 1 and len(store.records) == len(records) == len(store.df)
+
+    rows = store.query(market="Pune", commodity="Tomato")
+    assert rows and all(r["market"] == "Pune" and r["commodity"] == "Tomato" for r in rows)
+    dates = store.df["_date"].iloc[store.positions(market="Pune")]
+    assert dates.is_monotonic_decreasing
+
+
+def test_failing_listener_does_not_block_the_load(tmp_path):
+    write_snapshot(tmp_path, make_mandi_records(n=100))
+    store = MandiStore()
+    store.listeners.append(lambda df: 1 / 0)
+    assert asyncio.run(store.load_snapshot(str(tmp_path)))
+    assert store.ready and len(store.records) == 100
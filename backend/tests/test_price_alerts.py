@@ -0,0 +1,137 @@
+# ✅ backend/tests/test_price_alerts.py
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from price_alerts import PriceAlertEngine
+from routers import alerts as alerts_router
+
+
+def frame(price, market="Pune", commodity="Tomato", day="2026-06-01"):
+    return pd.DataFrame({"commodity": [commodity], "market": [market], "modal_price": [price], "_date": [pd.Timestamp(day)]})
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "alerts.sqlite3")
+
+
+@pytest.fixture
+def engine(path, monkeypatch):
+    engine = PriceAlertEngine(path)
+    monkeypatch.setattr(alerts_router, "price_alerts", engine)
+    return engine
+
+
+def test_delete_checks_the_owner(engine):
+    alert = engine.add("alice", "Tomato", 2000)
+    assert not engine.delete(alert["id"], "bob")
+    assert not engine.delete(alert["id"], None)
+    assert engine.stats()["active_alerts"] == 1
+    assert engine.delete(alert["id"], "alice")
+    assert engine.stats()["active_alerts"] == 0
+
+
+def test_delete_route_requires_client_id(engine):
+    app = FastAPI()
+    app.include_router(alerts_router.router)
+    client = TestClient(app)
+    alert = engine.add("alice", "Tomato", 2000)
+    assert client.delete(f"/price-alerts/{alert['id']}").status_code == 422
+    assert client.delete(f"/price-alerts/{alert['id']}", params={"client_id": "bob"}).status_code == 404
+    assert client.delete(f"/price-alerts/{alert['id']}", params={"client_id": "alice"}).json() == {"deleted": alert["id"]}
+
+
+@pytest.mark.parametrize("target", ["abc", "", [], {}, True, 0, -5, "nan", "inf"])
+def test_create_rejects_a_bad_target(engine, target):
+    app = FastAPI()
+    app.include_router(alerts_router.router)
+    res = TestClient(app).post("/price-alerts", json={"client_id": "alice", "commodity": "Tomato", "target": target})
+    assert res.status_code == 400
+    assert "target" in res.json()["error"]
+    assert engine.stats()["active_alerts"] == 0
+
+
+def test_create_rejects_a_non_string_commodity(engine):
+    app = FastAPI()
+    app.include_router(alerts_router.router)
+    res = TestClient(app).post("/price-alerts", json={"client_id": "alice", "commodity": 5, "target": 100})
+    assert res.status_code == 400
+
+
+def test_create_accepts_a_numeric_string(engine):
+    app = FastAPI()
+    app.include_router(alerts_router.router)
+    res = TestClient(app).post("/price-alerts", json={"client_id": "alice", "commodity": "Tomato", "target": "2500.5"})
+    assert res.status_code == 200
+    assert res.json()["alert"]["threshold"] == 2500.5
+
+
+def test_sync_reconciles_other_workers(path):
+    worker_a, worker_b = PriceAlertEngine(path), PriceAlertEngine(path)
+    kept = worker_a.add("alice", "Tomato", 2000)
+    deleted = worker_a.add("alice", "Onion", 3000)
+    fired = worker_a.add("bob", "Potato", 1000)
+    worker_b.sync()
+    assert worker_b.stats()["active_alerts"] == 3
+
+    assert worker_a.delete(deleted["id"], "alice")
+    assert worker_a.on_mandi_update(frame(1200, commodity="Potato")) == 1
+    # Added after a delete, so SQLite may hand out a rowid it already used
+    added = worker_a.add("carol", "Wheat", 2500)
+
+    worker_b.sync()
+    assert set(worker_b.alerts) == {kept["id"], added["id"]}
+    assert worker_b.stats()["active_alerts"] == 2
+    assert worker_b.stats()["indexed_pairs"] == 2
+    # Triggered elsewhere: this worker must not fire it again
+    assert worker_b.on_mandi_update(frame(1300, commodity="Potato")) == 0
+    assert fired["id"] not in worker_b.alerts
+
+
+def test_trigger_from_a_worker_thread_reaches_the_stream(engine):
+    engine.add("alice", "Tomato", 2000)
+
+    async def main():
+        queue = engine.subscribe("alice")
+        await asyncio.to_thread(engine.on_mandi_update, frame(2100))
+        return await asyncio.wait_for(queue.get(), 1)
+
+    alert = asyncio.run(main())
+    assert alert["triggered_price"] == 2100
+
+
+async def read_events(response, count):
+    events = []
+    async for chunk in response.body_iterator:
+        if chunk.startswith(":"):
+            continue
+        fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+        events.append((fields["id"], json.loads(fields["data"])))
+        if len(events) == count:
+            break
+    return events
+
+
+def test_stream_resumes_from_last_event_id(engine, monkeypatch):
+    monkeypatch.setattr(alerts_router, "PRICE_ALERT_KEEPALIVE", 0.05)
+    first = engine.add("alice", "Tomato", 2000)
+    second = engine.add("alice", "Onion", 3000)
+    engine.on_mandi_update(frame(2100))
+    engine.on_mandi_update(frame(3100, commodity="Onion"))
+
+    async def main():
+        fresh = await alerts_router.price_alert_stream("alice", None)
+        replayed = await read_events(fresh, 2)
+        resumed = await alerts_router.price_alert_stream("alice", replayed[0][0])
+        return replayed, await read_events(resumed, 1)
+
+    replayed, resumed = asyncio.run(main())
+    assert [data["id"] for _, data in replayed] == [first["id"], second["id"]]
+    assert float(replayed[0][0]) == engine.get(first["id"])["triggered_at"]
+    # Only what came after the last event the client saw
+    assert [data["id"] for _, data in resumed] == [second["id"]]
@@ -0,0 +1,97 @@
+# ✅ backend/tests/test_price_forecast.py
+import asyncio
+import threading
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import price_forecast
+from price_forecast import PriceForecaster, fit_trends, forecast_rows
+
+
+@pytest.fixture(scope="module")
+def frame():
+    # Uneven series: repeated days, gaps, a single-point series
+    rng = np.random.default_rng(3)
+    rows = []
+    for s in range(40):
+        points = 1 if s == 0 else int(rng.integers(2, 40))
+        days = np.sort(rng.choice(60, points)) if points > 1 else np.array([10])
+        for day in days:
+            rows.append({
+                "state": f"State-{s % 3}",
+                "district": f"District-{s % 7}",
+                "market": f"Market-{s}",
+                "commodity": f"Commodity-{s % 4}",
+                "_date": pd.Timestamp("2026-06-01") + pd.Timedelta(days=int(day)),
+                "modal_price": float(1000 + s * 10 + day * rng.normal(3, 2) + rng.integers(-50, 50)),
+            })
+    return pd.DataFrame(rows).sample(frac=1, random_state=1).reset_index(drop=True)
+
+
+def per_series_forecast(rows, days=3):
+    # The old per-request fit: ordinary least squares on days since the first arrival
+    rows = rows.sort_values("_date")
+    x = (rows["_date"] - rows["_date"].min()).dt.days.to_numpy(dtype=float)
+    y = rows["modal_price"].to_numpy(dtype=float)
+    if np.ptp(x) == 0:
+        slope, intercept = 0.0, y.mean()
+    else:
+        slope, intercept = np.polyfit(x, y, 1)
+    future = x.max() + np.arange(1, days + 1)
+    return np.round(intercept + slope * future, 2)
+
+
+def test_vectorized_fit_matches_the_per_series_regression(frame):
+    rows = forecast_rows(fit_trends(frame))
+    assert len(rows) == 40
+    for row in rows:
+        series = frame[(frame["state"] == row["state"]) & (frame["market"] == row["market"]) & (frame["commodity"] == row["commodity"])]
+        expected = per_series_forecast(series)
+        assert [p["modal_price"] for p in row["prediction"]] == pytest.approx(expected, abs=0.011)
+        assert row["points"] == len(series)
+        assert row["prediction"][0]["arrival_date"] == str((series["_date"].max() + pd.Timedelta(days=1)).date())
+
+
+def test_windowed_fit_only_uses_the_last_days(frame):
+    market = frame[frame["market"] == "Market-5"]
+    last = market["_date"].max()
+    recent = market[market["_date"] > last - pd.Timedelta(days=14)]
+    row = forecast_rows(fit_trends(frame, window=14))
+    row = next(r for r in row if r["market"] == "Market-5")
+    assert [p["modal_price"] for p in row["prediction"]] == pytest.approx(per_series_forecast(recent), abs=0.011)
+
+
+def test_fits_run_off_the_event_loop(frame, monkeypatch):
+    store = types.SimpleNamespace(df=None)
+    forecaster = PriceForecaster(store)
+    fitted_on = []
+    fit = price_forecast.fit_trends
+
+    def recording_fit(df, window=None):
+        fitted_on.append((threading.get_ident(), window))
+        return fit(df, window=window)
+
+    monkeypatch.setattr(price_forecast, "fit_trends", recording_fit)
+
+    async def requests():
+        # The store's loader thread runs the listener, then publishes the frame
+        await asyncio.to_thread(forecaster.on_mandi_update, frame)
+        store.df = frame
+        loop_thread = threading.get_ident()
+        full = await forecaster.coefficients()
+        windowed = await forecaster.coefficients(window=14)
+        again = await forecaster.coefficients(window=14)
+        return loop_thread, full, windowed, again
+
+    loop_thread, full, windowed, again = asyncio.run(requests())
+    assert len(full) == 40 and windowed is again
+    assert [window for _, window in fitted_on] == [None, 14]
+    assert all(thread != loop_thread for thread, _ in fitted_on)
+
+    # A new frame invalidates every cached fit
+    store.df = frame.iloc[:-5]
+    asyncio.run(forecaster.coefficients())
+    assert [window for _, window in fitted_on] == [None, 14, None]
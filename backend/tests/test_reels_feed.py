@@ -0,0 +1,60 @@
+# ✅ backend/tests/test_reels_feed.py
+import asyncio
+import time
+
+import pytest
+
+import reels_feed
+from reels_feed import ReelsCache
+
+
+class Stop(Exception):
+    pass
+
+
+def run_loop(cache, monkeypatch, acquired, wakes=5, interval=3600, poll=300):
+    # Runs the refresh loop for `wakes` sleeps; returns the sleeps and lock attempts
+    sleeps, attempts, refreshes = [], [], []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+        if len(sleeps) >= wakes:
+            raise Stop()
+
+    async def refresh():
+        refreshes.append(time.time())
+
+    monkeypatch.setattr(reels_feed.asyncio, "sleep", sleep)
+    monkeypatch.setattr(reels_feed.shared_state, "acquire", lambda key, ttl=60: attempts.append(key) or acquired)
+    monkeypatch.setattr(cache, "refresh", refresh)
+    with pytest.raises(Stop):
+        asyncio.run(cache.run_refresh_loop(interval=interval, poll=poll))
+    return sleeps, attempts, refreshes
+
+
+@pytest.fixture
+def stale_cache(tmp_path):
+    cache = ReelsCache(path=str(tmp_path / "reels.json"))
+    cache.pages = {"en|": {"reels": [], "next_cursor": None, "fetched_at": time.time() - 7200}}
+    cache.load = lambda: None
+    return cache
+
+
+def test_non_leader_polls_while_pages_are_stale(stale_cache, monkeypatch):
+    sleeps, attempts, refreshes = run_loop(stale_cache, monkeypatch, acquired=False)
+    assert sleeps == [300] * 5
+    assert len(attempts) == 5 and not refreshes
+
+
+def test_leader_waits_a_poll_after_a_refresh_that_left_pages_stale(stale_cache, monkeypatch):
+    # e.g. the quota is blocked, so refresh() fetched nothing
+    sleeps, attempts, refreshes = run_loop(stale_cache, monkeypatch, acquired=True)
+    assert sleeps == [300] * 5
+    assert len(refreshes) == 5
+
+
+def test_fresh_pages_sleep_until_they_go_stale(stale_cache, monkeypatch):
+    stale_cache.pages["en|"]["fetched_at"] = time.time() - 3500
+    sleeps, attempts, refreshes = run_loop(stale_cache, monkeypatch, acquired=True, wakes=1)
+    assert 99 <= sleeps[0] <= 100
+    assert not attempts
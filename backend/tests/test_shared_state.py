@@ -0,0 +1,121 @@
+# ✅ backend/tests/test_shared_state.py
+# One contract for every STATE_BACKEND: the same tests run against SQLite
+# and against RedisState on fakeredis.
+import sys
+import time
+
+import pytest
+
+import shared_state
+from shared_state import RedisState, SQLiteState
+
+TTL = 0.3
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def state(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteState(str(tmp_path / "state.sqlite3"))
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisState(client=fakeredis.FakeRedis(), prefix="test:")
+
+
+def test_get_set_delete(state):
+    assert state.get("missing") is None
+    state.set("key", "value")
+    assert state.get("key") == "value"
+    state.set("key", 5)
+    assert state.get("key") == "5"
+    state.delete("key")
+    assert state.get("key") is None
+
+
+def test_set_ttl(state):
+    state.set("short", "value", ttl=TTL)
+    state.set("forever", "value")
+    assert state.get("short") == "value"
+    time.sleep(TTL + 0.1)
+    assert state.get("short") is None
+    assert state.get("forever") == "value"
+    # Setting again without a ttl makes the key permanent
+    state.set("short", "again", ttl=TTL)
+    state.set("short", "again")
+    time.sleep(TTL + 0.1)
+    assert state.get("short") == "again"
+
+
+def test_incr_counts(state):
+    assert state.incr("counter") == 1
+    assert state.incr("counter", 4) == 5
+    assert state.incr("other", 2, ttl=60) == 2
+    assert state.get("counter") == "5"
+
+
+def stored_keys(state):
+    if isinstance(state, SQLiteState):
+        return sorted(row[0] for row in state._conn.execute("SELECT key FROM state"))
+    return sorted(state._decode(key)[len(state.prefix):] for key in state.client.keys(state.prefix + "*"))
+
+
+def test_expired_windows_are_removed(state, monkeypatch):
+    # Rate limits count into a new key every window; old ones must not pile up
+    monkeypatch.setattr(shared_state, "STATE_PURGE_INTERVAL", 0)
+    for window in range(3):
+        state.incr(f"ratelimit:client:{window}", 1, ttl=TTL)
+    state.set("forever", "value")
+    time.sleep(TTL + 0.1)
+    state.incr("ratelimit:client:3", 1, ttl=TTL)
+    assert stored_keys(state) == ["forever", "ratelimit:client:3"]
+
+
+def test_incr_window_resets_after_ttl(state):
+    assert state.incr("window", 2, ttl=TTL) == 2
+    time.sleep(TTL / 2)
+    # Later increments don't push the window's end out
+    assert state.incr("window", 3, ttl=TTL) == 5
+    time.sleep(TTL / 2 + 0.1)
+    assert state.incr("window", 1, ttl=TTL) == 1
+    assert state.incr("window", 1, ttl=TTL) == 2
+
+
+def test_acquire_renew_release(state):
+    assert state.acquire("lock", owner="a", ttl=60)
+    assert not state.acquire("lock", owner="b", ttl=60)
+    # The holder renews
+    assert state.acquire("lock", owner="a", ttl=60)
+    # Only the holder can release
+    state.release("lock", owner="b")
+    assert not state.acquire("lock", owner="b", ttl=60)
+    state.release("lock", owner="a")
+    assert state.acquire("lock", owner="b", ttl=60)
+
+
+def test_expired_lock_is_taken_over(state):
+    assert state.acquire("lock", owner="a", ttl=TTL)
+    assert not state.acquire("lock", owner="b", ttl=TTL)
+    time.sleep(TTL + 0.1)
+    assert state.acquire("lock", owner="b", ttl=60)
+    assert not state.acquire("lock", owner="a", ttl=60)
+
+
+def test_renewal_extends_the_lock(state):
+    assert state.acquire("lock", owner="a", ttl=TTL)
+    time.sleep(TTL * 2 / 3)
+    assert state.acquire("lock", owner="a", ttl=TTL)
+    time.sleep(TTL * 2 / 3)
+    assert not state.acquire("lock", owner="b", ttl=TTL)
+
+
+def test_clear_prefix(state):
+    state.set("cache:a", "1")
+    state.set("cache:b", "2")
+    state.set("lock:c", "3")
+    state.clear("cache:")
+    assert state.get("cache:a") is None and state.get("cache:b") is None
+    assert state.get("lock:c") == "3"
+
+
+def test_redis_backend_without_the_package(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis", None)
+    with pytest.raises(RuntimeError, match="requirements-optional.txt"):
+        RedisState()
@@ -0,0 +1,67 @@
+# ✅ backend/tests/test_singleflight.py
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_with_one_key_share_one_execution():
+    group = SingleFlight("test")
+    started = []
+
+    async def fetch(key):
+        started.append(key)
+        await asyncio.sleep(0.05)
+        return f"value-{key}"
+
+    async def run():
+        return await asyncio.gather(*(group.do(key, fetch, key) for key in ["a"] * 5 + ["b"] * 3))
+
+    assert asyncio.run(run()) == ["value-a"] * 5 + ["value-b"] * 3
+    assert sorted(started) == ["a", "b"]
+    assert group.stats()["executions"] == 2
+    assert group.stats()["coalesced"] == 6
+    assert group.in_flight() == 0
+
+
+def test_an_error_reaches_every_caller_and_is_not_kept():
+    group = SingleFlight("test")
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream down")
+        return "ok"
+
+    async def run():
+        first = await asyncio.gather(*(group.do("k", flaky) for _ in range(3)), return_exceptions=True)
+        # The failed call left the group, so the next one runs again
+        return first, await group.do("k", flaky)
+
+    first, second = asyncio.run(run())
+    assert all(isinstance(e, RuntimeError) and str(e) == "upstream down" for e in first)
+    assert second == "ok"
+    assert len(attempts) == 2
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_call():
+    group = SingleFlight("test")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leaving = asyncio.create_task(group.do("k", slow))
+        staying = asyncio.create_task(group.do("k", slow))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert asyncio.run(run()) == "done"
+    assert group.stats()["executions"] == 1
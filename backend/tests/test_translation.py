@@ -0,0 +1,74 @@
+# ✅ backend/tests/test_translation.py
+import asyncio
+import json
+import re
+
+import pytest
+
+import translation
+from llm_cache import CompletionCache, LRUCache
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    # Fresh memory, and an LLM that prefixes every segment with "HI:"
+    monkeypatch.setattr(translation, "translation_memory", CompletionCache(LRUCache(), None))
+    sent = []
+    replies = []
+
+    async def post_completion(payload, title=None):
+        prompt = payload["messages"][0]["content"]
+        match = re.search(r"\[.*\]\s*$", prompt, re.S)
+        batch = json.loads(match.group(0)) if match else [prompt.split("\n\n", 1)[1]]
+        sent.append(batch)
+        if replies:
+            content = replies.pop(0)
+        elif match:
+            content = json.dumps([f"HI:{s}" for s in batch], ensure_ascii=False)
+        else:
+            content = f"HI:{batch[0]}"
+        return {"choices": [{"message": {"content": content}}], "usage": {"total_tokens": 100}}
+
+    monkeypatch.setattr(translation, "post_completion", post_completion)
+    return sent, replies
+
+
+def test_shared_segments_are_translated_once(llm):
+    sent, _ = llm
+    first = "# Watering\n- Water early in the morning.\n- Avoid wetting the leaves.\n\nPrice: 120"
+    second = "# Prevention\n- Avoid wetting the leaves.\n- Remove infected plants."
+
+    assert asyncio.run(translation.translate(first, "hi")) == (
+        "# HI:Watering\n- HI:Water early in the morning.\n- HI:Avoid wetting the leaves.\n\nHI:Price: 120"
+    )
+    out = asyncio.run(translation.translate(second, "hi"))
+    assert out == "# HI:Prevention\n- HI:Avoid wetting the leaves.\n- HI:Remove infected plants."
+    # The second document only sent the segments the memory didn't have
+    assert sent[1] == ["Prevention", "Remove infected plants."]
+
+
+def test_reuse_ignores_whitespace_and_counts_saved_tokens(llm):
+    sent, _ = llm
+    asyncio.run(translation.translate_segments(["Spray neem oil weekly."], "mr"))
+    again = asyncio.run(translation.translate_segments(["  Spray neem oil weekly. "], "mr"))
+    assert again == ["HI:Spray neem oil weekly."]
+    assert len(sent) == 1
+    # Another language is a separate memory entry
+    asyncio.run(translation.translate_segments(["Spray neem oil weekly."], "hi"))
+    assert len(sent) == 2
+
+
+def test_unparsed_batch_is_split(llm):
+    sent, replies = llm
+    replies.append("Sorry, here you go: not a list")
+    segments = ["One.", "Two.", "Three.", "Four."]
+    assert asyncio.run(translation.translate_segments(segments, "hi")) == [f"HI:{s}" for s in segments]
+    assert sent[0] == segments
+    assert sorted(map(tuple, sent[1:])) == [("One.", "Two."), ("Three.", "Four.")]
+
+
+def test_other_languages_and_non_text_pass_through(llm):
+    sent, _ = llm
+    assert asyncio.run(translation.translate_segments(["Hello", "42"], "fr")) == ["Hello", "42"]
+    assert asyncio.run(translation.translate_segments(["42", "--"], "hi")) == ["42", "--"]
+    assert sent == []
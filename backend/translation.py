@@ -0,0 +1,181 @@
+# ✅ backend/translation.py
+# English -> Hindi/Marathi translation with a segment-level translation
+# memory. Text is split into segments, one per line (paragraphs, bullets,
+# table rows), with list markers and headings kept aside. Each segment is
+# looked up by (hash of the segment, language, model), so a paragraph shared
+# by many documents - the watering or prevention tips of a remedy - is only
+# translated once. The misses go out in batches, as a JSON list, one call per
+# batch. The memory is a CompletionCache: an in-process LRU in front of
+# SQLite, or Redis with STATE_BACKEND=redis.
+import os
+import re
+import json
+import asyncio
+import hashlib
+
+from llm_cache import CompletionCache, LRUCache, shared_tier
+from llm_client import build_payload, post_completion
+from singleflight import flight_group
+from metrics import count_for_request, translation_saved_tokens, translation_segments
+
+TRANSLATION_MODEL = os.getenv("TRANSLATION_MODEL", "anthropic/claude-3-haiku")
+TRANSLATION_CACHE_PATH = os.getenv(
+    "TRANSLATION_CACHE_PATH", os.path.join(os.path.dirname(__file__), "cache", "translations.sqlite3")
+)
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", str(90 * 24 * 3600)))
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "8192"))
+TRANSLATION_BATCH_SEGMENTS = int(os.getenv("TRANSLATION_BATCH_SEGMENTS", "40"))
+TRANSLATION_BATCH_CHARS = int(os.getenv("TRANSLATION_BATCH_CHARS", "6000"))
+
+LANGUAGES = {"hi": "Hindi", "mr": "Marathi"}
+# Leading whitespace, list marker / heading / quote, then the text of the line
+LINE = re.compile(r"^(\s*(?:(?:[-*•>]|#+|\d+[.)])\s+)?)(.*?)(\s*)$")
+
+translation_memory = CompletionCache(
+    LRUCache(TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL),
+    shared_tier(TRANSLATION_CACHE_PATH, "tm:", ttl=TRANSLATION_CACHE_TTL),
+)
+_totals = {"documents": 0, "saved_tokens": 0, "calls": 0}
+
+
+def memory_key(segment, language, model):
+    return hashlib.sha256(f"{model}\n{language}\n{' '.join(segment.split())}".encode("utf-8")).hexdigest()
+
+
+def translatable(segment):
+    return any(c.isalpha() for c in segment)
+
+
+def estimate_tokens(text):
+    # Rough: ~4 chars per token for English, ~2 for Devanagari
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return max(1, ascii_chars // 4 + (len(text) - ascii_chars) // 2)
+
+
+def batches(segments):
+    batch, size = [], 0
+    for segment in segments:
+        if batch and (len(batch) >= TRANSLATION_BATCH_SEGMENTS or size + len(segment) > TRANSLATION_BATCH_CHARS):
+            yield batch
+            batch, size = [], 0
+        batch.append(segment)
+        size += len(segment)
+    if batch:
+        yield batch
+
+
+def _parse_json_list(text, expected):
+    match = re.search(r"\[.*\]", text, re.S)
+    if not match:
+        return None
+    try:
+        items = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(items, list) or len(items) != expected:
+        return None
+    return [str(item) for item in items]
+
+
+async def _translate_batch(batch, language, model):
+    # {segment: translation}; a batch whose reply can't be parsed is split in half
+    if len(batch) == 1:
+        prompt = (
+            f"Translate this agricultural text into simple {LANGUAGES[language]} for farmers. "
+            "Keep product and brand names, numbers, units and markdown. Reply with only the translation.\n\n"
+            + batch[0]
+        )
+    else:
+        prompt = (
+            f"Translate each string in this JSON list into simple {LANGUAGES[language]} for farmers. "
+            "Keep product and brand names, numbers, units and markdown. "
+            "Reply with only a JSON list of the same length and order.\n\n"
+            + json.dumps(batch, ensure_ascii=False)
+        )
+    data = await post_completion(
+        build_payload([{"role": "user", "content": prompt}], model=model, temperature=0),
+        title="AgriSaarthi-Translation",
+    )
+    _totals["calls"] += 1
+    content = data["choices"][0]["message"]["content"] or ""
+
+    if len(batch) == 1:
+        translated = [content.strip()] if content.strip() else None
+    else:
+        translated = _parse_json_list(content, len(batch))
+    if translated is None:
+        if len(batch) == 1:
+            raise RuntimeError("Empty translation")
+        print(f"⚠️ Translation batch of {len(batch)} not parsed, splitting")
+        half = len(batch) // 2
+        first, second = await asyncio.gather(
+            _translate_batch(batch[:half], language, model), _translate_batch(batch[half:], language, model)
+        )
+        return {**first, **second}
+
+    # What this call cost, shared out by length so a later hit knows what it saved
+    usage = data.get("usage") or {}
+    cost = usage.get("total_tokens") or estimate_tokens(prompt + content)
+    chars = sum(len(s) for s in batch) or 1
+    result = {}
+    for segment, text in zip(batch, translated):
+        result[segment] = text
+        entry = {"text": text, "tokens": max(1, round(cost * len(segment) / chars))}
+        translation_memory.set(memory_key(segment, language, model), json.dumps(entry, ensure_ascii=False))
+    return result
+
+
+async def translate_segments(segments, language, model=TRANSLATION_MODEL):
+    # Same list back, translated; segments without letters pass through
+    if language not in LANGUAGES:
+        return list(segments)
+    unique = list(dict.fromkeys(s.strip() for s in segments if translatable(s)))
+    found = {}
+    missing = []
+    saved = 0
+    for segment in unique:
+        cached = translation_memory.get(memory_key(segment, language, model))
+        if cached is not None:
+            entry = json.loads(cached)
+            found[segment] = entry["text"]
+            saved += entry["tokens"]
+        else:
+            missing.append(segment)
+
+    if missing:
+        # Concurrent requests missing the same batch share one call
+        group = flight_group("translation")
+        results = await asyncio.gather(*(
+            group.do(hashlib.sha256(json.dumps([language, model, b], ensure_ascii=False).encode("utf-8")).hexdigest(),
+                     _translate_batch, b, language, model)
+            for b in batches(missing)
+        ))
+        for result in results:
+            found.update(result)
+
+    hits = len(unique) - len(missing)
+    translation_segments.inc(language, "hit", amount=hits)
+    translation_segments.inc(language, "miss", amount=len(missing))
+    translation_saved_tokens.observe(language, value=saved)
+    count_for_request("translation", segments=len(unique), cached=hits, saved_tokens=saved)
+    _totals["documents"] += 1
+    _totals["saved_tokens"] += saved
+    return [found.get(s.strip(), s) for s in segments]
+
+
+async def translate(text, language, model=TRANSLATION_MODEL):
+    # Line by line, keeping list markers, headings and blank lines as they are
+    lines = [LINE.match(line).groups() for line in text.split("\n")]
+    bodies = await translate_segments([body for _, body, _ in lines], language, model)
+    return "\n".join(prefix + body + suffix for (prefix, _, suffix), body in zip(lines, bodies))
+
+
+def translation_stats():
+    memory = translation_memory.stats()
+    return {
+        **memory,
+        "documents": _totals["documents"],
+        "calls": _totals["calls"],
+        "saved_tokens": _totals["saved_tokens"],
+        "saved_tokens_per_document": round(_totals["saved_tokens"] / _totals["documents"], 1) if _totals["documents"] else 0.0,
+    }
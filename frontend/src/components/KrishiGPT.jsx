@@ -76,6 +76,10 @@ const KrishiGPT = () => {
           body: JSON.stringify({
             query: inputText,
             language: selectedLanguage,
+            // Recent turns for follow-up questions; the server trims them further
+            history: messages
+              .filter((m) => !m.content.startsWith("❌"))
+              .slice(-6),
           }),
         }
       );
@@ -1,36 +1,33 @@
-import React, { useEffect } from "react";
+import React, { useContext, useEffect } from "react";
+import axios from "axios";
 import { toast } from "react-toastify";
+import { PriceAlertContext, ALERTS_API, getClientId } from "./PriceAlertContext";
 
 const PriceAlertChecker = () => {
+  const { setPriceAlerts } = useContext(PriceAlertContext);
+
   useEffect(() => {
-    const interval = setInterval(() => {
-      const alerts = JSON.parse(localStorage.getItem("priceAlerts")) || [];
-      const mandiData = JSON.parse(localStorage.getItem("mandiData")) || []; // 👈 You must save mandi data locally too when fetching.
+    // ✅ The backend checks alerts on every mandi refresh and pushes hits here
+    const clientId = getClientId();
+    const source = new EventSource(`${ALERTS_API}/stream?client_id=${clientId}`);
 
-      alerts.forEach((alert) => {
-        const match = mandiData.find(
-          (item) =>
-            item.commodity.toLowerCase() === alert.commodity.toLowerCase() &&
-            parseFloat(item.modal_price) >= alert.target
-        );
-        if (match) {
-          toast.info(
-            `🔔 Price Alert: ${match.commodity} at ${match.market} reached ₹${match.modal_price}!`
-          );
+    source.addEventListener("alert", (event) => {
+      const alert = JSON.parse(event.data);
+      toast.info(
+        `🔔 Price Alert: ${alert.commodity} at ${alert.triggered_market} reached ₹${alert.triggered_price}!`
+      );
+      setPriceAlerts((prev) => prev.filter((a) => a.id !== alert.id));
 
-          // Remove triggered alert from storage
-          const updatedAlerts = alerts.filter(
-            (a) => a.commodity !== alert.commodity
-          );
-          localStorage.setItem("priceAlerts", JSON.stringify(updatedAlerts));
-        }
-      });
-    }, 10000); // Every 10 seconds
+      // Notified once; remove it so it isn't replayed on reconnect
+      axios
+        .delete(`${ALERTS_API}/${alert.id}`, { params: { client_id: clientId } })
+        .catch((err) => console.error("Failed to remove price alert:", err));
+    });
 
-    return () => clearInterval(interval);
-  }, []);
+    return () => source.close();
+  }, [setPriceAlerts]);
 
-  return null; // 👉 No UI, silent background checker
+  return null; // 👉 No UI, silent background listener
 };
 
 export default PriceAlertChecker;
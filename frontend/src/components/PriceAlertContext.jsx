@@ -1,10 +1,30 @@
-import React, { createContext, useState } from "react";
+import React, { createContext, useEffect, useState } from "react";
+import axios from "axios";
 
 export const PriceAlertContext = createContext();
 
+export const ALERTS_API = "https://agrisaarthibackend.onrender.com/price-alerts";
+
+// ✅ Alerts live on the server; this browser is identified by a random id
+export const getClientId = () => {
+  let id = localStorage.getItem("priceAlertClientId");
+  if (!id) {
+    id = Math.random().toString(36).slice(2) + Date.now().toString(36);
+    localStorage.setItem("priceAlertClientId", id);
+  }
+  return id;
+};
+
 export const PriceAlertProvider = ({ children }) => {
   const [priceAlerts, setPriceAlerts] = useState([]);
 
+  useEffect(() => {
+    axios
+      .get(ALERTS_API, { params: { client_id: getClientId(), include_triggered: false } })
+      .then((res) => setPriceAlerts(res.data.alerts || []))
+      .catch((err) => console.error("Failed to load price alerts:", err));
+  }, []);
+
   return (
     <PriceAlertContext.Provider value={{ priceAlerts, setPriceAlerts }}>
       {children}
@@ -6,10 +6,10 @@ import { Line } from "react-chartjs-2";
 import { ToastContainer, toast } from "react-toastify";
 import "react-toastify/dist/ReactToastify.css";
 import "chart.js/auto";
-import { PriceAlertContext } from "../components/PriceAlertContext";
+import { PriceAlertContext, ALERTS_API, getClientId } from "../components/PriceAlertContext";
 
 const MandiRates = () => {
-  const { priceAlerts, setPriceAlerts } = useContext(PriceAlertContext);
+  const { setPriceAlerts } = useContext(PriceAlertContext);
   const [mandiData, setMandiData] = useState([]);
   const [originalData, setOriginalData] = useState([]);
   const [commodityList, setCommodityList] = useState([]);
@@ -161,42 +161,27 @@ const MandiRates = () => {
     }
   };
 
-  const handleSetPriceAlert = (item) => {
+  const handleSetPriceAlert = async (item) => {
     const targetPrice = prompt(`Set alert for ${item.commodity} (₹):`);
     if (!targetPrice) return;
 
-    const newAlert = {
-      commodity: item.commodity,
-      target: parseFloat(targetPrice),
-    };
-    const existing = JSON.parse(localStorage.getItem("priceAlerts")) || [];
-    const updated = [...existing, newAlert];
-    localStorage.setItem("priceAlerts", JSON.stringify(updated));
-    setPriceAlerts(updated);
-    toast.success(`🔔 Alert set for ₹${targetPrice}`);
-  };
-
-  useEffect(() => {
-    const interval = setInterval(() => {
-      priceAlerts.forEach((alert) => {
-        const match = mandiData.find(
-          (item) =>
-            item.commodity.toLowerCase() === alert.commodity.toLowerCase() &&
-            parseFloat(item.modal_price) >= alert.target
-        );
-        if (match) {
-          toast.info(
-            `🔔 ${match.commodity} in ${match.market} reached ₹${match.modal_price}`
-          );
-          setPriceAlerts((prev) =>
-            prev.filter((a) => a.commodity !== alert.commodity)
-          );
-        }
+    try {
+      const res = await axios.post(ALERTS_API, {
+        client_id: getClientId(),
+        commodity: item.commodity,
+        market: item.market,
+        target: parseFloat(targetPrice),
+        direction: "above",
       });
-    }, 10000);
-
-    return () => clearInterval(interval);
-  }, [priceAlerts, mandiData]);
+      const alert = res.data.alert;
+      // Already past the target: the checker's stream delivers it right away
+      if (!alert.triggered_at) setPriceAlerts((prev) => [...prev, alert]);
+      toast.success(`🔔 Alert set for ₹${targetPrice}`);
+    } catch (err) {
+      console.error("Failed to set price alert:", err);
+      toast.error("⚠️ Could not set price alert");
+    }
+  };
 
   return (
     <div className="container py-4">